@@ -22,8 +22,20 @@ from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
 import warnings
 warnings.filterwarnings('ignore')
 
+from services.indicator_engine import IndicatorEngine, compute_indicators
+
 logger = logging.getLogger(__name__)
 
+# Agent indicator names -> indicator engine columns
+INDICATOR_COLUMNS = {
+    'sma_5': 'sma_5', 'sma_10': 'sma_10', 'sma_20': 'sma_20',
+    'ema_5': 'ema_5', 'ema_10': 'ema_10', 'ema_20': 'ema_20',
+    'rsi_14': 'rsi', 'macd': 'macd', 'macd_signal': 'macd_signal',
+    'bollinger_upper': 'bb_upper', 'bollinger_lower': 'bb_lower', 'bollinger_middle': 'bb_middle',
+    'stoch_k': 'stoch_k', 'stoch_d': 'stoch_d', 'williams_r': 'williams_r',
+    'cci': 'cci', 'atr': 'atr', 'volume_sma': 'volume_sma'
+}
+
 class ForecastHorizon(Enum):
     """Forecast horizons for day trading."""
     INTRADAY = "intraday"  # 1-4 hours
@@ -100,6 +112,7 @@ class DayForecastAgent:
         self.forecasts: Dict[str, DayForecast] = {}
         self.forecast_history: List[DayForecast] = []
         self.metrics: Optional[DayForecastMetrics] = None
+        self.indicator_engine = IndicatorEngine()
         
         # Model parameters
         self.lookback_periods = 20  # 20 periods for technical indicators
@@ -135,139 +148,27 @@ class DayForecastAgent:
             # Initialize scalers
             self.scalers[horizon.value] = StandardScaler()
     
-    def _calculate_technical_indicators(self, data: pd.DataFrame) -> Dict[str, float]:
-        """Calculate technical indicators for day trading."""
+    def _calculate_technical_indicators(self, data: pd.DataFrame, symbol: Optional[str] = None) -> Dict[str, float]:
+        """
+        Calculate technical indicators for day trading.
+        
+        With a symbol, the agent's indicator engine keeps streaming state for it
+        and only processes bars added since the previous call.
+        """
         indicators = {}
         
         if len(data) < self.lookback_periods:
             return indicators
         
-        # Price data
-        close = data['close'].values
-        high = data['high'].values
-        low = data['low'].values
-        volume = data['volume'].values
-        
-        # Simple Moving Averages
-        indicators['sma_5'] = np.mean(close[-5:])
-        indicators['sma_10'] = np.mean(close[-10:])
-        indicators['sma_20'] = np.mean(close[-20:])
-        
-        # Exponential Moving Averages
-        alpha_5 = 2 / (5 + 1)
-        alpha_10 = 2 / (10 + 1)
-        alpha_20 = 2 / (20 + 1)
-        
-        ema_5 = close[-1]
-        ema_10 = close[-1]
-        ema_20 = close[-1]
-        
-        for i in range(1, min(20, len(close))):
-            if i < 5:
-                ema_5 = alpha_5 * close[-(i+1)] + (1 - alpha_5) * ema_5
-            if i < 10:
-                ema_10 = alpha_10 * close[-(i+1)] + (1 - alpha_10) * ema_10
-            ema_20 = alpha_20 * close[-(i+1)] + (1 - alpha_20) * ema_20
-        
-        indicators['ema_5'] = ema_5
-        indicators['ema_10'] = ema_10
-        indicators['ema_20'] = ema_20
-        
-        # RSI (14-period)
-        if len(close) >= 15:
-            deltas = np.diff(close[-15:])
-            gains = np.where(deltas > 0, deltas, 0)
-            losses = np.where(deltas < 0, -deltas, 0)
-            
-            avg_gain = np.mean(gains)
-            avg_loss = np.mean(losses)
-            
-            if avg_loss != 0:
-                rs = avg_gain / avg_loss
-                rsi = 100 - (100 / (1 + rs))
-                indicators['rsi_14'] = rsi
-            else:
-                indicators['rsi_14'] = 100
-        
-        # MACD
-        if len(close) >= 26:
-            ema_12 = close[-1]
-            ema_26 = close[-1]
-            
-            for i in range(1, min(26, len(close))):
-                if i < 12:
-                    ema_12 = (2 / 13) * close[-(i+1)] + (11 / 13) * ema_12
-                ema_26 = (2 / 27) * close[-(i+1)] + (25 / 27) * ema_26
-            
-            macd = ema_12 - ema_26
-            indicators['macd'] = macd
-            
-            # MACD Signal (9-period EMA of MACD)
-            if len(close) >= 35:
-                macd_signal = macd
-                for i in range(1, 9):
-                    macd_signal = (2 / 10) * macd + (8 / 10) * macd_signal
-                indicators['macd_signal'] = macd_signal
-        
-        # Bollinger Bands
-        if len(close) >= 20:
-            sma_20 = indicators['sma_20']
-            std_20 = np.std(close[-20:])
-            indicators['bollinger_upper'] = sma_20 + (2 * std_20)
-            indicators['bollinger_lower'] = sma_20 - (2 * std_20)
-            indicators['bollinger_middle'] = sma_20
-        
-        # Stochastic Oscillator
-        if len(close) >= 14:
-            lowest_low = np.min(low[-14:])
-            highest_high = np.max(high[-14:])
-            current_close = close[-1]
-            
-            if highest_high != lowest_low:
-                stoch_k = ((current_close - lowest_low) / (highest_high - lowest_low)) * 100
-                indicators['stoch_k'] = stoch_k
-                
-                # Stochastic D (3-period SMA of K)
-                if len(close) >= 16:
-                    stoch_d = np.mean([stoch_k] * 3)  # Simplified
-                    indicators['stoch_d'] = stoch_d
-        
-        # Williams %R
-        if len(close) >= 14:
-            highest_high = np.max(high[-14:])
-            lowest_low = np.min(low[-14:])
-            current_close = close[-1]
-            
-            if highest_high != lowest_low:
-                williams_r = ((highest_high - current_close) / (highest_high - lowest_low)) * -100
-                indicators['williams_r'] = williams_r
-        
-        # Commodity Channel Index (CCI)
-        if len(close) >= 20:
-            typical_price = (high[-20:] + low[-20:] + close[-20:]) / 3
-            sma_tp = np.mean(typical_price)
-            mean_deviation = np.mean(np.abs(typical_price - sma_tp))
-            
-            if mean_deviation != 0:
-                cci = (typical_price[-1] - sma_tp) / (0.015 * mean_deviation)
-                indicators['cci'] = cci
-        
-        # Average True Range (ATR)
-        if len(close) >= 14:
-            tr_values = []
-            for i in range(1, min(15, len(close))):
-                tr1 = high[-(i+1)] - low[-(i+1)]
-                tr2 = abs(high[-(i+1)] - close[-i])
-                tr3 = abs(low[-(i+1)] - close[-i])
-                tr = max(tr1, tr2, tr3)
-                tr_values.append(tr)
-            
-            atr = np.mean(tr_values)
-            indicators['atr'] = atr
+        if symbol is None:
+            values = compute_indicators(data).iloc[-1].to_dict()
+        else:
+            values = self.indicator_engine.sync(symbol, data)
         
-        # Volume SMA
-        if len(volume) >= 20:
-            indicators['volume_sma'] = np.mean(volume[-20:])
+        for name, column in INDICATOR_COLUMNS.items():
+            value = values.get(column, np.nan)
+            if np.isfinite(value):
+                indicators[name] = float(value)
         
         return indicators
     
@@ -448,7 +349,7 @@ class DayForecastAgent:
             current_price = data['close'].iloc[-1]
             
             # Calculate technical indicators
-            indicators = self._calculate_technical_indicators(data)
+            indicators = self._calculate_technical_indicators(data, symbol)
             
             # Generate technical signals
             signals = self._generate_technical_signals(indicators, current_price)
@@ -616,8 +517,9 @@ class DayForecastAgent:
             
             base_price = base_prices.get(symbol, 100.0)
             
-            # Generate time series data
-            dates = pd.date_range(end=datetime.now(), periods=periods, freq='D')
+            # Generate time series data; daily bars are stamped at midnight so repeated
+            # calls produce the same bar times and the indicator engine can resume
+            dates = pd.date_range(end=pd.Timestamp(datetime.now()).normalize(), periods=periods, freq='D')
             
             # Generate price data with some trend and volatility
             np.random.seed(42)  # For reproducible results
@@ -666,7 +568,7 @@ class DayForecastAgent:
         """Predict price using ensemble models."""
         try:
             # Prepare features
-            features = self._prepare_features(data)
+            features = self._prepare_features(data, symbol)
             
             if features is None or len(features) == 0:
                 # Fallback to simple trend-based prediction
@@ -704,14 +606,14 @@ class DayForecastAgent:
             logger.error(f"Error predicting price: {e}")
             return self._simple_price_prediction(data)
     
-    def _prepare_features(self, data: pd.DataFrame) -> Optional[np.ndarray]:
+    def _prepare_features(self, data: pd.DataFrame, symbol: Optional[str] = None) -> Optional[np.ndarray]:
         """Prepare features for model prediction."""
         try:
             if len(data) < 20:
                 return None
             
             # Calculate technical indicators
-            indicators = self._calculate_technical_indicators(data)
+            indicators = self._calculate_technical_indicators(data, symbol)
             
             # Create feature vector
             features = []
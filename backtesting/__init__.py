@@ -3,6 +3,7 @@ Backtesting module for AI Market Analysis System.
 """
 
 from .backtest_engine import BacktestEngine, BacktestResults, Order, Trade, OrderType, OrderSide
+from .parameter_sweep import ParameterSweep
 
 __all__ = [
     'BacktestEngine',
@@ -10,5 +11,6 @@ __all__ = [
     'Order',
     'Trade',
     'OrderType',
-    'OrderSide'
+    'OrderSide',
+    'ParameterSweep'
 ]
@@ -18,11 +18,23 @@ import warnings
 warnings.filterwarnings('ignore')
 
 from ..agents.base_agent import AgentSignal, SignalType
+from .data_cache import BarCache
 from ..context.regime_detection import MarkovRegimeDetector, RegimeType
 
 logger = logging.getLogger(__name__)
 
 
+def align_timestamp(value: Any, reference: Any) -> pd.Timestamp:
+    """Convert a date to a Timestamp comparable with `reference` (matching its timezone)."""
+    timestamp = pd.Timestamp(value)
+    tz = getattr(reference, 'tz', None)
+    if tz is not None and timestamp.tz is None:
+        return timestamp.tz_localize(tz)
+    if tz is None and timestamp.tz is not None:
+        return timestamp.tz_convert(None)
+    return timestamp
+
+
 class OrderType(Enum):
     """Order types for backtesting."""
     MARKET = "market"
@@ -68,6 +80,18 @@ class Trade:
     metadata: Dict[str, Any]
 
 
+@dataclass
+class MarketData:
+    """Historical bars pivoted into date x symbol arrays for simulation."""
+    dates: pd.DatetimeIndex
+    symbols: List[str]
+    close: np.ndarray             # close prices, NaN where a symbol has no bar
+    valuation_prices: np.ndarray  # last known close, 0 before a symbol's first bar
+    has_bar: np.ndarray           # whether a symbol has a bar on each date
+    history_lengths: np.ndarray   # bars per symbol up to and including each date
+    frames: List[pd.DataFrame]    # per-symbol bars sorted by date
+
+
 @dataclass
 class BacktestResults:
     """Results from a backtest."""
@@ -117,20 +141,30 @@ class BacktestEngine:
             'lookback_periods': 252,   # 1 year of daily data
             'benchmark_symbol': 'SPY',
             'risk_free_rate': 0.02,    # 2% annual risk-free rate
-            'regime_detection': True
+            'regime_detection': True,
+            'min_history': 20,         # Bars required before a strategy is called
+            'data_cache_path': None,   # Local bar cache directory, e.g. 'data/backtest_cache' (None disables it)
+            'offline_data': False,     # Serve bars only from the local cache
+            'data_fixtures_path': None # Directory of <SYMBOL>.csv bars to seed the cache
         }
         
         if config:
             default_config.update(config)
         
         self.config = default_config
-        self.regime_detector = MarkovRegimeDetector() if config.get('regime_detection', True) else None
+        self.regime_detector = MarkovRegimeDetector() if self.config.get('regime_detection', True) else None
+        self.bar_cache = BarCache(
+            self.config['data_cache_path'],
+            offline=self.config['offline_data'],
+            fixtures_path=self.config['data_fixtures_path']
+        ) if self.config['data_cache_path'] else None
         self.orders = []
         self.trades = []
         self.equity_curve = []
         self.current_positions = {}
         self.cash = self.config['initial_capital']
         self.portfolio_value = self.config['initial_capital']
+        self._init_position_arrays([])
         
         logger.info(f"Initialized BacktestEngine with config: {self.config}")
     
@@ -156,12 +190,38 @@ class BacktestEngine:
         try:
             logger.info(f"Starting backtest for {agent_name} from {start_date} to {end_date}")
             
-            # Reset state
-            self._reset_backtest_state()
-            
             # Fetch historical data
             historical_data = self._fetch_historical_data(symbols, start_date, end_date)
             
+            return self.run_backtest_on_data(historical_data, strategy_function, agent_name)
+            
+        except Exception as e:
+            logger.error(f"Backtest failed: {e}")
+            return self._create_empty_results()
+    
+    def run_backtest_on_data(self,
+                             historical_data: pd.DataFrame,
+                             strategy_function: Callable[[pd.DataFrame, str], AgentSignal],
+                             agent_name: str = "BacktestAgent",
+                             trading_start: Optional[datetime] = None) -> BacktestResults:
+        """
+        Run a backtest on already loaded historical data.
+        
+        Args:
+            historical_data: Long-format bars with 'symbol' and 'date' columns,
+                as returned by _fetch_historical_data
+            strategy_function: Function that generates trading signals
+            agent_name: Name of the agent being backtested
+            trading_start: Optional first date to trade on; earlier bars only
+                serve as strategy history (warm-up)
+            
+        Returns:
+            Backtest results
+        """
+        try:
+            # Reset state
+            self._reset_backtest_state()
+            
             if historical_data.empty:
                 logger.error("No historical data available for backtest")
                 return self._create_empty_results()
@@ -171,7 +231,7 @@ class BacktestEngine:
                 self.regime_detector.fit(historical_data)
             
             # Run backtest simulation
-            self._run_simulation(historical_data, strategy_function, agent_name)
+            self._run_simulation(historical_data, strategy_function, agent_name, trading_start)
             
             # Calculate results
             results = self._calculate_results(historical_data, agent_name)
@@ -191,6 +251,7 @@ class BacktestEngine:
         self.current_positions = {}
         self.cash = self.config['initial_capital']
         self.portfolio_value = self.config['initial_capital']
+        self._init_position_arrays([])
     
     def _fetch_historical_data(self, symbols: List[str], start_date: datetime, end_date: datetime) -> pd.DataFrame:
         """Fetch historical data for backtesting."""
@@ -199,8 +260,11 @@ class BacktestEngine:
             
             for symbol in symbols:
                 try:
-                    ticker = yf.Ticker(symbol)
-                    data = ticker.history(start=start_date, end=end_date)
+                    if self.bar_cache:
+                        data = self.bar_cache.get_bars(symbol, start_date, end_date)
+                    else:
+                        ticker = yf.Ticker(symbol)
+                        data = ticker.history(start=start_date, end=end_date)
                     
                     if not data.empty:
                         all_data[symbol] = data
@@ -225,31 +289,42 @@ class BacktestEngine:
             logger.error(f"Historical data fetching failed: {e}")
             return pd.DataFrame()
     
-    def _run_simulation(self, data: pd.DataFrame, strategy_function: Callable, agent_name: str) -> None:
-        """Run the backtest simulation."""
+    def _run_simulation(self, data: pd.DataFrame, strategy_function: Callable, agent_name: str,
+                        trading_start: Optional[datetime] = None) -> None:
+        """
+        Run the backtest simulation.
+        
+        The data is pivoted once into per-symbol arrays; each day the strategy
+        receives an expanding-window slice of that symbol's pre-sorted frame
+        rather than a freshly filtered copy of the whole dataset.
+        """
         try:
-            # Group data by date for daily simulation
-            daily_data = data.groupby('date')
-            
-            for date, day_data in daily_data:
+            market = self._prepare_market_data(data)
+            self._init_position_arrays(market.symbols)
+            min_history = self.config['min_history']
+            first_day = 0
+            if trading_start is not None:
+                first_day = int(market.dates.searchsorted(align_timestamp(trading_start, market.dates[0])))
+            
+            for day_index in range(first_day, len(market.dates)):
+                date = market.dates[day_index]
+                
                 # Update portfolio value
-                self._update_portfolio_value(day_data)
+                self._update_portfolio_value(market.valuation_prices[day_index])
                 
-                # Generate signals for each symbol
-                for symbol in day_data['symbol'].unique():
-                    symbol_data = day_data[day_data['symbol'] == symbol]
+                # Generate signals for each symbol trading today
+                for column in np.flatnonzero(market.has_bar[day_index]):
+                    history_length = market.history_lengths[day_index, column]
                     
-                    if len(symbol_data) > 0:
-                        # Get historical data up to current date
-                        historical_data = data[data['date'] <= date]
-                        symbol_historical = historical_data[historical_data['symbol'] == symbol]
+                    if history_length >= min_history:  # Minimum data requirement
+                        symbol = market.symbols[column]
+                        
+                        # Expanding window up to and including the current date
+                        signal = strategy_function(market.frames[column].iloc[:history_length], symbol)
                         
-                        if len(symbol_historical) >= 20:  # Minimum data requirement
-                            # Generate signal
-                            signal = strategy_function(symbol_historical, symbol)
-                            
-                            # Process signal
-                            self._process_signal(signal, symbol_data.iloc[0], agent_name)
+                        # Process signal
+                        if signal is not None:
+                            self._process_signal(signal, float(market.close[day_index, column]), date, agent_name)
                 
                 # Record equity curve
                 self.equity_curve.append({
@@ -261,29 +336,61 @@ class BacktestEngine:
             
         except Exception as e:
             logger.error(f"Simulation failed: {e}")
+        finally:
+            self._sync_positions()
+    
+    def _prepare_market_data(self, data: pd.DataFrame) -> MarketData:
+        """Pivot long-format bars into date x symbol arrays and per-symbol frames."""
+        symbols = list(pd.unique(data['symbol']))
+        data = data.sort_values(['symbol', 'date'], kind='stable')
+        
+        close = data.pivot_table(index='date', columns='symbol', values='Close', aggfunc='first')
+        close = close.reindex(columns=symbols)
+        has_bar = close.notna().to_numpy()
+        groups = dict(tuple(data.groupby('symbol', sort=False)))
+        
+        return MarketData(
+            dates=close.index,
+            symbols=symbols,
+            close=close.to_numpy(dtype=np.float64),
+            valuation_prices=close.ffill().fillna(0.0).to_numpy(dtype=np.float64),
+            has_bar=has_bar,
+            history_lengths=np.cumsum(has_bar, axis=0),
+            frames=[groups[symbol].reset_index(drop=True) for symbol in symbols]
+        )
+    
+    def _init_position_arrays(self, symbols: List[str]) -> None:
+        """Allocate per-symbol position arrays."""
+        self._symbol_columns = {symbol: column for column, symbol in enumerate(symbols)}
+        self._symbols = list(symbols)
+        self._quantities = np.zeros(len(symbols), dtype=np.float64)
+        self._cost_basis = np.zeros(len(symbols), dtype=np.float64)
+        self._entry_times = np.empty(len(symbols), dtype=object)
+    
+    def _sync_positions(self) -> None:
+        """Expose the open positions from the position arrays as `current_positions`."""
+        self.current_positions = {
+            self._symbols[column]: {
+                'quantity': float(self._quantities[column]),
+                'cost_basis': float(self._cost_basis[column]),
+                'avg_price': float(self._cost_basis[column] / self._quantities[column]),
+                'entry_time': self._entry_times[column]
+            }
+            for column in np.flatnonzero(self._quantities > 0)
+        }
     
-    def _update_portfolio_value(self, day_data: pd.DataFrame) -> None:
-        """Update portfolio value based on current positions."""
+    def _update_portfolio_value(self, prices: np.ndarray) -> None:
+        """Update portfolio value from the latest known price of each position."""
         try:
-            positions_value = 0
-            
-            for symbol, position in self.current_positions.items():
-                symbol_data = day_data[day_data['symbol'] == symbol]
-                
-                if not symbol_data.empty:
-                    current_price = symbol_data.iloc[0]['Close']
-                    positions_value += position['quantity'] * current_price
-            
-            self.portfolio_value = self.cash + positions_value
+            self.portfolio_value = self.cash + float(self._quantities @ prices)
             
         except Exception as e:
             logger.error(f"Portfolio value update failed: {e}")
     
-    def _process_signal(self, signal: AgentSignal, price_data: pd.Series, agent_name: str) -> None:
+    def _process_signal(self, signal: AgentSignal, current_price: float, timestamp: datetime, agent_name: str) -> None:
         """Process a trading signal."""
         try:
             symbol = signal.asset_symbol
-            current_price = price_data['Close']
             
             # Apply slippage
             execution_price = current_price * (1 + self.config['slippage'] if signal.signal_type == SignalType.BUY else 1 - self.config['slippage'])
@@ -291,41 +398,34 @@ class BacktestEngine:
             # Calculate position size
             position_size = self._calculate_position_size(signal, current_price)
             
-            if position_size <= 0:
+            if position_size <= 0 or symbol not in self._symbol_columns:
                 return
             
             # Create order
             if signal.signal_type == SignalType.BUY:
-                order = Order(
-                    symbol=symbol,
-                    side=OrderSide.BUY,
-                    order_type=OrderType.MARKET,
-                    quantity=position_size,
-                    price=execution_price,
-                    timestamp=price_data.name,
-                    agent_name=agent_name,
-                    signal_confidence=signal.confidence,
-                    metadata=signal.metadata
-                )
-                
-                # Execute buy order
-                self._execute_buy_order(order, price_data)
-                
+                side = OrderSide.BUY
             elif signal.signal_type == SignalType.SELL:
-                order = Order(
-                    symbol=symbol,
-                    side=OrderSide.SELL,
-                    order_type=OrderType.MARKET,
-                    quantity=position_size,
-                    price=execution_price,
-                    timestamp=price_data.name,
-                    agent_name=agent_name,
-                    signal_confidence=signal.confidence,
-                    metadata=signal.metadata
-                )
-                
-                # Execute sell order
-                self._execute_sell_order(order, price_data)
+                side = OrderSide.SELL
+            else:
+                return
+            
+            order = Order(
+                symbol=symbol,
+                side=side,
+                order_type=OrderType.MARKET,
+                quantity=position_size,
+                price=execution_price,
+                timestamp=timestamp,
+                agent_name=agent_name,
+                signal_confidence=signal.confidence,
+                metadata=signal.metadata
+            )
+            
+            # Execute order
+            if side == OrderSide.BUY:
+                self._execute_buy_order(order)
+            else:
+                self._execute_sell_order(order)
             
             # Record order
             self.orders.append(order)
@@ -355,7 +455,7 @@ class BacktestEngine:
             logger.error(f"Position size calculation failed: {e}")
             return 0
     
-    def _execute_buy_order(self, order: Order, price_data: pd.Series) -> None:
+    def _execute_buy_order(self, order: Order) -> None:
         """Execute a buy order."""
         try:
             cost = order.quantity * order.price
@@ -366,42 +466,25 @@ class BacktestEngine:
                 # Update cash
                 self.cash -= total_cost
                 
-                # Update position
-                if order.symbol in self.current_positions:
-                    # Add to existing position
-                    existing_position = self.current_positions[order.symbol]
-                    total_quantity = existing_position['quantity'] + order.quantity
-                    total_cost_basis = existing_position['cost_basis'] + cost
-                    avg_price = total_cost_basis / total_quantity
-                    
-                    self.current_positions[order.symbol] = {
-                        'quantity': total_quantity,
-                        'cost_basis': total_cost_basis,
-                        'avg_price': avg_price,
-                        'entry_time': existing_position['entry_time']
-                    }
-                else:
-                    # New position
-                    self.current_positions[order.symbol] = {
-                        'quantity': order.quantity,
-                        'cost_basis': cost,
-                        'avg_price': order.price,
-                        'entry_time': order.timestamp
-                    }
+                # Update position (average price is cost basis / quantity)
+                column = self._symbol_columns[order.symbol]
+                if self._quantities[column] <= 0:
+                    self._entry_times[column] = order.timestamp
+                self._quantities[column] += order.quantity
+                self._cost_basis[column] += cost
             
         except Exception as e:
             logger.error(f"Buy order execution failed: {e}")
     
-    def _execute_sell_order(self, order: Order, price_data: pd.Series) -> None:
+    def _execute_sell_order(self, order: Order) -> None:
         """Execute a sell order."""
         try:
-            if order.symbol not in self.current_positions:
-                return
-            
-            position = self.current_positions[order.symbol]
+            column = self._symbol_columns[order.symbol]
+            position_quantity = self._quantities[column]
+            position_cost_basis = self._cost_basis[column]
             
             # Calculate shares to sell
-            shares_to_sell = min(order.quantity, position['quantity'])
+            shares_to_sell = min(order.quantity, position_quantity)
             
             if shares_to_sell <= 0:
                 return
@@ -415,41 +498,39 @@ class BacktestEngine:
             self.cash += net_proceeds
             
             # Calculate P&L
-            cost_basis = (shares_to_sell / position['quantity']) * position['cost_basis']
+            cost_basis = (shares_to_sell / position_quantity) * position_cost_basis
             pnl = proceeds - cost_basis - commission
             pnl_percent = pnl / cost_basis if cost_basis > 0 else 0
+            entry_time = self._entry_times[column]
             
             # Create trade record
             trade = Trade(
                 symbol=order.symbol,
                 side=OrderSide.SELL,
                 quantity=shares_to_sell,
-                entry_price=position['avg_price'],
+                entry_price=position_cost_basis / position_quantity,
                 exit_price=order.price,
-                entry_time=position['entry_time'],
+                entry_time=entry_time,
                 exit_time=order.timestamp,
                 pnl=pnl,
                 pnl_percent=pnl_percent,
                 agent_name=order.agent_name,
-                holding_period=(order.timestamp - position['entry_time']).days,
+                holding_period=(order.timestamp - entry_time).days,
                 metadata=order.metadata
             )
             
             self.trades.append(trade)
             
             # Update position
-            remaining_quantity = position['quantity'] - shares_to_sell
+            remaining_quantity = position_quantity - shares_to_sell
             if remaining_quantity > 0:
-                remaining_cost_basis = position['cost_basis'] - cost_basis
-                self.current_positions[order.symbol] = {
-                    'quantity': remaining_quantity,
-                    'cost_basis': remaining_cost_basis,
-                    'avg_price': remaining_cost_basis / remaining_quantity,
-                    'entry_time': position['entry_time']
-                }
+                self._quantities[column] = remaining_quantity
+                self._cost_basis[column] = position_cost_basis - cost_basis
             else:
                 # Close position
-                del self.current_positions[order.symbol]
+                self._quantities[column] = 0.0
+                self._cost_basis[column] = 0.0
+                self._entry_times[column] = None
             
         except Exception as e:
             logger.error(f"Sell order execution failed: {e}")
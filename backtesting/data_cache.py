@@ -0,0 +1,287 @@
+"""
+Local Historical Bar Cache for Backtesting
+
+This module keeps daily bars on local disk so repeated backtests read from
+disk instead of the network. Bars are stored per symbol and partitioned by
+year as NumPy archives; a per-symbol manifest records which date ranges have
+been fetched, so overlapping requests only fetch the missing gaps. In offline
+mode nothing is fetched and the cache (optionally seeded from CSV fixtures)
+is the only data source, which makes backtests reproducible.
+
+Layout:
+    <cache_path>/<SYMBOL>/manifest.json   columns, timezone, covered date ranges
+    <cache_path>/<SYMBOL>/<YEAR>.npz      dates (int64 ns, UTC) and float64 columns
+"""
+
+import json
+import os
+import shutil
+import pandas as pd
+import numpy as np
+from typing import Dict, Any, Optional, List, Tuple, Callable
+from datetime import datetime, date, timedelta
+from pathlib import Path
+import logging
+
+logger = logging.getLogger(__name__)
+
+# (symbol, start, end) -> bars indexed by date, end exclusive
+BarFetcher = Callable[[str, date, date], pd.DataFrame]
+
+
+def fetch_yfinance_bars(symbol: str, start: date, end: date) -> pd.DataFrame:
+    """Fetch daily bars from Yahoo Finance."""
+    import yfinance as yf
+    return yf.Ticker(symbol).history(start=start, end=end)
+
+
+class BarCache:
+    """
+    Persistent cache of daily bars that fills only the missing date ranges.
+    """
+
+    MANIFEST = 'manifest.json'
+
+    def __init__(self, cache_path: str, offline: bool = False, fetcher: Optional[BarFetcher] = None,
+                 fixtures_path: Optional[str] = None):
+        """
+        Initialize the bar cache.
+
+        Args:
+            cache_path: Directory holding the cached bars
+            offline: Never fetch; serve only what is cached
+            fetcher: Function fetching bars for a symbol and date range
+                (defaults to Yahoo Finance)
+            fixtures_path: Directory of <SYMBOL>.csv files to seed the cache from
+        """
+        self.cache_path = Path(cache_path)
+        self.cache_path.mkdir(parents=True, exist_ok=True)
+        self.offline = offline
+        self.fetcher = fetcher or fetch_yfinance_bars
+
+        if fixtures_path:
+            self.seed_from_fixtures(fixtures_path)
+
+    def get_bars(self, symbol: str, start_date: datetime, end_date: datetime) -> pd.DataFrame:
+        """
+        Get daily bars for a date range, fetching only the uncached gaps.
+
+        Args:
+            symbol: Ticker symbol
+            start_date: First date (inclusive)
+            end_date: Last date (exclusive)
+
+        Returns:
+            Bars indexed by date, in the fetcher's format
+        """
+        start, end = _as_date(start_date), _as_date(end_date)
+        gaps = self.missing_ranges(symbol, start, end)
+
+        if gaps and self.offline:
+            logger.warning(f"Offline mode: {symbol} has no cached bars for {len(gaps)} range(s) in {start} - {end}")
+        elif gaps:
+            for gap_start, gap_end in gaps:
+                bars = self.fetcher(symbol, gap_start, gap_end)
+                self.store_bars(symbol, bars, gap_start, gap_end)
+                logger.info(f"Fetched {len(bars)} periods for {symbol} ({gap_start} - {gap_end})")
+
+        return self._read_range(symbol, start, end)
+
+    def store_bars(self, symbol: str, bars: pd.DataFrame, start_date: Optional[datetime] = None,
+                   end_date: Optional[datetime] = None) -> None:
+        """
+        Write bars into the cache and mark their range as covered.
+
+        Ranges that reach today are only marked covered up to yesterday, so
+        the still-forming bar is fetched again next time.
+
+        Args:
+            symbol: Ticker symbol
+            bars: Bars indexed by date
+            start_date: Start of the covered range (defaults to the first bar)
+            end_date: End of the covered range, exclusive (defaults to the day after the last bar)
+        """
+        manifest = self._read_manifest(symbol)
+        if not bars.empty:
+            index = pd.DatetimeIndex(bars.index)
+            if manifest.get('tz') is None and index.tz is not None:
+                manifest['tz'] = str(index.tz)
+            for column in bars.columns:
+                if column not in manifest['columns']:
+                    manifest['columns'].append(column)
+
+            local_dates = _local_dates(index)
+            for year in np.unique(local_dates.year):
+                self._merge_partition(symbol, int(year), bars[np.asarray(local_dates.year == year)], manifest)
+
+        if start_date is None and bars.empty:
+            self._write_manifest(symbol, manifest)
+            return
+
+        start = _as_date(start_date) if start_date is not None else _local_dates(pd.DatetimeIndex(bars.index)).min().date()
+        end = _as_date(end_date) if end_date is not None else (
+            _local_dates(pd.DatetimeIndex(bars.index)).max().date() + timedelta(days=1)
+        )
+        end = min(end, date.today())
+        if start < end:
+            manifest['coverage'] = _merge_ranges(manifest['coverage'] + [(start, end)])
+        self._write_manifest(symbol, manifest)
+
+    def missing_ranges(self, symbol: str, start_date: datetime, end_date: datetime) -> List[Tuple[date, date]]:
+        """
+        Date ranges in [start, end) that have not been cached yet.
+
+        Args:
+            symbol: Ticker symbol
+            start_date: First date (inclusive)
+            end_date: Last date (exclusive)
+
+        Returns:
+            List of (start, end) gaps, end exclusive
+        """
+        start, end = _as_date(start_date), _as_date(end_date)
+        gaps = []
+        cursor = start
+        for covered_start, covered_end in self._read_manifest(symbol)['coverage']:
+            if covered_end <= cursor:
+                continue
+            if covered_start >= end:
+                break
+            if covered_start > cursor:
+                gaps.append((cursor, covered_start))
+            cursor = max(cursor, covered_end)
+        if cursor < end:
+            gaps.append((cursor, end))
+        return gaps
+
+    def seed_from_fixtures(self, fixtures_path: str) -> int:
+        """
+        Seed the cache from <SYMBOL>.csv files with a 'Date' column.
+
+        Symbols that already have cached coverage are skipped, so reopening a
+        seeded cache does not re-read and re-write the fixtures.
+
+        Args:
+            fixtures_path: Directory of fixture files
+
+        Returns:
+            Number of symbols seeded
+        """
+        seeded = 0
+        for fixture_file in sorted(Path(fixtures_path).glob('*.csv')):
+            symbol = fixture_file.stem
+            if self._read_manifest(symbol)['coverage']:
+                continue
+            bars = pd.read_csv(fixture_file, index_col='Date')
+            bars.index = pd.to_datetime(bars.index, utc=True)
+            self.store_bars(symbol, bars)
+            seeded += 1
+        if seeded:
+            logger.info(f"Seeded bar cache with {seeded} fixture symbols from {fixtures_path}")
+        return seeded
+
+    def clear(self, symbol: Optional[str] = None) -> None:
+        """Remove cached bars for one symbol or for all symbols."""
+        targets = [self.cache_path / symbol] if symbol else [p for p in self.cache_path.iterdir() if p.is_dir()]
+        for target in targets:
+            shutil.rmtree(target, ignore_errors=True)
+
+    def _read_range(self, symbol: str, start: date, end: date) -> pd.DataFrame:
+        """Cached bars for [start, end) from the yearly partitions."""
+        manifest = self._read_manifest(symbol)
+        frames = [
+            frame for frame in (self._read_partition(symbol, year, manifest) for year in range(start.year, end.year + 1))
+            if frame is not None
+        ]
+        if not frames:
+            return pd.DataFrame()
+
+        bars = pd.concat(frames)
+        local_dates = _local_dates(pd.DatetimeIndex(bars.index))
+        mask = (local_dates >= pd.Timestamp(start)) & (local_dates < pd.Timestamp(end))
+        return bars[np.asarray(mask)]
+
+    def _read_partition(self, symbol: str, year: int, manifest: Dict[str, Any]) -> Optional[pd.DataFrame]:
+        """Load one year of bars, or None if it is not cached."""
+        partition_file = self.cache_path / symbol / f'{year}.npz'
+        if not partition_file.exists():
+            return None
+
+        with np.load(partition_file) as partition:
+            index = pd.DatetimeIndex(partition['dates'].view('datetime64[ns]')).tz_localize('UTC')
+            if manifest.get('tz'):
+                index = index.tz_convert(manifest['tz'])
+            else:
+                index = index.tz_localize(None)
+            columns = {column: partition[column] for column in manifest['columns'] if column in partition.files}
+        return pd.DataFrame(columns, index=index.rename('Date'))
+
+    def _merge_partition(self, symbol: str, year: int, bars: pd.DataFrame, manifest: Dict[str, Any]) -> None:
+        """Merge new bars into a yearly partition; new values win on duplicate dates."""
+        existing = self._read_partition(symbol, year, manifest)
+        bars = bars.copy()
+        bars.index = pd.DatetimeIndex(bars.index).rename('Date')
+        if existing is not None:
+            if bars.index.tz is not None and existing.index.tz is not None:
+                bars.index = bars.index.tz_convert(existing.index.tz)
+            bars = pd.concat([existing, bars])
+        bars = bars[~bars.index.duplicated(keep='last')].sort_index()
+
+        index = bars.index.tz_convert('UTC') if bars.index.tz is not None else bars.index
+        arrays = {'dates': index.as_unit('ns').asi8}
+        for column in manifest['columns']:
+            if column in bars.columns:
+                arrays[column] = bars[column].to_numpy(dtype=np.float64)
+
+        symbol_dir = self.cache_path / symbol
+        symbol_dir.mkdir(parents=True, exist_ok=True)
+        tmp_file = symbol_dir / f'{year}.tmp.npz'
+        np.savez(tmp_file, **arrays)
+        os.replace(tmp_file, symbol_dir / f'{year}.npz')
+
+    def _read_manifest(self, symbol: str) -> Dict[str, Any]:
+        manifest_file = self.cache_path / symbol / self.MANIFEST
+        if not manifest_file.exists():
+            return {'tz': None, 'columns': [], 'coverage': []}
+
+        with open(manifest_file, 'r') as f:
+            manifest = json.load(f)
+        manifest['coverage'] = [(date.fromisoformat(s), date.fromisoformat(e)) for s, e in manifest['coverage']]
+        return manifest
+
+    def _write_manifest(self, symbol: str, manifest: Dict[str, Any]) -> None:
+        symbol_dir = self.cache_path / symbol
+        symbol_dir.mkdir(parents=True, exist_ok=True)
+        data = dict(manifest)
+        data['coverage'] = [(s.isoformat(), e.isoformat()) for s, e in manifest['coverage']]
+        tmp_file = symbol_dir / (self.MANIFEST + '.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_file, symbol_dir / self.MANIFEST)
+
+
+def _as_date(value: Any) -> date:
+    """Convert a datetime/date/string to a date."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return pd.Timestamp(value).date()
+
+
+def _local_dates(index: pd.DatetimeIndex) -> pd.DatetimeIndex:
+    """Exchange-local calendar dates of a bar index, as naive midnight timestamps."""
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.normalize()
+
+
+def _merge_ranges(ranges: List[Tuple[date, date]]) -> List[Tuple[date, date]]:
+    """Sort and merge overlapping or touching date ranges."""
+    merged: List[Tuple[date, date]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
@@ -0,0 +1,362 @@
+"""
+Parameter Sweeps and Walk-Forward Analysis for the Backtest Engine
+
+This module runs many backtest configurations over one historical dataset.
+The bars are fetched once and copied into a shared memory block; worker
+processes attach to it instead of re-fetching or unpickling the data for
+every run. Parameter grids and rolling train/test windows are fanned out
+across a process pool and the results are aggregated into comparison tables.
+"""
+
+import itertools
+import pandas as pd
+import numpy as np
+from typing import Dict, Any, Optional, List, Tuple, Callable
+from datetime import datetime, timedelta
+import logging
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from .backtest_engine import BacktestEngine, BacktestResults, align_timestamp
+
+logger = logging.getLogger(__name__)
+
+# Scalar BacktestResults fields reported in comparison tables
+RESULT_METRICS = (
+    'total_trades', 'winning_trades', 'losing_trades', 'win_rate', 'total_pnl',
+    'total_return', 'max_drawdown', 'sharpe_ratio', 'sortino_ratio', 'calmar_ratio'
+)
+
+
+@dataclass
+class SharedDataSpec:
+    """Picklable description of bars stored in a shared memory block."""
+    shm_name: str
+    rows: int
+    columns: List[Tuple[str, str, int]]  # (column, kind, byte offset)
+    symbols: List[str]
+    tz: Optional[str]
+
+
+class SharedBarData:
+    """
+    Owner of a shared memory copy of long-format historical bars.
+
+    The 'symbol' column is stored as integer codes and 'date' as int64
+    nanoseconds; every other column must be numeric and is stored as float64.
+    Use as a context manager so the block is released when the sweep ends.
+    """
+
+    def __init__(self, data: pd.DataFrame):
+        """
+        Copy bars into shared memory.
+
+        Args:
+            data: Long-format bars with 'symbol' and 'date' columns
+        """
+        symbol_codes, symbols = pd.factorize(data['symbol'])
+        dates = pd.DatetimeIndex(data['date']).as_unit('ns')
+
+        arrays = [('symbol', 'symbol', symbol_codes.astype(np.int64)),
+                  ('date', 'date', dates.asi8)]
+        for column in data.columns:
+            if column not in ('symbol', 'date'):
+                arrays.append((column, 'float', data[column].to_numpy(dtype=np.float64)))
+
+        rows = len(data)
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, rows * 8 * len(arrays)))
+        columns = []
+        for position, (column, kind, values) in enumerate(arrays):
+            offset = position * rows * 8
+            np.ndarray(rows, dtype=values.dtype, buffer=self.shm.buf, offset=offset)[:] = values
+            columns.append((column, kind, offset))
+
+        self.spec = SharedDataSpec(
+            shm_name=self.shm.name,
+            rows=rows,
+            columns=columns,
+            symbols=list(symbols),
+            tz=str(dates.tz) if dates.tz is not None else None
+        )
+
+    def close(self) -> None:
+        """Release and unlink the shared memory block."""
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self) -> 'SharedBarData':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def attach_shared_data(spec: SharedDataSpec) -> Tuple[shared_memory.SharedMemory, pd.DataFrame]:
+    """
+    Rebuild the bars DataFrame from a shared memory block.
+
+    Numeric columns are views into the block, so the returned handle must
+    stay open for as long as the DataFrame is used.
+
+    Args:
+        spec: Description of the shared block
+
+    Returns:
+        Tuple of (shared memory handle, bars DataFrame)
+    """
+    # Pool workers share the parent's resource tracker, which unlinks the
+    # block only if the owning SharedBarData was never closed
+    shm = shared_memory.SharedMemory(name=spec.shm_name)
+
+    columns = {}
+    for column, kind, offset in spec.columns:
+        dtype = np.float64 if kind == 'float' else np.int64
+        values = np.ndarray(spec.rows, dtype=dtype, buffer=shm.buf, offset=offset)
+        if kind == 'symbol':
+            columns[column] = pd.Categorical.from_codes(values, categories=spec.symbols).astype(object)
+        elif kind == 'date':
+            dates = pd.DatetimeIndex(values.view('datetime64[ns]'))
+            columns[column] = dates.tz_localize('UTC').tz_convert(spec.tz) if spec.tz else dates
+        else:
+            columns[column] = values
+
+    return shm, pd.DataFrame(columns, copy=False)
+
+
+# Per-process state set up by the pool initializer
+_worker_state: Dict[str, Any] = {}
+
+
+def _init_worker(spec: SharedDataSpec) -> None:
+    """Attach the worker process to the shared bars once."""
+    _worker_state['shm'], _worker_state['data'] = attach_shared_data(spec)
+
+
+def _run_job(job: 'SweepJob', engine_config: Optional[Dict[str, Any]],
+             strategy_factory: Callable[..., Callable], agent_name: str,
+             keep_results: bool) -> Dict[str, Any]:
+    """Run one backtest on the worker's shared bars."""
+    data = _worker_state['data']
+    dates = data['date']
+    window = data[(dates >= align_timestamp(job.data_start, dates.iloc[0])) &
+                  (dates < align_timestamp(job.end_date, dates.iloc[0]))]
+
+    # Workers never fetch, so they skip the local bar cache
+    engine = BacktestEngine(dict(engine_config or {}, data_cache_path=None))
+    results = engine.run_backtest_on_data(
+        window, strategy_factory(**job.params), agent_name, trading_start=job.start_date
+    )
+    return job.summarize(results, keep_results)
+
+
+@dataclass
+class SweepJob:
+    """One backtest configuration of a sweep."""
+    params: Dict[str, Any]
+    start_date: datetime
+    end_date: datetime
+    data_start: datetime  # first bar handed to the strategy (before start_date for warm-up)
+    window: Optional[int] = None
+    phase: str = 'full'
+    labels: Dict[str, Any] = field(default_factory=dict)
+
+    def summarize(self, results: BacktestResults, keep_results: bool) -> Dict[str, Any]:
+        """Flatten a result into one comparison table row."""
+        row = {'window': self.window, 'phase': self.phase,
+               'start_date': self.start_date, 'end_date': self.end_date}
+        row.update(self.labels)
+        row.update({f'param_{name}': value for name, value in self.params.items()})
+        row.update({metric: getattr(results, metric) for metric in RESULT_METRICS})
+        if keep_results:
+            row['results'] = results
+        return row
+
+
+class ParameterSweep:
+    """
+    Runner for parameter grids and walk-forward analysis.
+
+    Strategies are built in the worker processes by calling
+    `strategy_factory(**params)`, so the factory must be a picklable
+    module-level callable returning a strategy function for BacktestEngine.
+    """
+
+    def __init__(self, engine_config: Optional[Dict[str, Any]] = None, max_workers: Optional[int] = None):
+        """
+        Initialize the sweep runner.
+
+        Args:
+            engine_config: BacktestEngine configuration used for every run
+            max_workers: Size of the process pool (defaults to the CPU count)
+        """
+        self.engine_config = engine_config
+        self.max_workers = max_workers
+
+    def run_grid(self,
+                 symbols: List[str],
+                 start_date: datetime,
+                 end_date: datetime,
+                 strategy_factory: Callable[..., Callable],
+                 param_grid: Dict[str, List[Any]],
+                 agent_name: str = "SweepAgent",
+                 historical_data: Optional[pd.DataFrame] = None,
+                 keep_results: bool = False) -> pd.DataFrame:
+        """
+        Backtest every combination of a parameter grid.
+
+        Args:
+            symbols: List of symbols to backtest
+            start_date: Start date for the backtests
+            end_date: End date for the backtests
+            strategy_factory: Builds a strategy function from one parameter combination
+            param_grid: Parameter name -> candidate values
+            agent_name: Name of the agent being backtested
+            historical_data: Bars to use instead of fetching them
+            keep_results: Include the full BacktestResults in a 'results' column
+
+        Returns:
+            Comparison table with one row per parameter combination
+        """
+        data = self._load_data(symbols, start_date, end_date, historical_data)
+        if data.empty:
+            logger.error("No historical data available for parameter sweep")
+            return pd.DataFrame()
+
+        jobs = [SweepJob(params, start_date, end_date, start_date) for params in expand_grid(param_grid)]
+        rows = self._run_jobs(data, jobs, strategy_factory, agent_name, keep_results)
+        return pd.DataFrame(rows)
+
+    def run_walk_forward(self,
+                         symbols: List[str],
+                         start_date: datetime,
+                         end_date: datetime,
+                         strategy_factory: Callable[..., Callable],
+                         param_grid: Dict[str, List[Any]],
+                         train_days: int,
+                         test_days: int,
+                         step_days: Optional[int] = None,
+                         metric: str = 'sharpe_ratio',
+                         agent_name: str = "SweepAgent",
+                         historical_data: Optional[pd.DataFrame] = None,
+                         keep_results: bool = False) -> pd.DataFrame:
+        """
+        Walk-forward analysis over rolling train/test windows.
+
+        In each window every grid combination is backtested on the training
+        period; the combination with the best `metric` is then backtested on
+        the following test period, using the training bars as warm-up history.
+
+        Args:
+            symbols: List of symbols to backtest
+            start_date: Start of the first training window
+            end_date: End of the last test window
+            strategy_factory: Builds a strategy function from one parameter combination
+            param_grid: Parameter name -> candidate values
+            train_days: Length of each training window in calendar days
+            test_days: Length of each test window in calendar days
+            step_days: Offset between consecutive windows (defaults to test_days)
+            metric: BacktestResults field maximized on the training window
+            agent_name: Name of the agent being backtested
+            historical_data: Bars to use instead of fetching them
+            keep_results: Include the full BacktestResults in a 'results' column
+
+        Returns:
+            Comparison table with the train rows of every window and the
+            selected test row per window ('phase' column)
+        """
+        if metric not in RESULT_METRICS:
+            raise ValueError(f"Unknown metric '{metric}', expected one of {list(RESULT_METRICS)}")
+
+        windows = rolling_windows(start_date, end_date, train_days, test_days, step_days or test_days)
+        if not windows:
+            logger.error("Date range is too short for a single walk-forward window")
+            return pd.DataFrame()
+
+        data = self._load_data(symbols, start_date, end_date, historical_data)
+        if data.empty:
+            logger.error("No historical data available for walk-forward analysis")
+            return pd.DataFrame()
+
+        grid = expand_grid(param_grid)
+        with SharedBarData(data) as shared:
+            with self._create_pool(shared.spec) as pool:
+                train_jobs = [
+                    SweepJob(params, train_start, train_end, train_start, window=i, phase='train')
+                    for i, (train_start, train_end, _) in enumerate(windows) for params in grid
+                ]
+                train_rows = self._map(pool, train_jobs, strategy_factory, agent_name, keep_results)
+
+                test_jobs = []
+                for i, (train_start, train_end, test_end) in enumerate(windows):
+                    candidates = [(row, job) for row, job in zip(train_rows, train_jobs) if job.window == i]
+                    best_row, best_job = max(candidates, key=lambda candidate: _metric_value(candidate[0][metric]))
+                    test_jobs.append(SweepJob(
+                        best_job.params, train_end, test_end, train_start,
+                        window=i, phase='test', labels={'train_' + metric: best_row[metric]}
+                    ))
+                test_rows = self._map(pool, test_jobs, strategy_factory, agent_name, keep_results)
+
+        return pd.DataFrame(train_rows + test_rows)
+
+    def _load_data(self, symbols: List[str], start_date: datetime, end_date: datetime,
+                   historical_data: Optional[pd.DataFrame]) -> pd.DataFrame:
+        """Fetch the bars once for all runs."""
+        if historical_data is not None:
+            return historical_data
+        return BacktestEngine(self.engine_config)._fetch_historical_data(symbols, start_date, end_date)
+
+    def _run_jobs(self, data: pd.DataFrame, jobs: List[SweepJob], strategy_factory: Callable[..., Callable],
+                  agent_name: str, keep_results: bool) -> List[Dict[str, Any]]:
+        """Run jobs on a pool attached to a shared copy of the bars."""
+        with SharedBarData(data) as shared:
+            with self._create_pool(shared.spec) as pool:
+                return self._map(pool, jobs, strategy_factory, agent_name, keep_results)
+
+    def _create_pool(self, spec: SharedDataSpec) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker, initargs=(spec,))
+
+    def _map(self, pool: ProcessPoolExecutor, jobs: List[SweepJob], strategy_factory: Callable[..., Callable],
+             agent_name: str, keep_results: bool) -> List[Dict[str, Any]]:
+        """Run jobs in parallel, keeping their order."""
+        futures = [
+            pool.submit(_run_job, job, self.engine_config, strategy_factory, agent_name, keep_results)
+            for job in jobs
+        ]
+        logger.info(f"Running {len(futures)} backtests")
+        return [future.result() for future in futures]
+
+
+def expand_grid(param_grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """All combinations of a parameter grid, in grid order."""
+    names = list(param_grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(param_grid[name] for name in names))]
+
+
+def rolling_windows(start_date: datetime, end_date: datetime, train_days: int, test_days: int,
+                    step_days: int) -> List[Tuple[datetime, datetime, datetime]]:
+    """
+    Rolling (train_start, train_end/test_start, test_end) windows that fit in the range.
+
+    Args:
+        start_date: Start of the first training window
+        end_date: Latest allowed test end
+        train_days: Training window length in days
+        test_days: Test window length in days
+        step_days: Offset between consecutive windows in days
+
+    Returns:
+        List of window boundaries
+    """
+    windows = []
+    train_start = start_date
+    while train_start + timedelta(days=train_days + test_days) <= end_date:
+        train_end = train_start + timedelta(days=train_days)
+        windows.append((train_start, train_end, train_end + timedelta(days=test_days)))
+        train_start += timedelta(days=step_days)
+    return windows
+
+
+def _metric_value(value: float) -> float:
+    """Metric value for ranking; NaN ranks last."""
+    return -np.inf if value is None or np.isnan(value) else value
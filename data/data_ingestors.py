@@ -19,6 +19,8 @@ import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import json
 
+from services.indicator_engine import compute_indicators
+
 logger = logging.getLogger(__name__)
 
 
@@ -208,49 +210,32 @@ class YahooFinanceIngestor(BaseDataIngestor):
         if data.empty:
             return data
         
-        # Calculate returns
-        data['returns'] = data['Close'].pct_change()
-        data['log_returns'] = np.log(data['Close'] / data['Close'].shift(1))
-        
-        # Calculate volatility (rolling standard deviation)
-        data['volatility_20d'] = data['returns'].rolling(window=20).std()
-        data['volatility_5d'] = data['returns'].rolling(window=5).std()
+        indicators = compute_indicators(data)
         
-        # Calculate moving averages
-        data['sma_20'] = data['Close'].rolling(window=20).mean()
-        data['sma_50'] = data['Close'].rolling(window=50).mean()
-        data['ema_12'] = data['Close'].ewm(span=12).mean()
-        data['ema_26'] = data['Close'].ewm(span=26).mean()
+        # Returns and volatility (rolling standard deviation)
+        data['returns'] = indicators['returns']
+        data['log_returns'] = indicators['log_returns']
+        data['volatility_20d'] = indicators['volatility_20']
+        data['volatility_5d'] = indicators['volatility_5']
         
-        # Calculate RSI
-        data['rsi'] = self._calculate_rsi(data['Close'])
+        # Moving averages
+        data['sma_20'] = indicators['sma_20']
+        data['sma_50'] = indicators['sma_50']
+        data['ema_12'] = indicators['ema_12']
+        data['ema_26'] = indicators['ema_26']
         
-        # Calculate Bollinger Bands
-        data['bb_upper'], data['bb_middle'], data['bb_lower'] = self._calculate_bollinger_bands(data['Close'])
+        # RSI and Bollinger Bands
+        data['rsi'] = indicators['rsi']
+        data['bb_upper'] = indicators['bb_upper']
+        data['bb_middle'] = indicators['bb_middle']
+        data['bb_lower'] = indicators['bb_lower']
         
-        # Calculate volume indicators
-        data['volume_sma_20'] = data['Volume'].rolling(window=20).mean()
-        data['volume_ratio'] = data['Volume'] / data['volume_sma_20']
+        # Volume indicators
+        data['volume_sma_20'] = indicators['volume_sma']
+        data['volume_ratio'] = indicators['volume_ratio']
         
         return data
     
-    def _calculate_rsi(self, prices: pd.Series, window: int = 14) -> pd.Series:
-        """Calculate Relative Strength Index."""
-        delta = prices.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=window).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=window).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        return rsi
-    
-    def _calculate_bollinger_bands(self, prices: pd.Series, window: int = 20, num_std: float = 2) -> tuple:
-        """Calculate Bollinger Bands."""
-        sma = prices.rolling(window=window).mean()
-        std = prices.rolling(window=window).std()
-        upper = sma + (std * num_std)
-        lower = sma - (std * num_std)
-        return upper, sma, lower
-    
     def get_company_info(self, symbol: str) -> Dict[str, Any]:
         """Get company information for a symbol."""
         try:
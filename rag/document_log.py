@@ -0,0 +1,146 @@
+"""
+Append-Only Persistence for the RAG Document Store
+
+Documents are persisted as JSON lines in two files:
+
+- documents.jsonl: compacted snapshot; a header line with the generation,
+  then one document per line
+- documents.log.<gen>.jsonl: put/remove operations appended since the
+  snapshot of that generation
+
+Compaction writes the snapshot of the next generation, swaps it in atomically
+and then deletes the previous log; a log left behind by a crash belongs to an
+older generation and is never replayed.
+"""
+
+import json
+import os
+from typing import Dict, Any, Iterable
+from pathlib import Path
+import logging
+
+from .jsonl import read_jsonl
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentLog:
+    """
+    JSON-lines snapshot plus append log for document records.
+    """
+
+    SNAPSHOT = 'documents.jsonl'
+    FORMAT_VERSION = 1
+
+    def __init__(self, path: Path, compaction_ratio: float = 0.5, min_compaction_ops: int = 1000):
+        """
+        Initialize the document log.
+
+        Args:
+            path: Directory holding the files
+            compaction_ratio: Log size (relative to the snapshot) that triggers compaction
+            min_compaction_ops: Log operations always tolerated before compacting
+        """
+        self.path = Path(path)
+        self.compaction_ratio = compaction_ratio
+        self.min_compaction_ops = min_compaction_ops
+        self.generation = 0
+        self.snapshot_records = 0
+        self.log_ops = 0
+
+    def exists(self) -> bool:
+        """Whether a snapshot or log has been written to this directory."""
+        return (self.path / self.SNAPSHOT).exists() or self._log_file(0).exists()
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Replay the snapshot and the log.
+
+        Returns:
+            Mapping of doc_id to document record
+        """
+        records: Dict[str, Dict[str, Any]] = {}
+        snapshot = read_jsonl(self.path / self.SNAPSHOT)
+        if snapshot:
+            header = snapshot.pop(0)
+            if header.get('format_version') != self.FORMAT_VERSION:
+                raise ValueError(f"Unsupported document log format {header.get('format_version')}")
+            self.generation = header['generation']
+        for record in snapshot:
+            records[record['doc_id']] = record
+        self.snapshot_records = len(snapshot)
+
+        operations = read_jsonl(self._log_file(self.generation), repair=True)
+        for operation in operations:
+            if operation['op'] == 'remove':
+                records.pop(operation['doc_id'], None)
+            else:
+                records[operation['doc_id']] = operation['doc']
+        self.log_ops = len(operations)
+
+        return records
+
+    def append(self, puts: Iterable[Dict[str, Any]], removes: Iterable[str]) -> None:
+        """
+        Append put and remove operations to the log.
+
+        Args:
+            puts: Full records of added or updated documents
+            removes: Identifiers of removed documents
+        """
+        lines = [json.dumps({'op': 'remove', 'doc_id': doc_id}) for doc_id in removes]
+        lines.extend(json.dumps({'op': 'put', 'doc_id': record['doc_id'], 'doc': record}) for record in puts)
+        if not lines:
+            return
+
+        with open(self._log_file(self.generation), 'a') as f:
+            f.write('\n'.join(lines) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.log_ops += len(lines)
+
+    def needs_compaction(self, pending: int = 0) -> bool:
+        """
+        Whether the log has grown enough to rewrite the snapshot.
+
+        Args:
+            pending: Operations about to be appended
+        """
+        return self.log_ops + pending > max(self.min_compaction_ops, self.compaction_ratio * self.snapshot_records)
+
+    def compact(self, records: Iterable[Dict[str, Any]]) -> None:
+        """
+        Write a new snapshot of all live records and truncate the log.
+
+        Args:
+            records: Every live document record
+        """
+        generation = self.generation + 1
+        tmp_file = self.path / (self.SNAPSHOT + '.tmp')
+        count = 0
+        with open(tmp_file, 'w') as f:
+            f.write(json.dumps({'format_version': self.FORMAT_VERSION, 'generation': generation}) + '\n')
+            for record in records:
+                f.write(json.dumps(record) + '\n')
+                count += 1
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.path / self.SNAPSHOT)
+
+        try:
+            self._log_file(self.generation).unlink()
+        except FileNotFoundError:
+            pass
+
+        self.generation = generation
+        self.snapshot_records = count
+        self.log_ops = 0
+        logger.info(f"Compacted document log to {count} documents")
+
+    def disk_size(self) -> int:
+        """Total size in bytes of the snapshot and log."""
+        files = (self.path / self.SNAPSHOT, self._log_file(self.generation))
+        return sum(f.stat().st_size for f in files if f.exists())
+
+    def _log_file(self, generation: int) -> Path:
+        return self.path / f'documents.log.{generation}.jsonl'
@@ -7,15 +7,22 @@ for the RAG system, including document ingestion, processing, and retrieval.
 
 import json
 import hashlib
-from typing import Dict, List, Optional, Any, Iterator
+import heapq
+from typing import Dict, List, Optional, Any, Iterator, Set
 from pathlib import Path
 from datetime import datetime, timedelta
 import logging
 from dataclasses import dataclass, asdict
 import re
 
+from .document_log import DocumentLog
+from .text_index import InvertedIndex, TimeIndex
+
 logger = logging.getLogger(__name__)
 
+SORT_ORDERS = ('timestamp', 'relevance')
+TAG_MODES = ('any', 'all')
+
 
 @dataclass
 class Document:
@@ -53,16 +60,17 @@ class DocumentStore:
     - Document storage and retrieval
     - Content processing and cleaning
     - Metadata management
-    - Search and filtering
-    - Persistence to disk
+    - Full-text search (positional inverted index, BM25 ranking) and filtering
+    - Append-only persistence to disk with periodic compaction
     """
     
-    def __init__(self, store_path: str):
+    def __init__(self, store_path: str, log_params: Optional[Dict[str, Any]] = None):
         """
         Initialize the document store.
         
         Args:
             store_path: Path to store the document files
+            log_params: Document log parameters (compaction_ratio, min_compaction_ops)
         """
         self.store_path = Path(store_path)
         self.store_path.mkdir(parents=True, exist_ok=True)
@@ -70,8 +78,16 @@ class DocumentStore:
         # Storage structures
         self.documents = {}  # doc_id -> Document
         self.index = {}      # doc_id -> index info
-        self.categories = {} # category -> list of doc_ids
-        self.tags = {}       # tag -> list of doc_ids
+        self.categories: Dict[str, Set[str]] = {}  # category -> doc_ids
+        self.tags: Dict[str, Set[str]] = {}        # tag -> doc_ids
+        self.text_index = InvertedIndex()  # title/content tokens -> doc_ids
+        self.time_index = TimeIndex()      # doc_ids sorted by timestamp
+        
+        # On-disk log and the changes not yet written to it
+        self.log = DocumentLog(self.store_path, **(log_params or {}))
+        self._pending_puts: Dict[str, None] = {}  # insertion-ordered set
+        self._pending_removes: Set[str] = set()
+        self._needs_rewrite = False
         
         # Load existing store
         self._load_store()
@@ -125,6 +141,7 @@ class DocumentStore:
             # Store document
             self.documents[doc_id] = document
             self._update_indexes(document)
+            self._mark_changed(doc_id)
             
             logger.debug(f"Added document {doc_id}: {title[:50]}...")
             return doc_id
@@ -146,47 +163,63 @@ class DocumentStore:
         return self.documents.get(doc_id)
     
     def search_documents(self, query: str = "", category: str = "", 
-                        tags: List[str] = None, limit: int = 100) -> List[Document]:
+                        tags: List[str] = None, limit: int = 100,
+                        sort_by: str = "timestamp", tag_mode: str = "any") -> List[Document]:
         """
         Search documents by various criteria.
         
+        The query matches documents whose title or content contains its
+        words as a contiguous phrase (case-insensitive, whole words).
+        
         Args:
             query: Text query to search in title and content
             category: Filter by category
             tags: Filter by tags
             limit: Maximum number of results
+            sort_by: 'timestamp' for newest first, 'relevance' for BM25 ranking
+            tag_mode: 'any' to match documents with any of the tags, 'all' for every tag
             
         Returns:
             List of matching documents
+            
+        Raises:
+            ValueError: If sort_by or tag_mode is not one of the supported values
         """
+        if sort_by not in SORT_ORDERS:
+            raise ValueError(f"Unknown sort order '{sort_by}', expected one of {SORT_ORDERS}")
+        _check_tag_mode(tag_mode)
+        
         try:
-            results = []
-            
-            for doc in self.documents.values():
-                # Filter by category
-                if category and doc.category != category:
-                    continue
-                
-                # Filter by tags
-                if tags and not any(tag in doc.tags for tag in tags):
-                    continue
-                
-                # Filter by query
-                if query:
-                    query_lower = query.lower()
-                    if (query_lower not in doc.title.lower() and 
-                        query_lower not in doc.content.lower()):
-                        continue
-                
-                results.append(doc)
-                
-                if len(results) >= limit:
-                    break
-            
-            # Sort by timestamp (newest first)
-            results.sort(key=lambda x: x.timestamp, reverse=True)
+            candidates: Optional[set] = None
+            
+            # Filter by category
+            if category:
+                candidates = set(self.categories.get(category, ()))
+            
+            # Filter by tags
+            if tags:
+                tagged = self._doc_ids_with_tags(tags, tag_mode)
+                candidates = tagged if candidates is None else candidates & tagged
+            
+            # Filter by query
+            if query:
+                matched = self.text_index.match(query)
+                candidates = matched if candidates is None else candidates & matched
+            
+            if sort_by == "relevance" and query:
+                scores = self.text_index.score(query, candidates)
+                doc_ids = heapq.nlargest(limit, scores, key=scores.__getitem__)
+            elif candidates is None:
+                doc_ids = []
+                for doc_id in self.time_index.newest():
+                    doc_ids.append(doc_id)
+                    if len(doc_ids) >= limit:
+                        break
+            else:
+                # Sort by timestamp (newest first)
+                doc_ids = heapq.nlargest(limit, candidates, key=lambda doc_id: self.documents[doc_id].timestamp)
             
-            return results
+            return [self.documents[doc_id] for doc_id in doc_ids]
             
         except Exception as e:
             logger.error(f"Document search failed: {e}")
@@ -203,7 +236,7 @@ class DocumentStore:
             List of documents in the category
         """
         try:
-            doc_ids = self.categories.get(category, [])
+            doc_ids = self.categories.get(category, ())
             return [self.documents[doc_id] for doc_id in doc_ids if doc_id in self.documents]
             
         except Exception as e:
@@ -221,13 +254,36 @@ class DocumentStore:
             List of documents with the tag
         """
         try:
-            doc_ids = self.tags.get(tag, [])
+            doc_ids = self.tags.get(tag, ())
             return [self.documents[doc_id] for doc_id in doc_ids if doc_id in self.documents]
             
         except Exception as e:
             logger.error(f"Failed to get documents by tag {tag}: {e}")
             return []
     
+    def get_documents_by_tags(self, tags: List[str], mode: str = "any") -> List[Document]:
+        """
+        Get all documents matching several tags.
+        
+        Args:
+            tags: Tag names
+            mode: 'any' for documents with at least one tag, 'all' for every tag
+            
+        Returns:
+            List of matching documents
+            
+        Raises:
+            ValueError: If mode is not 'any' or 'all'
+        """
+        _check_tag_mode(mode)
+        
+        try:
+            return [self.documents[doc_id] for doc_id in self._doc_ids_with_tags(tags, mode)]
+            
+        except Exception as e:
+            logger.error(f"Failed to get documents by tags {tags}: {e}")
+            return []
+    
     def get_recent_documents(self, hours: int = 24, limit: int = 50) -> List[Document]:
         """
         Get recent documents.
@@ -242,15 +298,14 @@ class DocumentStore:
         try:
             cutoff_time = datetime.now() - timedelta(hours=hours)
             
+            # Walk the time index newest first
             recent_docs = []
-            for doc in self.documents.values():
-                if doc.timestamp >= cutoff_time:
-                    recent_docs.append(doc)
-            
-            # Sort by timestamp (newest first)
-            recent_docs.sort(key=lambda x: x.timestamp, reverse=True)
+            for doc_id in self.time_index.newest(since=cutoff_time):
+                if len(recent_docs) >= limit:
+                    break
+                recent_docs.append(self.documents[doc_id])
             
-            return recent_docs[:limit]
+            return recent_docs
             
         except Exception as e:
             logger.error(f"Failed to get recent documents: {e}")
@@ -278,6 +333,8 @@ class DocumentStore:
             
             # Remove document
             del self.documents[doc_id]
+            self._pending_puts.pop(doc_id, None)
+            self._pending_removes.add(doc_id)
             
             logger.debug(f"Removed document {doc_id}")
             return True
@@ -304,6 +361,9 @@ class DocumentStore:
             
             document = self.documents[doc_id]
             
+            # Drop index entries for the old field values
+            self._remove_from_indexes(document)
+            
             # Update fields
             for key, value in kwargs.items():
                 if hasattr(document, key):
@@ -311,6 +371,7 @@ class DocumentStore:
             
             # Update indexes
             self._update_indexes(document)
+            self._mark_changed(doc_id)
             
             logger.debug(f"Updated document {doc_id}")
             return True
@@ -375,6 +436,11 @@ class DocumentStore:
             self.index.clear()
             self.categories.clear()
             self.tags.clear()
+            self.text_index.clear()
+            self.time_index.clear()
+            self._pending_puts.clear()
+            self._pending_removes.clear()
+            self._needs_rewrite = True
             logger.info("Cleared document store")
             return True
             
@@ -386,24 +452,26 @@ class DocumentStore:
         """
         Save store to disk.
         
+        Documents added, updated or removed since the last save are appended
+        to the document log; the snapshot is rewritten once the log has grown
+        large enough to be worth compacting.
+        
         Returns:
             True if successful, False otherwise
         """
         try:
-            # Save documents
-            documents_file = self.store_path / 'documents.json'
-            documents_data = {doc_id: doc.to_dict() for doc_id, doc in self.documents.items()}
-            with open(documents_file, 'w') as f:
-                json.dump(documents_data, f, indent=2)
-            
-            # Save indexes
-            index_file = self.store_path / 'index.json'
-            with open(index_file, 'w') as f:
-                json.dump({
-                    'index': self.index,
-                    'categories': self.categories,
-                    'tags': self.tags
-                }, f, indent=2)
+            pending = len(self._pending_puts) + len(self._pending_removes)
+            if self._needs_rewrite or self.log.needs_compaction(pending):
+                self.log.compact(doc.to_dict() for doc in self.documents.values())
+            else:
+                self.log.append(
+                    [self.documents[doc_id].to_dict() for doc_id in self._pending_puts],
+                    self._pending_removes
+                )
+            
+            self._pending_puts.clear()
+            self._pending_removes.clear()
+            self._needs_rewrite = False
             
             logger.info(f"Saved document store to {self.store_path}")
             return True
@@ -415,22 +483,15 @@ class DocumentStore:
     def _load_store(self) -> None:
         """Load store from disk."""
         try:
-            # Load documents
-            documents_file = self.store_path / 'documents.json'
-            if documents_file.exists():
-                with open(documents_file, 'r') as f:
-                    documents_data = json.load(f)
-                    for doc_id, doc_data in documents_data.items():
-                        self.documents[doc_id] = Document.from_dict(doc_data)
-            
-            # Load indexes
-            index_file = self.store_path / 'index.json'
-            if index_file.exists():
-                with open(index_file, 'r') as f:
-                    index_data = json.load(f)
-                    self.index = index_data.get('index', {})
-                    self.categories = index_data.get('categories', {})
-                    self.tags = index_data.get('tags', {})
+            if self.log.exists():
+                for doc_id, doc_data in self.log.load().items():
+                    self.documents[doc_id] = Document.from_dict(doc_data)
+            else:
+                self._load_legacy_store()
+            
+            # Rebuild the in-memory indexes
+            for document in self.documents.values():
+                self._update_indexes(document)
             
             logger.info(f"Loaded document store with {len(self.documents)} documents")
             
@@ -441,6 +502,41 @@ class DocumentStore:
             self.index = {}
             self.categories = {}
             self.tags = {}
+            self.text_index.clear()
+            self.time_index.clear()
+    
+    def _load_legacy_store(self) -> None:
+        """Load the older documents.json/index.json format and migrate it to the document log."""
+        documents_file = self.store_path / 'documents.json'
+        index_file = self.store_path / 'index.json'
+        if not documents_file.exists():
+            return
+        
+        with open(documents_file, 'r') as f:
+            documents_data = json.load(f)
+        for doc_id, doc_data in documents_data.items():
+            self.documents[doc_id] = Document.from_dict(doc_data)
+        
+        self.log.compact(doc.to_dict() for doc in self.documents.values())
+        for legacy_file in (documents_file, index_file):
+            if legacy_file.exists():
+                legacy_file.unlink()
+        logger.info(f"Migrated {len(self.documents)} documents to the document log format")
+    
+    def _mark_changed(self, doc_id: str) -> None:
+        """Queue a document for the next save."""
+        self._pending_removes.discard(doc_id)
+        self._pending_puts[doc_id] = None
+    
+    def _doc_ids_with_tags(self, tags: List[str], mode: str = "any") -> Set[str]:
+        """Documents carrying any (mode='any') or all (mode='all') of the tags."""
+        postings = [self.tags.get(tag, set()) for tag in tags]
+        if not postings:
+            return set()
+        if mode == "all":
+            smallest = min(postings, key=len)
+            return set(smallest).intersection(*postings)
+        return set().union(*postings)
     
     def _generate_doc_id(self, title: str, content: str, source: str) -> str:
         """Generate a unique document ID."""
@@ -480,17 +576,15 @@ class DocumentStore:
             doc_id = document.doc_id
             
             # Update category index
-            if document.category not in self.categories:
-                self.categories[document.category] = []
-            if doc_id not in self.categories[document.category]:
-                self.categories[document.category].append(doc_id)
+            self.categories.setdefault(document.category, set()).add(doc_id)
             
             # Update tag indexes
             for tag in document.tags:
-                if tag not in self.tags:
-                    self.tags[tag] = []
-                if doc_id not in self.tags[tag]:
-                    self.tags[tag].append(doc_id)
+                self.tags.setdefault(tag, set()).add(doc_id)
+            
+            # Update text and time indexes
+            self.text_index.add(doc_id, (document.title, document.content))
+            self.time_index.add(doc_id, document.timestamp)
             
             # Update main index
             self.index[doc_id] = {
@@ -510,20 +604,24 @@ class DocumentStore:
             doc_id = document.doc_id
             
             # Remove from category index
-            if document.category in self.categories:
-                if doc_id in self.categories[document.category]:
-                    self.categories[document.category].remove(doc_id)
-                if not self.categories[document.category]:
+            category_ids = self.categories.get(document.category)
+            if category_ids is not None:
+                category_ids.discard(doc_id)
+                if not category_ids:
                     del self.categories[document.category]
             
             # Remove from tag indexes
             for tag in document.tags:
-                if tag in self.tags:
-                    if doc_id in self.tags[tag]:
-                        self.tags[tag].remove(doc_id)
-                    if not self.tags[tag]:
+                tag_ids = self.tags.get(tag)
+                if tag_ids is not None:
+                    tag_ids.discard(doc_id)
+                    if not tag_ids:
                         del self.tags[tag]
             
+            # Remove from text and time indexes
+            self.text_index.remove(doc_id)
+            self.time_index.remove(doc_id)
+            
             # Remove from main index
             if doc_id in self.index:
                 del self.index[doc_id]
@@ -534,22 +632,14 @@ class DocumentStore:
     def _get_store_size(self) -> float:
         """Get store size in MB."""
         try:
-            total_size = 0
-            
-            # Calculate size of documents
-            if self.documents:
-                total_size += len(json.dumps({doc_id: doc.to_dict() for doc_id, doc in self.documents.items()}).encode())
-            
-            # Calculate size of indexes
-            if self.index or self.categories or self.tags:
-                total_size += len(json.dumps({
-                    'index': self.index,
-                    'categories': self.categories,
-                    'tags': self.tags
-                }).encode())
-            
-            return total_size / (1024 * 1024)  # Convert to MB
+            return self.log.disk_size() / (1024 * 1024)  # Convert to MB
             
         except Exception as e:
             logger.error(f"Failed to calculate store size: {e}")
             return 0.0
+
+
+def _check_tag_mode(mode: str) -> None:
+    """Reject tag modes other than 'any' and 'all'."""
+    if mode not in TAG_MODES:
+        raise ValueError(f"Unknown tag mode '{mode}', expected one of {TAG_MODES}")
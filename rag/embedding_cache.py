@@ -0,0 +1,224 @@
+"""
+Embedding Cache for RAG System
+
+This module provides a size-bounded embedding cache. Vectors are stored as
+float32 rows of one shared matrix and addressed by the digest of their text;
+entries are evicted in least-recently-used order once the cache is full and
+can optionally expire after a time-to-live. Persistence reuses the segment
+store of the vector database, so saves only append the entries that changed.
+"""
+
+import time
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, List, Tuple, Optional, Any, Iterable
+from pathlib import Path
+from datetime import datetime
+import logging
+
+from .vector_store import SegmentStore
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """
+    LRU/TTL cache of embedding vectors keyed by text digest.
+    """
+
+    def __init__(self, dimension: int, max_entries: int = 100000, ttl_seconds: Optional[float] = None,
+                 path: Optional[Path] = None, initial_capacity: int = 1024):
+        """
+        Initialize the cache.
+
+        Args:
+            dimension: Dimension of the cached vectors
+            max_entries: Maximum number of cached vectors before LRU eviction
+            ttl_seconds: Optional lifetime of an entry in seconds
+            path: Directory for incremental persistence (None keeps the cache in memory)
+            initial_capacity: Number of rows to preallocate
+        """
+        self.dimension = dimension
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.initial_capacity = max(1, min(initial_capacity, self.max_entries))
+        self.store = SegmentStore(path, dimension) if path is not None else None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._reset()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and not self._is_expired(entry)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """
+        Look up a vector and mark it as recently used.
+
+        Args:
+            key: Text digest
+
+        Returns:
+            Copy of the cached vector, or None on a miss
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if self._is_expired(entry):
+            self._discard(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return self._vectors[entry[0]].copy()
+
+    def put(self, key: str, vector: Any, text_length: int = 0, text_preview: str = '') -> None:
+        """
+        Insert or refresh a vector, evicting the least recently used entry when full.
+
+        Args:
+            key: Text digest
+            vector: Embedding vector
+            text_length: Length of the source text
+            text_preview: Leading characters of the source text
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            slot = entry[0]
+            self._entries.move_to_end(key)
+        else:
+            if len(self._entries) >= self.max_entries:
+                evicted_key, evicted = self._entries.popitem(last=False)
+                self._release(evicted_key, evicted[0])
+                self.evictions += 1
+            slot = self._allocate_slot()
+
+        self._vectors[slot] = vector
+        self._entries[key] = (slot, time.time(), text_length, text_preview)
+        self._pending_removes.discard(key)
+        self._pending_adds[key] = None
+
+    def clear(self) -> None:
+        """Remove all entries; the next save rewrites the persisted cache."""
+        self._reset()
+        self._needs_rewrite = True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters and size of the cache."""
+        lookups = self.hits + self.misses
+        slots = [entry[0] for entry in self._entries.values()]
+        if slots:
+            avg_norm = float(np.mean(np.linalg.norm(self._vectors[slots], axis=1)))
+        else:
+            avg_norm = 0.0
+
+        return {
+            'total_cached_embeddings': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds,
+            'cache_size_mb': len(self._entries) * self.dimension * 4 / (1024 * 1024),
+            'average_embedding_norm': avg_norm,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations
+        }
+
+    def load(self) -> None:
+        """Load persisted entries; the store keeps them in least-recently-written order."""
+        if self.store is None or not self.store.exists():
+            return
+
+        records = list(self.store.load().items())
+        overflow = max(0, len(records) - self.max_entries)
+        for key, (vector, _, info) in records[overflow:]:
+            cached_at = info.get('cached_at')
+            slot = self._allocate_slot()
+            self._vectors[slot] = vector
+            self._entries[key] = (
+                slot,
+                datetime.fromisoformat(cached_at).timestamp() if cached_at else time.time(),
+                info.get('text_length', 0),
+                info.get('text_preview', '')
+            )
+
+        expired = [key for key, entry in self._entries.items() if self._is_expired(entry)]
+        for key in expired:
+            self._discard(key)
+        if overflow or expired:
+            self._needs_rewrite = True
+
+    def save(self) -> None:
+        """Persist entries added, refreshed or dropped since the last save."""
+        if self.store is None:
+            return
+
+        pending = len(self._pending_adds) + len(self._pending_removes)
+        if self._needs_rewrite or self.store.needs_compaction(pending):
+            self.store.compact(self._records(self._entries))
+        else:
+            self.store.append(self._records(self._pending_adds), self._pending_removes)
+
+        self._pending_adds.clear()
+        self._pending_removes.clear()
+        self._needs_rewrite = False
+
+    def _records(self, keys: Iterable[str]) -> List[Tuple[str, np.ndarray, Dict[str, Any], Dict[str, Any]]]:
+        """Segment store records for the given keys, in LRU order."""
+        records = []
+        for key in keys:
+            slot, cached_at, text_length, text_preview = self._entries[key]
+            records.append((key, self._vectors[slot], {}, {
+                'cached_at': datetime.fromtimestamp(cached_at).isoformat(),
+                'text_length': text_length,
+                'text_preview': text_preview
+            }))
+        return records
+
+    def _reset(self) -> None:
+        """Drop all entries and release the preallocated storage."""
+        self._vectors = np.zeros((self.initial_capacity, self.dimension), dtype=np.float32)
+        self._entries: 'OrderedDict[str, Tuple[int, float, int, str]]' = OrderedDict()  # LRU first
+        self._free_slots: List[int] = []
+        self._next_slot = 0
+        self._pending_adds: Dict[str, None] = {}  # insertion-ordered set
+        self._pending_removes = set()
+        self._needs_rewrite = False
+
+    def _is_expired(self, entry: Tuple[int, float, int, str]) -> bool:
+        return self.ttl_seconds is not None and time.time() - entry[1] > self.ttl_seconds
+
+    def _discard(self, key: str) -> None:
+        """Remove an entry."""
+        self._release(key, self._entries.pop(key)[0])
+
+    def _release(self, key: str, slot: int) -> None:
+        """Free the row of an entry that is no longer in `_entries`."""
+        self._free_slots.append(slot)
+        self._pending_adds.pop(key, None)
+        self._pending_removes.add(key)
+
+    def _allocate_slot(self) -> int:
+        """Reuse a freed row or append one, growing the matrix geometrically."""
+        if self._free_slots:
+            return self._free_slots.pop()
+
+        slot = self._next_slot
+        capacity = self._vectors.shape[0]
+        if slot >= capacity:
+            new_capacity = min(max(slot + 1, capacity * 2), self.max_entries)
+            vectors = np.zeros((new_capacity, self.dimension), dtype=np.float32)
+            vectors[:capacity] = self._vectors
+            self._vectors = vectors
+        self._next_slot += 1
+        return slot
@@ -0,0 +1,150 @@
+"""
+Embedding Encoders for RAG System
+
+This module provides the text encoders used by the embedding service. Every
+encoder turns a list of preprocessed texts into a single float32 matrix of
+L2-normalized rows (n x dimension). Two encoders are available:
+
+- HashEncoder: deterministic offline encoder derived from an MD5 digest
+- SentenceTransformerEncoder: a locally available sentence-transformers model
+"""
+
+import hashlib
+import numpy as np
+from abc import ABC, abstractmethod
+from typing import List, Any, Optional
+import logging
+
+try:
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class BaseEncoder(ABC):
+    """
+    Abstract base class for text encoders.
+    """
+
+    name = 'base'
+
+    def __init__(self, dimension: int):
+        """
+        Initialize the encoder.
+
+        Args:
+            dimension: Dimension of the produced embeddings
+        """
+        self.dimension = dimension
+
+    @abstractmethod
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode a batch of preprocessed texts.
+
+        Args:
+            texts: Preprocessed texts
+
+        Returns:
+            Float32 matrix of L2-normalized embeddings (len(texts) x dimension)
+        """
+        pass
+
+    @staticmethod
+    def normalize(matrix: np.ndarray) -> np.ndarray:
+        """L2-normalize rows in place, leaving zero rows untouched."""
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+
+class HashEncoder(BaseEncoder):
+    """
+    Offline encoder that spreads the bytes of each text's MD5 digest over the
+    leading dimensions. Deterministic and dependency-free, but carries no
+    semantic similarity.
+    """
+
+    name = 'hash'
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        embeddings = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        if not texts:
+            return embeddings
+
+        digests = b''.join(hashlib.md5(text.encode()).digest() for text in texts)
+        digest_bytes = np.frombuffer(digests, dtype=np.uint8).reshape(len(texts), -1)
+        width = min(digest_bytes.shape[1], self.dimension)
+        embeddings[:, :width] = digest_bytes[:, :width] / np.float32(255.0)
+
+        return self.normalize(embeddings)
+
+
+class SentenceTransformerEncoder(BaseEncoder):
+    """
+    Encoder backed by a sentence-transformers model loaded from the local
+    model cache; it never downloads weights.
+    """
+
+    name = 'sentence-transformers'
+
+    def __init__(self, model_name: str, device: Optional[str] = None):
+        """
+        Initialize the encoder.
+
+        Args:
+            model_name: Name or path of the sentence-transformers model
+            device: Torch device to run on (defaults to the library's choice)
+        """
+        if not SENTENCE_TRANSFORMERS_AVAILABLE:
+            raise ImportError("sentence-transformers is not installed")
+
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name, device=device, local_files_only=True)
+        super().__init__(self.model.get_sentence_embedding_dimension())
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+
+        embeddings = self.model.encode(
+            texts, batch_size=len(texts), convert_to_numpy=True,
+            normalize_embeddings=True, show_progress_bar=False
+        )
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
+
+
+ENCODER_TYPES = ('auto', HashEncoder.name, SentenceTransformerEncoder.name)
+
+
+def create_encoder(encoder_type: str, model_name: str, dimension: int, **params: Any) -> BaseEncoder:
+    """
+    Create a text encoder.
+
+    Args:
+        encoder_type: 'hash', 'sentence-transformers', or 'auto' to use the
+            local sentence-transformers model when present and fall back to hashing
+        model_name: Name of the sentence-transformers model
+        dimension: Embedding dimension for the hash encoder
+        **params: Encoder-specific parameters
+
+    Returns:
+        Encoder instance
+    """
+    if encoder_type not in ENCODER_TYPES:
+        raise ValueError(f"Unknown encoder type '{encoder_type}', expected one of {list(ENCODER_TYPES)}")
+
+    if encoder_type == HashEncoder.name:
+        return HashEncoder(dimension)
+    if encoder_type == SentenceTransformerEncoder.name:
+        return SentenceTransformerEncoder(model_name, **params)
+
+    if SENTENCE_TRANSFORMERS_AVAILABLE:
+        try:
+            return SentenceTransformerEncoder(model_name, **params)
+        except Exception as e:
+            logger.info(f"Local model {model_name} unavailable ({e}); using hash encoder")
+    return HashEncoder(dimension)
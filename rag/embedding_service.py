@@ -14,6 +14,9 @@ import json
 import pickle
 from datetime import datetime, timedelta
 
+from .embedding_cache import EmbeddingCache
+from .embedding_encoders import BaseEncoder, create_encoder
+
 logger = logging.getLogger(__name__)
 
 
@@ -23,37 +26,51 @@ class EmbeddingService:
     
     Features:
     - Text embedding generation
-    - Batch processing
-    - Embedding caching
-    - Multiple embedding models support
+    - Vectorized batch processing with micro-batching
+    - Bounded LRU/TTL embedding cache with incremental persistence
+    - Pluggable encoders (offline hash encoder, local sentence-transformers model)
     - Embedding similarity calculation
     """
     
     def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2", 
-                 cache_path: str = "data/embedding_cache"):
+                 cache_path: str = "data/embedding_cache", encoder: str = 'auto',
+                 batch_size: int = 256, encoder_params: Optional[Dict[str, Any]] = None,
+                 cache_max_entries: int = 100000, cache_ttl: Optional[timedelta] = None):
         """
         Initialize the embedding service.
         
         Args:
             model_name: Name of the embedding model to use
             cache_path: Path to store embedding cache
+            encoder: Encoder backend ('auto', 'hash' or 'sentence-transformers')
+            batch_size: Maximum number of texts handed to the encoder at once
+            encoder_params: Encoder-specific parameters
+            cache_max_entries: Maximum number of cached embeddings before LRU eviction
+            cache_ttl: Optional lifetime of a cached embedding
         """
         self.model_name = model_name
         self.cache_path = Path(cache_path)
         self.cache_path.mkdir(parents=True, exist_ok=True)
         
-        # Cache for embeddings
-        self.embedding_cache = {}
-        self.cache_metadata = {}
-        
         # Model configuration
-        self.embedding_dimension = 384  # Default for all-MiniLM-L6-v2
         self.max_text_length = 512  # Maximum text length for embedding
+        self.batch_size = max(1, batch_size)
+        self.encoder: BaseEncoder = create_encoder(
+            encoder, model_name, 384, **(encoder_params or {})  # 384 matches all-MiniLM-L6-v2
+        )
+        self.embedding_dimension = self.encoder.dimension
+        
+        # Cache for embeddings
+        self.embedding_cache = EmbeddingCache(
+            self.embedding_dimension, max_entries=cache_max_entries,
+            ttl_seconds=cache_ttl.total_seconds() if cache_ttl is not None else None,
+            path=self.cache_path
+        )
         
         # Load cache
         self._load_cache()
         
-        logger.info(f"Initialized EmbeddingService with model: {model_name}")
+        logger.info(f"Initialized EmbeddingService with model: {model_name} (encoder: {self.encoder.name})")
     
     def generate_embedding(self, text: str, use_cache: bool = True) -> List[float]:
         """
@@ -69,16 +86,16 @@ class EmbeddingService:
         try:
             # Check cache first
             if use_cache:
-                cache_key = self._get_cache_key(text)
-                if cache_key in self.embedding_cache:
+                cached = self.embedding_cache.get(self._get_cache_key(text))
+                if cached is not None:
                     logger.debug(f"Using cached embedding for text: {text[:50]}...")
-                    return self.embedding_cache[cache_key]
+                    return cached.tolist()
             
             # Process text
             processed_text = self._preprocess_text(text)
             
             # Generate embedding
-            embedding = self._generate_embedding_vector(processed_text)
+            embedding = self._generate_embeddings_batch_vectors([processed_text])[0].tolist()
             
             # Cache the result
             if use_cache:
@@ -90,52 +107,52 @@ class EmbeddingService:
             logger.error(f"Failed to generate embedding: {e}")
             return self._get_zero_embedding()
     
-    def generate_embeddings_batch(self, texts: List[str], use_cache: bool = True) -> List[List[float]]:
+    def generate_embeddings_batch(self, texts: List[str], use_cache: bool = True) -> np.ndarray:
         """
         Generate embeddings for multiple texts.
         
+        Cache misses are preprocessed together and encoded in micro-batches of
+        `batch_size` texts.
+        
         Args:
             texts: List of input texts
             use_cache: Whether to use cached embeddings
             
         Returns:
-            List of embedding vectors
+            Float32 matrix of embedding vectors (len(texts) x embedding_dimension)
         """
         try:
-            embeddings = []
+            embeddings = np.zeros((len(texts), self.embedding_dimension), dtype=np.float32)
             texts_to_process = []
             indices_to_process = []
             
             # Check cache for each text
             for i, text in enumerate(texts):
                 if use_cache:
-                    cache_key = self._get_cache_key(text)
-                    if cache_key in self.embedding_cache:
-                        embeddings.append(self.embedding_cache[cache_key])
+                    cached = self.embedding_cache.get(self._get_cache_key(text))
+                    if cached is not None:
+                        embeddings[i] = cached
                         continue
                 
                 texts_to_process.append(text)
                 indices_to_process.append(i)
-                embeddings.append(None)  # Placeholder
             
             # Process texts that weren't in cache
             if texts_to_process:
-                processed_embeddings = self._generate_embeddings_batch_vectors(texts_to_process)
+                processed_texts = self._preprocess_texts(texts_to_process)
+                processed_embeddings = self._generate_embeddings_batch_vectors(processed_texts)
+                embeddings[indices_to_process] = processed_embeddings
                 
-                # Fill in the embeddings
-                for i, embedding in enumerate(processed_embeddings):
-                    original_index = indices_to_process[i]
-                    embeddings[original_index] = embedding
-                    
-                    # Cache the result
-                    if use_cache:
-                        self._cache_embedding(texts_to_process[i], embedding)
+                # Cache the results
+                if use_cache:
+                    for text, embedding in zip(texts_to_process, processed_embeddings):
+                        self._cache_embedding(text, embedding)
             
             return embeddings
             
         except Exception as e:
             logger.error(f"Failed to generate batch embeddings: {e}")
-            return [self._get_zero_embedding() for _ in texts]
+            return np.zeros((len(texts), self.embedding_dimension), dtype=np.float32)
     
     def calculate_similarity(self, embedding1: List[float], embedding2: List[float]) -> float:
         """
@@ -202,30 +219,15 @@ class EmbeddingService:
         Get embedding cache statistics.
         
         Returns:
-            Dictionary with cache statistics
+            Dictionary with cache statistics, including hit/miss/eviction counters
         """
         try:
-            total_embeddings = len(self.embedding_cache)
-            
-            # Calculate cache size
-            cache_size = 0
-            for embedding in self.embedding_cache.values():
-                cache_size += len(embedding) * 4  # 4 bytes per float
-            
-            # Calculate average embedding norm
-            if self.embedding_cache:
-                norms = [np.linalg.norm(embedding) for embedding in self.embedding_cache.values()]
-                avg_norm = np.mean(norms)
-            else:
-                avg_norm = 0.0
-            
-            return {
-                'total_cached_embeddings': total_embeddings,
-                'cache_size_mb': cache_size / (1024 * 1024),
-                'average_embedding_norm': avg_norm,
+            stats = self.embedding_cache.get_stats()
+            stats.update({
                 'model_name': self.model_name,
                 'embedding_dimension': self.embedding_dimension
-            }
+            })
+            return stats
             
         except Exception as e:
             logger.error(f"Failed to get cache stats: {e}")
@@ -240,7 +242,6 @@ class EmbeddingService:
         """
         try:
             self.embedding_cache.clear()
-            self.cache_metadata.clear()
             logger.info("Cleared embedding cache")
             return True
             
@@ -252,20 +253,13 @@ class EmbeddingService:
         """
         Save embedding cache to disk.
         
+        Only entries added or evicted since the last save are written.
+        
         Returns:
             True if successful, False otherwise
         """
         try:
-            # Save embeddings
-            embeddings_file = self.cache_path / 'embeddings.pkl'
-            with open(embeddings_file, 'wb') as f:
-                pickle.dump(self.embedding_cache, f)
-            
-            # Save metadata
-            metadata_file = self.cache_path / 'metadata.json'
-            with open(metadata_file, 'w') as f:
-                json.dump(self.cache_metadata, f, indent=2)
-            
+            self.embedding_cache.save()
             logger.info(f"Saved embedding cache to {self.cache_path}")
             return True
             
@@ -276,25 +270,40 @@ class EmbeddingService:
     def _load_cache(self) -> None:
         """Load embedding cache from disk."""
         try:
-            # Load embeddings
-            embeddings_file = self.cache_path / 'embeddings.pkl'
-            if embeddings_file.exists():
-                with open(embeddings_file, 'rb') as f:
-                    self.embedding_cache = pickle.load(f)
-            
-            # Load metadata
-            metadata_file = self.cache_path / 'metadata.json'
-            if metadata_file.exists():
-                with open(metadata_file, 'r') as f:
-                    self.cache_metadata = json.load(f)
-            
+            self.embedding_cache.load()
+            self._load_legacy_cache()
             logger.info(f"Loaded embedding cache with {len(self.embedding_cache)} embeddings")
             
         except Exception as e:
             logger.error(f"Failed to load cache: {e}")
             # Initialize empty cache
-            self.embedding_cache = {}
-            self.cache_metadata = {}
+            self.embedding_cache.clear()
+    
+    def _load_legacy_cache(self) -> None:
+        """Import the older pickle/JSON cache files and remove them."""
+        embeddings_file = self.cache_path / 'embeddings.pkl'
+        metadata_file = self.cache_path / 'metadata.json'
+        if not embeddings_file.exists():
+            return
+        
+        with open(embeddings_file, 'rb') as f:
+            legacy_embeddings = pickle.load(f)
+        legacy_metadata = {}
+        if metadata_file.exists():
+            with open(metadata_file, 'r') as f:
+                legacy_metadata = json.load(f)
+        
+        for cache_key, embedding in legacy_embeddings.items():
+            if len(embedding) != self.embedding_dimension:
+                continue
+            info = legacy_metadata.get(cache_key, {})
+            self.embedding_cache.put(cache_key, embedding, info.get('text_length', 0), info.get('text_preview', ''))
+        
+        self.embedding_cache.save()
+        for legacy_file in (embeddings_file, metadata_file):
+            if legacy_file.exists():
+                legacy_file.unlink()
+        logger.info(f"Migrated {len(legacy_embeddings)} cached embeddings to the segment store format")
     
     def _preprocess_text(self, text: str) -> str:
         """
@@ -323,6 +332,19 @@ class EmbeddingService:
             logger.error(f"Text preprocessing failed: {e}")
             return text
     
+    def _preprocess_texts(self, texts: List[str]) -> List[str]:
+        """
+        Preprocess a batch of texts in one pass (same steps as _preprocess_text).
+        
+        Args:
+            texts: Input texts
+            
+        Returns:
+            Preprocessed texts
+        """
+        max_length = self.max_text_length
+        return [' '.join(text[:max_length].split()).lower() for text in texts]
+    
     def _generate_embedding_vector(self, text: str) -> List[float]:
         """
         Generate embedding vector for text.
@@ -333,36 +355,9 @@ class EmbeddingService:
         Returns:
             Embedding vector
         """
-        try:
-            # In a real implementation, this would use a proper embedding model
-            # For now, we'll create a simple hash-based embedding
-            
-            # Create a hash-based embedding
-            text_hash = hashlib.md5(text.encode()).hexdigest()
-            embedding = []
-            
-            # Convert hash to embedding vector
-            for i in range(0, len(text_hash), 2):
-                hex_pair = text_hash[i:i+2]
-                embedding.append(int(hex_pair, 16) / 255.0)
-            
-            # Pad or truncate to required dimension
-            while len(embedding) < self.embedding_dimension:
-                embedding.append(0.0)
-            
-            # Normalize the embedding
-            embedding = embedding[:self.embedding_dimension]
-            norm = np.linalg.norm(embedding)
-            if norm > 0:
-                embedding = [x / norm for x in embedding]
-            
-            return embedding
-            
-        except Exception as e:
-            logger.error(f"Embedding vector generation failed: {e}")
-            return self._get_zero_embedding()
+        return self._generate_embeddings_batch_vectors([text])[0].tolist()
     
-    def _generate_embeddings_batch_vectors(self, texts: List[str]) -> List[List[float]]:
+    def _generate_embeddings_batch_vectors(self, texts: List[str]) -> np.ndarray:
         """
         Generate embedding vectors for a batch of texts.
         
@@ -370,42 +365,34 @@ class EmbeddingService:
             texts: List of preprocessed texts
             
         Returns:
-            List of embedding vectors
+            Float32 matrix of embedding vectors (len(texts) x embedding_dimension)
         """
-        try:
-            # Process each text individually
-            # In a real implementation, this would use batch processing
-            embeddings = []
-            for text in texts:
-                embedding = self._generate_embedding_vector(text)
-                embeddings.append(embedding)
-            
-            return embeddings
-            
-        except Exception as e:
-            logger.error(f"Batch embedding generation failed: {e}")
-            return [self._get_zero_embedding() for _ in texts]
+        embeddings = np.zeros((len(texts), self.embedding_dimension), dtype=np.float32)
+        for start in range(0, len(texts), self.batch_size):
+            chunk = texts[start:start + self.batch_size]
+            try:
+                embeddings[start:start + len(chunk)] = self.encoder.encode(chunk)
+            except Exception as e:
+                logger.error(f"Batch embedding generation failed for texts {start}-{start + len(chunk)}: {e}")
+        
+        return embeddings
     
     def _get_cache_key(self, text: str) -> str:
         """Generate cache key for text."""
         try:
-            # Create hash of the text
+            # Create hash of the text; other encoders get their own key space
+            if self.encoder.name != 'hash':
+                text = f"{self.encoder.name}:{self.model_name}:{text}"
             return hashlib.md5(text.encode()).hexdigest()
             
         except Exception as e:
             logger.error(f"Cache key generation failed: {e}")
             return hashlib.md5(f"{text}{datetime.now()}".encode()).hexdigest()
     
-    def _cache_embedding(self, text: str, embedding: List[float]) -> None:
+    def _cache_embedding(self, text: str, embedding: Union[List[float], np.ndarray]) -> None:
         """Cache an embedding."""
         try:
-            cache_key = self._get_cache_key(text)
-            self.embedding_cache[cache_key] = embedding
-            self.cache_metadata[cache_key] = {
-                'text_preview': text[:100],
-                'cached_at': datetime.now().isoformat(),
-                'text_length': len(text)
-            }
+            self.embedding_cache.put(self._get_cache_key(text), embedding, len(text), text[:100])
             
         except Exception as e:
             logger.error(f"Failed to cache embedding: {e}")
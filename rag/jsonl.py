@@ -0,0 +1,52 @@
+"""
+JSON-Lines Files for RAG Persistence
+
+Shared reader for the append-only JSON-lines files of the document log and
+the vector segment store. Appends can be interrupted mid-line, so a torn
+final line is skipped and can be truncated away.
+"""
+
+import json
+from typing import Dict, List, Any
+from pathlib import Path
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def read_jsonl(file: Path, repair: bool = False) -> List[Dict[str, Any]]:
+    """
+    Parse a JSON-lines file.
+
+    A torn final line (from an interrupted write) is ignored; with `repair`
+    it is also truncated away so later appends start on a clean line.
+
+    Args:
+        file: File to read
+        repair: Truncate a torn final line
+
+    Returns:
+        Records in file order (empty if the file does not exist)
+    """
+    if not file.exists():
+        return []
+
+    with open(file, 'rb') as f:
+        data = f.read()
+
+    records = []
+    valid_bytes = 0
+    for line in data.split(b'\n'):
+        end = valid_bytes + len(line) + 1
+        if end > len(data):
+            if line:
+                logger.warning(f"Ignoring incomplete trailing record in {file.name}")
+            break
+        if line:
+            records.append(json.loads(line))
+        valid_bytes = end
+
+    if repair and valid_bytes < len(data):
+        with open(file, 'r+b') as f:
+            f.truncate(valid_bytes)
+    return records
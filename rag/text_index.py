@@ -0,0 +1,234 @@
+"""
+Text Indexes for the RAG Document Store
+
+This module provides the secondary indexes used by the document store:
+
+- InvertedIndex: token-level inverted index with positional postings, used
+  for phrase matching and BM25 relevance scoring
+- TimeIndex: documents kept sorted by timestamp for newest-first retrieval
+
+Both are maintained incrementally as documents are added, updated or removed.
+"""
+
+import bisect
+import math
+import re
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Tuple, Optional, Iterable, Iterator, Set
+import logging
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class InvertedIndex:
+    """
+    Positional inverted index with BM25 scoring.
+
+    Each document is indexed as its fields concatenated in order, with a
+    position gap between fields so phrases never match across them.
+    """
+
+    FIELD_GAP = 1
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """
+        Initialize the index.
+
+        Args:
+            k1: BM25 term-frequency saturation
+            b: BM25 document-length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self.clear()
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._doc_lengths
+
+    def clear(self) -> None:
+        """Remove all documents."""
+        self.postings: Dict[str, Dict[str, List[int]]] = defaultdict(dict)  # term -> doc_id -> positions
+        self._doc_terms: Dict[str, List[str]] = {}
+        self._doc_lengths: Dict[str, int] = {}
+        self._total_length = 0
+
+    def add(self, doc_id: str, fields: Iterable[str]) -> None:
+        """
+        Index (or re-index) a document.
+
+        Args:
+            doc_id: Document identifier
+            fields: Text fields of the document, e.g. title and content
+        """
+        if doc_id in self._doc_lengths:
+            self.remove(doc_id)
+
+        positions: Dict[str, List[int]] = defaultdict(list)
+        position = 0
+        length = 0
+        for field in fields:
+            tokens = tokenize(field)
+            for offset, token in enumerate(tokens):
+                positions[token].append(position + offset)
+            position += len(tokens) + self.FIELD_GAP
+            length += len(tokens)
+
+        for term, term_positions in positions.items():
+            self.postings[term][doc_id] = term_positions
+        self._doc_terms[doc_id] = list(positions)
+        self._doc_lengths[doc_id] = length
+        self._total_length += length
+
+    def remove(self, doc_id: str) -> bool:
+        """
+        Drop a document from the index.
+
+        Args:
+            doc_id: Document identifier
+
+        Returns:
+            True if the document was indexed, False otherwise
+        """
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return False
+
+        for term in terms:
+            term_postings = self.postings[term]
+            term_postings.pop(doc_id, None)
+            if not term_postings:
+                del self.postings[term]
+        self._total_length -= self._doc_lengths.pop(doc_id)
+        return True
+
+    def match(self, query: str) -> Set[str]:
+        """
+        Documents containing the query tokens as a contiguous phrase.
+
+        Args:
+            query: Query text
+
+        Returns:
+            Matching document ids
+        """
+        terms = tokenize(query)
+        if not terms:
+            return set()
+
+        term_postings = [self.postings.get(term) for term in terms]
+        if any(not postings for postings in term_postings):
+            return set()
+
+        smallest = min(term_postings, key=len)
+        candidates = set(smallest).intersection(*term_postings)
+        if len(terms) == 1:
+            return candidates
+
+        return {
+            doc_id for doc_id in candidates
+            if self._has_phrase(doc_id, term_postings)
+        }
+
+    def score(self, query: str, doc_ids: Iterable[str]) -> Dict[str, float]:
+        """
+        BM25 scores of the given documents for a query.
+
+        Args:
+            query: Query text
+            doc_ids: Documents to score
+
+        Returns:
+            Mapping of doc_id to BM25 score
+        """
+        doc_ids = list(doc_ids)
+        scores = dict.fromkeys(doc_ids, 0.0)
+        n_docs = len(self._doc_lengths)
+        if not n_docs:
+            return scores
+
+        avg_length = self._total_length / n_docs or 1.0
+        for term in set(tokenize(query)):
+            term_postings = self.postings.get(term)
+            if not term_postings:
+                continue
+            df = len(term_postings)
+            idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+            for doc_id in doc_ids:
+                positions = term_postings.get(doc_id)
+                if positions is None:
+                    continue
+                tf = len(positions)
+                norm = self.k1 * (1.0 - self.b + self.b * self._doc_lengths[doc_id] / avg_length)
+                scores[doc_id] += idf * tf * (self.k1 + 1.0) / (tf + norm)
+
+        return scores
+
+    def _has_phrase(self, doc_id: str, term_postings: List[Dict[str, List[int]]]) -> bool:
+        """Whether the terms occur at consecutive positions in a document."""
+        starts = set(term_postings[0][doc_id])
+        for offset, postings in enumerate(term_postings[1:], start=1):
+            starts &= {position - offset for position in postings[doc_id]}
+            if not starts:
+                return False
+        return True
+
+
+class TimeIndex:
+    """
+    Documents sorted by timestamp.
+    """
+
+    def __init__(self):
+        """Initialize the index."""
+        self.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        self._entries: List[Tuple[datetime, str]] = []  # sorted (timestamp, doc_id)
+        self._doc_times: Dict[str, datetime] = {}
+
+    def add(self, doc_id: str, timestamp: datetime) -> None:
+        """Index (or re-index) a document's timestamp."""
+        self.remove(doc_id)
+        bisect.insort(self._entries, (timestamp, doc_id))
+        self._doc_times[doc_id] = timestamp
+
+    def remove(self, doc_id: str) -> bool:
+        """Drop a document from the index."""
+        timestamp = self._doc_times.pop(doc_id, None)
+        if timestamp is None:
+            return False
+
+        position = bisect.bisect_left(self._entries, (timestamp, doc_id))
+        if position < len(self._entries) and self._entries[position] == (timestamp, doc_id):
+            del self._entries[position]
+        return True
+
+    def timestamp(self, doc_id: str) -> Optional[datetime]:
+        """Indexed timestamp of a document."""
+        return self._doc_times.get(doc_id)
+
+    def newest(self, since: Optional[datetime] = None) -> Iterator[str]:
+        """
+        Iterate document ids newest first.
+
+        Args:
+            since: Only yield documents at or after this time
+        """
+        low = bisect.bisect_left(self._entries, (since,)) if since is not None else 0
+        for position in range(len(self._entries) - 1, low - 1, -1):
+            yield self._entries[position][1]
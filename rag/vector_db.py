@@ -7,48 +7,220 @@ document embeddings with similarity search capabilities.
 
 import json
 import numpy as np
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Dict, List, Tuple, Optional, Any, Set, Iterable, Union
 from pathlib import Path
 import logging
-from datetime import datetime
+from datetime import datetime, date
+from collections import defaultdict
+import bisect
 import pickle
 import hashlib
 
+from .vector_index import BaseVectorIndex, create_vector_index
+from .vector_store import SegmentStore, StoredDocuments
+
 logger = logging.getLogger(__name__)
 
 
+class MetadataIndex:
+    """
+    Inverted index over document metadata.
+    
+    Maps each value of the indexed fields to the set of documents carrying it
+    (list values are indexed per element) and keeps a sorted date index so
+    date-range filters resolve with a binary search instead of a full scan.
+    """
+    
+    RANGE_KEYS = ('start_date', 'end_date')
+    
+    def __init__(self, fields: Iterable[str] = ('symbol', 'symbols', 'category', 'tags', 'source'),
+                 date_field: str = 'timestamp'):
+        """
+        Initialize the metadata index.
+        
+        Args:
+            fields: Metadata fields to index
+            date_field: Metadata field used for date-range filters
+        """
+        self.fields = tuple(fields)
+        self.date_field = date_field
+        self.clear()
+    
+    def clear(self) -> None:
+        """Remove all entries."""
+        self.postings: Dict[str, Dict[Any, Set[str]]] = {field: defaultdict(set) for field in self.fields}
+        self._dates: List[Tuple[str, str]] = []  # sorted (date, doc_id)
+        self._doc_dates: Dict[str, str] = {}
+    
+    def add(self, doc_id: str, metadata: Dict[str, Any]) -> None:
+        """Index a document's metadata."""
+        for field in self.fields:
+            for value in self._field_values(metadata.get(field)):
+                self.postings[field][value].add(doc_id)
+        
+        doc_date = self._normalize_date(metadata.get(self.date_field))
+        if doc_date is not None:
+            bisect.insort(self._dates, (doc_date, doc_id))
+            self._doc_dates[doc_id] = doc_date
+    
+    def remove(self, doc_id: str, metadata: Dict[str, Any]) -> None:
+        """Drop a document's metadata from the index."""
+        for field in self.fields:
+            postings = self.postings[field]
+            for value in self._field_values(metadata.get(field)):
+                doc_ids = postings.get(value)
+                if doc_ids is not None:
+                    doc_ids.discard(doc_id)
+                    if not doc_ids:
+                        del postings[value]
+        
+        doc_date = self._doc_dates.pop(doc_id, None)
+        if doc_date is not None:
+            position = bisect.bisect_left(self._dates, (doc_date, doc_id))
+            if position < len(self._dates) and self._dates[position] == (doc_date, doc_id):
+                del self._dates[position]
+    
+    def lookup(self, filters: Dict[str, Any]) -> Tuple[Optional[Set[str]], Dict[str, Any]]:
+        """
+        Resolve the indexed part of a filter.
+        
+        Indexed fields match if the document carries any of the requested
+        values; `start_date`/`end_date` bound the date field (inclusive).
+        
+        Args:
+            filters: Metadata filters
+            
+        Returns:
+            Tuple of (matching doc ids or None if no indexed filter applied,
+            remaining filters that need an exact check)
+        """
+        candidates: Optional[Set[str]] = None
+        residual = {}
+        
+        for key, value in filters.items():
+            if key in self.postings:
+                values = value if isinstance(value, (list, tuple, set, frozenset)) else [value]
+                matched = set()
+                for item in values:
+                    matched |= self.postings[key].get(item, set())
+            elif key in self.RANGE_KEYS:
+                continue
+            else:
+                residual[key] = value
+                continue
+            candidates = matched if candidates is None else candidates & matched
+        
+        if any(key in filters for key in self.RANGE_KEYS):
+            matched = self.date_range(filters.get('start_date'), filters.get('end_date'))
+            candidates = matched if candidates is None else candidates & matched
+        
+        return candidates, residual
+    
+    def candidates_for_equality(self, filters: Dict[str, Any]) -> Optional[Set[str]]:
+        """
+        Superset of documents whose metadata equals every filter value.
+        
+        Args:
+            filters: Metadata filters (key-value pairs)
+            
+        Returns:
+            Candidate doc ids, or None if no filter is on an indexed field
+        """
+        candidates: Optional[Set[str]] = None
+        for key, value in filters.items():
+            if key not in self.postings:
+                continue
+            try:
+                matched = self.postings[key].get(value, set())
+            except TypeError:
+                continue  # unhashable filter values are checked exactly
+            candidates = set(matched) if candidates is None else candidates & matched
+        return candidates
+    
+    def date_range(self, start: Any = None, end: Any = None) -> Set[str]:
+        """Documents whose date lies within [start, end]."""
+        start_key = self._normalize_date(start)
+        end_key = self._normalize_date(end)
+        # A bare end date covers the whole day, so compare by prefix
+        low = bisect.bisect_left(self._dates, (start_key,)) if start_key is not None else 0
+        high = bisect.bisect_left(self._dates, (end_key + '\uffff',)) if end_key is not None else len(self._dates)
+        return {doc_id for _, doc_id in self._dates[low:high]}
+    
+    def _field_values(self, value: Any) -> List[Any]:
+        """Hashable values to index for a metadata field."""
+        if value is None:
+            return []
+        values = value if isinstance(value, (list, tuple, set, frozenset)) else [value]
+        hashable = []
+        for item in values:
+            try:
+                hash(item)
+            except TypeError:
+                continue
+            hashable.append(item)
+        return hashable
+    
+    def _normalize_date(self, value: Any) -> Optional[str]:
+        """Convert a date value to a sortable ISO string."""
+        if value is None:
+            return None
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        return str(value)
+
+
 class VectorDatabase:
     """
     Vector database for storing and retrieving document embeddings.
     
     Features:
     - Embedding storage and retrieval
-    - Similarity search
-    - Persistence to disk
+    - Similarity search (exact flat or approximate IVF index)
+    - Incremental persistence to a memory-mapped segment store
     - Metadata management
     """
     
-    def __init__(self, db_path: str, embedding_dimension: int = 384):
+    def __init__(self, db_path: str, embedding_dimension: int = 384,
+                 index_type: str = 'flat', index_params: Optional[Dict[str, Any]] = None,
+                 metadata_fields: Iterable[str] = ('symbol', 'symbols', 'category', 'tags', 'source'),
+                 date_field: str = 'timestamp', storage_params: Optional[Dict[str, Any]] = None):
         """
         Initialize the vector database.
         
         Args:
             db_path: Path to store the database files
             embedding_dimension: Dimension of the embeddings
+            index_type: Similarity index backend ('flat' for exact, 'ivf' for approximate)
+            index_params: Backend-specific index parameters
+            metadata_fields: Metadata fields kept in the inverted metadata index
+            date_field: Metadata field used for date-range filters
+            storage_params: Segment store parameters (compaction_ratio, min_compaction_rows)
         """
         self.db_path = Path(db_path)
         self.db_path.mkdir(parents=True, exist_ok=True)
         self.embedding_dimension = embedding_dimension
+        self.index_type = index_type
         
-        # Storage structures
-        self.embeddings = {}  # doc_id -> embedding vector
+        # Storage structures (embeddings live only in the similarity index)
         self.metadata = {}    # doc_id -> metadata dict
         self.index = {}       # doc_id -> document info
         
+        # Similarity index over the normalized embeddings
+        self.vector_index: BaseVectorIndex = create_vector_index(
+            index_type, embedding_dimension, **(index_params or {})
+        )
+        self.metadata_index = MetadataIndex(metadata_fields, date_field)
+        
+        # On-disk segments and the changes not yet written to them
+        self.store = SegmentStore(self.db_path, embedding_dimension, **(storage_params or {}))
+        self._pending_adds: Dict[str, None] = {}  # insertion-ordered set
+        self._pending_removes: Set[str] = set()
+        self._needs_rewrite = False
+        
         # Load existing database
         self._load_database()
         
-        logger.info(f"Initialized VectorDatabase at {self.db_path} with {len(self.embeddings)} vectors")
+        logger.info(f"Initialized VectorDatabase at {self.db_path} with {len(self.vector_index)} vectors")
     
     def add_document(self, doc_id: str, embedding: List[float], metadata: Dict[str, Any]) -> bool:
         """
@@ -69,12 +241,17 @@ class VectorDatabase:
                 return False
             
             # Store embedding and metadata
-            self.embeddings[doc_id] = embedding
+            self.vector_index.add(doc_id, embedding)
+            if doc_id in self.metadata:
+                self.metadata_index.remove(doc_id, self.metadata[doc_id])
             self.metadata[doc_id] = metadata
+            self.metadata_index.add(doc_id, metadata)
             self.index[doc_id] = {
                 'added_at': datetime.now().isoformat(),
                 'embedding_dim': len(embedding)
             }
+            self._pending_removes.discard(doc_id)
+            self._pending_adds[doc_id] = None
             
             logger.debug(f"Added document {doc_id} to vector database")
             return True
@@ -93,7 +270,8 @@ class VectorDatabase:
         Returns:
             Embedding vector or None if not found
         """
-        return self.embeddings.get(doc_id)
+        vector = self.vector_index.get_vector(doc_id)
+        return vector.tolist() if vector is not None else None
     
     def get_metadata(self, doc_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -108,7 +286,7 @@ class VectorDatabase:
         return self.metadata.get(doc_id)
     
     def search_similar(self, query_embedding: List[float], top_k: int = 10, 
-                      threshold: float = 0.0) -> List[Tuple[str, float]]:
+                      threshold: float = 0.0, filters: Optional[Dict[str, Any]] = None) -> List[Tuple[str, float]]:
         """
         Search for similar documents using cosine similarity.
         
@@ -116,30 +294,80 @@ class VectorDatabase:
             query_embedding: Query embedding vector
             top_k: Number of top results to return
             threshold: Minimum similarity threshold
+            filters: Optional metadata filters (see search_similar_batch)
             
         Returns:
             List of (doc_id, similarity_score) tuples
         """
         try:
-            if not self.embeddings:
+            if len(self.vector_index) == 0:
                 return []
             
-            similarities = []
-            
-            for doc_id, doc_embedding in self.embeddings.items():
-                similarity = self._cosine_similarity(query_embedding, doc_embedding)
-                if similarity >= threshold:
-                    similarities.append((doc_id, similarity))
-            
-            # Sort by similarity (descending)
-            similarities.sort(key=lambda x: x[1], reverse=True)
+            if len(query_embedding) != self.embedding_dimension:
+                logger.error(f"Query dimension mismatch: expected {self.embedding_dimension}, got {len(query_embedding)}")
+                return []
             
-            return similarities[:top_k]
+            candidate_ids = [self._resolve_filters(filters)] if filters else None
+            return self.vector_index.search(query_embedding, top_k, threshold, candidate_ids)[0]
             
         except Exception as e:
             logger.error(f"Similarity search failed: {e}")
             return []
     
+    def search_similar_batch(self, query_embeddings: Union[List[List[float]], np.ndarray], top_k: int = 10,
+                             threshold: float = 0.0,
+                             filters: Optional[Union[Dict[str, Any], List[Optional[Dict[str, Any]]]]] = None
+                             ) -> List[List[Tuple[str, float]]]:
+        """
+        Search for similar documents for several queries in one pass.
+        
+        All queries are scored with a single matrix product. Filters on indexed
+        metadata fields (symbol, category, tags, ...) match any of the given
+        values, `start_date`/`end_date` bound the date field, and any other key
+        must equal the metadata value exactly.
+        
+        Args:
+            query_embeddings: Matrix of query embedding vectors
+            top_k: Number of top results to return per query
+            threshold: Minimum similarity threshold
+            filters: Metadata filters shared by all queries, or one filter dict
+                (or None) per query
+            
+        Returns:
+            One list of (doc_id, similarity_score) tuples per query
+        """
+        try:
+            queries = np.asarray(query_embeddings, dtype=np.float32)
+            if queries.ndim != 2 or queries.shape[1] != self.embedding_dimension:
+                logger.error(f"Query batch shape mismatch: expected (n, {self.embedding_dimension}), got {queries.shape}")
+                return [[] for _ in range(len(query_embeddings))]
+            
+            if len(self.vector_index) == 0:
+                return [[] for _ in range(queries.shape[0])]
+            
+            if filters is None:
+                candidate_ids = None
+            elif isinstance(filters, dict):
+                shared = self._resolve_filters(filters)
+                candidate_ids = [shared] * queries.shape[0]
+            else:
+                resolved = {}
+                candidate_ids = []
+                for query_filters in filters:
+                    if not query_filters:
+                        candidate_ids.append(None)
+                        continue
+                    key = repr(sorted(query_filters.items(), key=lambda item: item[0]))
+                    if key not in resolved:
+                        resolved[key] = self._resolve_filters(query_filters)
+                    candidate_ids.append(resolved[key])
+            
+            return self.vector_index.search(queries, top_k, threshold, candidate_ids)
+            
+        except Exception as e:
+            logger.error(f"Batch similarity search failed: {e}")
+            return [[] for _ in range(len(query_embeddings))]
+    
     def search_by_metadata(self, filters: Dict[str, Any]) -> List[str]:
         """
         Search documents by metadata filters.
@@ -151,19 +379,13 @@ class VectorDatabase:
             List of document IDs matching the filters
         """
         try:
-            matching_docs = []
-            
-            for doc_id, metadata in self.metadata.items():
-                match = True
-                for key, value in filters.items():
-                    if key not in metadata or metadata[key] != value:
-                        match = False
-                        break
-                
-                if match:
-                    matching_docs.append(doc_id)
+            candidates = self.metadata_index.candidates_for_equality(filters)
+            doc_ids = self.metadata if candidates is None else candidates
             
-            return matching_docs
+            return [
+                doc_id for doc_id in doc_ids
+                if self._matches_filters(self.metadata[doc_id], filters)
+            ]
             
         except Exception as e:
             logger.error(f"Metadata search failed: {e}")
@@ -180,10 +402,13 @@ class VectorDatabase:
             True if successful, False otherwise
         """
         try:
-            if doc_id in self.embeddings:
-                del self.embeddings[doc_id]
+            if doc_id in self.metadata:
+                self.vector_index.remove(doc_id)
+                self.metadata_index.remove(doc_id, self.metadata[doc_id])
                 del self.metadata[doc_id]
                 del self.index[doc_id]
+                self._pending_adds.pop(doc_id, None)
+                self._pending_removes.add(doc_id)
                 logger.debug(f"Removed document {doc_id} from vector database")
                 return True
             else:
@@ -202,7 +427,7 @@ class VectorDatabase:
             Dictionary with database statistics
         """
         try:
-            total_docs = len(self.embeddings)
+            total_docs = len(self.metadata)
             
             # Count by metadata categories
             categories = {}
@@ -211,15 +436,15 @@ class VectorDatabase:
                 categories[category] = categories.get(category, 0) + 1
             
             # Calculate average embedding norm
-            if self.embeddings:
-                norms = [np.linalg.norm(embedding) for embedding in self.embeddings.values()]
-                avg_norm = np.mean(norms)
+            if len(self.vector_index):
+                avg_norm = float(np.mean(self.vector_index.get_norms()))
             else:
                 avg_norm = 0.0
             
             return {
                 'total_documents': total_docs,
                 'embedding_dimension': self.embedding_dimension,
+                'index_type': self.index_type,
                 'categories': categories,
                 'average_embedding_norm': avg_norm,
                 'database_size_mb': self._get_database_size()
@@ -237,9 +462,13 @@ class VectorDatabase:
             True if successful, False otherwise
         """
         try:
-            self.embeddings.clear()
+            self.vector_index.clear()
+            self.metadata_index.clear()
             self.metadata.clear()
             self.index.clear()
+            self._pending_adds.clear()
+            self._pending_removes.clear()
+            self._needs_rewrite = True
             logger.info("Cleared vector database")
             return True
             
@@ -251,24 +480,27 @@ class VectorDatabase:
         """
         Save database to disk.
         
+        Only documents added, replaced or removed since the last save are
+        appended to the segment log; the base segment is rewritten when the
+        log has grown large enough to be worth compacting.
+        
         Returns:
             True if successful, False otherwise
         """
         try:
-            # Save embeddings
-            embeddings_file = self.db_path / 'embeddings.pkl'
-            with open(embeddings_file, 'wb') as f:
-                pickle.dump(self.embeddings, f)
-            
-            # Save metadata
-            metadata_file = self.db_path / 'metadata.json'
-            with open(metadata_file, 'w') as f:
-                json.dump(self.metadata, f, indent=2)
+            pending = len(self._pending_adds) + len(self._pending_removes)
+            if self._needs_rewrite or self.store.needs_compaction(pending):
+                self._compact_store()
+            else:
+                self.store.append(
+                    [(doc_id, self.vector_index.get_vector(doc_id), self.metadata[doc_id], self.index[doc_id])
+                     for doc_id in self._pending_adds],
+                    self._pending_removes
+                )
             
-            # Save index
-            index_file = self.db_path / 'index.json'
-            with open(index_file, 'w') as f:
-                json.dump(self.index, f, indent=2)
+            self._pending_adds.clear()
+            self._pending_removes.clear()
+            self._needs_rewrite = False
             
             logger.info(f"Saved vector database to {self.db_path}")
             return True
@@ -277,35 +509,89 @@ class VectorDatabase:
             logger.error(f"Failed to save database: {e}")
             return False
     
+    def _compact_store(self) -> None:
+        """Rewrite all live documents into a fresh base segment."""
+        self.store.compact(
+            (doc_id, self.vector_index.get_vector(doc_id), self.metadata[doc_id], self.index[doc_id])
+            for doc_id in list(self.metadata)
+        )
+    
     def _load_database(self) -> None:
         """Load database from disk."""
         try:
-            # Load embeddings
-            embeddings_file = self.db_path / 'embeddings.pkl'
-            if embeddings_file.exists():
-                with open(embeddings_file, 'rb') as f:
-                    self.embeddings = pickle.load(f)
-            
-            # Load metadata
-            metadata_file = self.db_path / 'metadata.json'
-            if metadata_file.exists():
-                with open(metadata_file, 'r') as f:
-                    self.metadata = json.load(f)
-            
-            # Load index
-            index_file = self.db_path / 'index.json'
-            if index_file.exists():
-                with open(index_file, 'r') as f:
-                    self.index = json.load(f)
-            
-            logger.info(f"Loaded vector database with {len(self.embeddings)} documents")
+            if self.store.exists():
+                self._index_documents(self.store.load())
+            else:
+                self._load_legacy_database()
+            
+            logger.info(f"Loaded vector database with {len(self.metadata)} documents")
             
         except Exception as e:
             logger.error(f"Failed to load database: {e}")
             # Initialize empty database
-            self.embeddings = {}
             self.metadata = {}
             self.index = {}
+            self.vector_index.clear()
+            self.metadata_index.clear()
+    
+    def _load_legacy_database(self) -> None:
+        """Load the older pickle/JSON format and migrate it to the segment store."""
+        embeddings_file = self.db_path / 'embeddings.pkl'
+        metadata_file = self.db_path / 'metadata.json'
+        index_file = self.db_path / 'index.json'
+        if not embeddings_file.exists():
+            return
+        
+        with open(embeddings_file, 'rb') as f:
+            embeddings = pickle.load(f)
+        metadata, index = {}, {}
+        if metadata_file.exists():
+            with open(metadata_file, 'r') as f:
+                metadata = json.load(f)
+        if index_file.exists():
+            with open(index_file, 'r') as f:
+                index = json.load(f)
+        
+        self._index_documents({
+            doc_id: (embedding, metadata.get(doc_id, {}), index.get(doc_id, {'embedding_dim': len(embedding)}))
+            for doc_id, embedding in embeddings.items()
+        })
+        
+        self._compact_store()
+        for legacy_file in (embeddings_file, metadata_file, index_file):
+            if legacy_file.exists():
+                legacy_file.unlink()
+        logger.info(f"Migrated {len(embeddings)} documents to the segment store format")
+    
+    def _index_documents(self, documents: StoredDocuments) -> None:
+        """Load stored documents into the similarity, metadata and info indexes."""
+        doc_ids = list(documents)
+        if doc_ids:
+            # Build the similarity index in one batch; it holds the only in-memory copy of the vectors
+            self.vector_index.add_batch(doc_ids, np.stack([documents[doc_id][0] for doc_id in doc_ids]))
+        for doc_id in doc_ids:
+            _, metadata, info = documents[doc_id]
+            self.metadata[doc_id] = metadata
+            self.index[doc_id] = info
+            self.metadata_index.add(doc_id, metadata)
+    
+    def _resolve_filters(self, filters: Dict[str, Any]) -> Set[str]:
+        """Document ids matching a filter dict (indexed fields first, then exact checks)."""
+        candidates, residual = self.metadata_index.lookup(filters)
+        if residual:
+            doc_ids = self.metadata if candidates is None else candidates
+            candidates = {
+                doc_id for doc_id in doc_ids
+                if self._matches_filters(self.metadata[doc_id], residual)
+            }
+        return candidates if candidates is not None else set(self.metadata)
+    
+    def _matches_filters(self, metadata: Dict[str, Any], filters: Dict[str, Any]) -> bool:
+        """Check that every filter key is present in metadata with an equal value."""
+        for key, value in filters.items():
+            if key not in metadata or metadata[key] != value:
+                return False
+        return True
     
     def _cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
         """
@@ -345,9 +631,8 @@ class VectorDatabase:
         try:
             total_size = 0
             
-            # Calculate size of embeddings
-            if self.embeddings:
-                total_size += len(pickle.dumps(self.embeddings))
+            # Calculate size of embeddings (float32 rows)
+            total_size += len(self.vector_index) * self.embedding_dimension * 4
             
             # Calculate size of metadata
             if self.metadata:
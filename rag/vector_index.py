@@ -0,0 +1,520 @@
+"""
+Vector Index Backends for RAG System
+
+This module provides the index backends used by the vector database for
+similarity search. Embeddings are L2-normalized on insertion and kept as rows
+of a contiguous float32 matrix, so cosine similarity reduces to a single
+matrix product. Two backends are available:
+
+- FlatIndex: exact search over every stored vector
+- IVFIndex: approximate inverted-file search for large corpora
+"""
+
+import numpy as np
+from abc import ABC, abstractmethod
+from typing import Dict, List, Tuple, Optional, Any, Sequence, Union, Collection
+import logging
+
+logger = logging.getLogger(__name__)
+
+SearchResults = List[List[Tuple[str, float]]]
+
+
+class BaseVectorIndex(ABC):
+    """
+    Abstract base class for vector index backends.
+
+    Rows are appended to a growable float32 matrix. Removed rows are
+    tombstoned and reclaimed by compaction once they make up a large enough
+    share of the matrix, so removals stay O(1).
+    """
+
+    def __init__(self, dimension: int, initial_capacity: int = 1024,
+                 compaction_ratio: float = 0.25):
+        """
+        Initialize the index.
+
+        Args:
+            dimension: Dimension of the stored vectors
+            initial_capacity: Number of rows to preallocate
+            compaction_ratio: Fraction of tombstoned rows that triggers compaction
+        """
+        self.dimension = dimension
+        self.initial_capacity = max(1, initial_capacity)
+        self.compaction_ratio = compaction_ratio
+        self.clear()
+
+    def __len__(self) -> int:
+        return len(self._id_to_row)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._id_to_row
+
+    @property
+    def ids(self) -> List[str]:
+        """Identifiers of all live vectors."""
+        return list(self._id_to_row)
+
+    def clear(self) -> None:
+        """Remove all vectors and release the preallocated storage."""
+        self._vectors = np.zeros((self.initial_capacity, self.dimension), dtype=np.float32)
+        self._norms = np.zeros(self.initial_capacity, dtype=np.float32)
+        self._live = np.zeros(self.initial_capacity, dtype=bool)
+        self._ids: List[Optional[str]] = []
+        self._id_to_row: Dict[str, int] = {}
+        self._size = 0
+        self._dead = 0
+
+    def add(self, doc_id: str, vector: Union[Sequence[float], np.ndarray]) -> None:
+        """
+        Add or replace a single vector.
+
+        Args:
+            doc_id: Document identifier
+            vector: Embedding vector
+        """
+        self.add_batch([doc_id], np.asarray(vector, dtype=np.float32).reshape(1, -1))
+
+    def add_batch(self, doc_ids: Sequence[str], vectors: Union[Sequence[Sequence[float]], np.ndarray]) -> None:
+        """
+        Add or replace several vectors at once.
+
+        Args:
+            doc_ids: Document identifiers, one per row
+            vectors: Matrix of embedding vectors (n x dimension)
+        """
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[1] != self.dimension:
+            raise ValueError(f"Expected vectors of shape (n, {self.dimension}), got {matrix.shape}")
+        if len(doc_ids) != matrix.shape[0]:
+            raise ValueError(f"Got {len(doc_ids)} ids for {matrix.shape[0]} vectors")
+
+        count = matrix.shape[0]
+        if count == 0:
+            return
+
+        normalized, norms = self._normalize(matrix)
+        start = self._size
+        self._ensure_capacity(start + count)
+        self._vectors[start:start + count] = normalized
+        self._norms[start:start + count] = norms
+        self._live[start:start + count] = True
+
+        for offset, doc_id in enumerate(doc_ids):
+            previous = self._id_to_row.get(doc_id)
+            if previous is not None:
+                self._tombstone(previous)
+            self._id_to_row[doc_id] = start + offset
+            self._ids.append(doc_id)
+
+        self._size += count
+        self._maybe_compact()
+
+    def remove(self, doc_id: str) -> bool:
+        """
+        Remove a vector.
+
+        Args:
+            doc_id: Document identifier
+
+        Returns:
+            True if the vector was present, False otherwise
+        """
+        row = self._id_to_row.pop(doc_id, None)
+        if row is None:
+            return False
+
+        self._tombstone(row)
+        self._maybe_compact()
+        return True
+
+    def get_vector(self, doc_id: str) -> Optional[np.ndarray]:
+        """
+        Get the original (un-normalized) vector for a document.
+
+        Args:
+            doc_id: Document identifier
+
+        Returns:
+            Embedding vector or None if not found
+        """
+        row = self._id_to_row.get(doc_id)
+        if row is None:
+            return None
+        return self._vectors[row] * self._norms[row]
+
+    def get_norms(self) -> np.ndarray:
+        """Original L2 norms of all live vectors."""
+        return self._norms[:self._size][self._live[:self._size]]
+
+    def search(self, queries: Union[Sequence[float], Sequence[Sequence[float]], np.ndarray],
+               top_k: int = 10, threshold: float = 0.0,
+               candidate_ids: Optional[Sequence[Optional[Collection[str]]]] = None) -> SearchResults:
+        """
+        Search for the most similar vectors by cosine similarity.
+
+        Args:
+            queries: A single query vector or a matrix of query vectors
+            top_k: Number of top results to return per query
+            threshold: Minimum similarity threshold
+            candidate_ids: Optional per-query collections of document ids to
+                restrict the search to; a None entry leaves that query unrestricted
+
+        Returns:
+            One list of (doc_id, similarity_score) tuples per query, best first
+        """
+        matrix = np.asarray(queries, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+        if matrix.ndim != 2 or matrix.shape[1] != self.dimension:
+            raise ValueError(f"Expected queries of dimension {self.dimension}, got shape {matrix.shape}")
+        if candidate_ids is not None and len(candidate_ids) != matrix.shape[0]:
+            raise ValueError(f"Got {len(candidate_ids)} candidate sets for {matrix.shape[0]} queries")
+
+        if top_k <= 0 or not self._id_to_row:
+            return [[] for _ in range(matrix.shape[0])]
+
+        normalized, _ = self._normalize(matrix)
+        if candidate_ids is None:
+            return self._search(normalized, top_k, threshold)
+
+        results: SearchResults = [[] for _ in range(matrix.shape[0])]
+        open_queries = [i for i, ids in enumerate(candidate_ids) if ids is None]
+        restricted_queries = [i for i, ids in enumerate(candidate_ids) if ids is not None]
+
+        if open_queries:
+            for i, hits in zip(open_queries, self._search(normalized[open_queries], top_k, threshold)):
+                results[i] = hits
+        if restricted_queries:
+            candidate_rows = [self._rows_for_ids(candidate_ids[i]) for i in restricted_queries]
+            restricted_results = self._search_candidates(
+                normalized[restricted_queries], candidate_rows, top_k, threshold
+            )
+            for i, hits in zip(restricted_queries, restricted_results):
+                results[i] = hits
+
+        return results
+
+    @abstractmethod
+    def _search(self, queries: np.ndarray, top_k: int, threshold: float) -> SearchResults:
+        """
+        Search with already normalized queries.
+
+        Args:
+            queries: Normalized query matrix (m x dimension)
+            top_k: Number of top results to return per query
+            threshold: Minimum similarity threshold
+
+        Returns:
+            One list of (doc_id, similarity_score) tuples per query
+        """
+        pass
+
+    def _search_candidates(self, queries: np.ndarray, candidate_rows: List[np.ndarray],
+                           top_k: int, threshold: float) -> SearchResults:
+        """
+        Exact search restricted to per-query candidate rows.
+
+        All queries are scored against the union of their candidates with a
+        single matrix product; columns outside a query's own candidate set are
+        masked out afterwards.
+        """
+        union_rows = np.unique(np.concatenate(candidate_rows)) if candidate_rows else np.zeros(0, dtype=np.int64)
+        if len(union_rows) == 0:
+            return [[] for _ in range(queries.shape[0])]
+
+        scores = queries @ self._vectors[union_rows].T
+        for i, rows in enumerate(candidate_rows):
+            if len(rows) != len(union_rows):
+                scores[i, ~np.isin(union_rows, rows, assume_unique=True)] = -np.inf
+
+        return self._select_top_k(scores, union_rows, top_k, threshold)
+
+    def _rows_for_ids(self, doc_ids: Collection[str]) -> np.ndarray:
+        """Row numbers of the live vectors among `doc_ids`."""
+        id_to_row = self._id_to_row
+        rows = [id_to_row[doc_id] for doc_id in doc_ids if doc_id in id_to_row]
+        return np.unique(np.asarray(rows, dtype=np.int64))
+
+    def _on_compact(self, kept_rows: np.ndarray) -> None:
+        """Hook for subclasses that keep per-row state; called after compaction."""
+        pass
+
+    def _select_top_k(self, scores: np.ndarray, rows: Optional[np.ndarray],
+                      top_k: int, threshold: float) -> SearchResults:
+        """
+        Pick the top-k scores per query without sorting every candidate.
+
+        Args:
+            scores: Score matrix (m x candidates); dead rows must be -inf
+            rows: Row number of each candidate column, or None if columns are rows
+            top_k: Number of top results to return per query
+            threshold: Minimum similarity threshold
+
+        Returns:
+            One list of (doc_id, similarity_score) tuples per query
+        """
+        n_queries, n_candidates = scores.shape
+        if n_candidates == 0:
+            return [[] for _ in range(n_queries)]
+
+        k = min(top_k, n_candidates)
+        if k < n_candidates:
+            top_columns = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top_columns = np.broadcast_to(np.arange(n_candidates), (n_queries, n_candidates))
+        top_scores = np.take_along_axis(scores, top_columns, axis=1)
+
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        top_columns = np.take_along_axis(top_columns, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        results = []
+        for columns, column_scores in zip(top_columns, top_scores):
+            hits = []
+            for column, score in zip(columns.tolist(), column_scores.tolist()):
+                if score < threshold or score == -np.inf:
+                    break
+                row = column if rows is None else int(rows[column])
+                hits.append((self._ids[row], score))
+            results.append(hits)
+
+        return results
+
+    def _normalize(self, matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """L2-normalize rows, leaving zero rows untouched."""
+        norms = np.linalg.norm(matrix, axis=1)
+        safe_norms = np.where(norms > 0, norms, 1.0).astype(np.float32)
+        return matrix / safe_norms[:, None], norms.astype(np.float32)
+
+    def _ensure_capacity(self, required: int) -> None:
+        """Grow the row storage geometrically to fit at least `required` rows."""
+        capacity = self._vectors.shape[0]
+        if required <= capacity:
+            return
+
+        new_capacity = max(required, capacity * 2)
+        vectors = np.zeros((new_capacity, self.dimension), dtype=np.float32)
+        vectors[:self._size] = self._vectors[:self._size]
+        norms = np.zeros(new_capacity, dtype=np.float32)
+        norms[:self._size] = self._norms[:self._size]
+        live = np.zeros(new_capacity, dtype=bool)
+        live[:self._size] = self._live[:self._size]
+
+        self._vectors, self._norms, self._live = vectors, norms, live
+
+    def _tombstone(self, row: int) -> None:
+        """Mark a row as removed."""
+        self._live[row] = False
+        self._ids[row] = None
+        self._dead += 1
+
+    def _maybe_compact(self) -> None:
+        """Compact the storage once enough rows are tombstoned."""
+        if self._dead and self._dead >= self.compaction_ratio * self._size:
+            self.compact()
+
+    def compact(self) -> None:
+        """Drop tombstoned rows and renumber the remaining ones."""
+        kept_rows = np.flatnonzero(self._live[:self._size])
+        count = len(kept_rows)
+
+        self._vectors[:count] = self._vectors[kept_rows]
+        self._norms[:count] = self._norms[kept_rows]
+        self._live[:count] = True
+        self._live[count:self._size] = False
+        self._ids = [self._ids[row] for row in kept_rows.tolist()]
+        self._id_to_row = {doc_id: row for row, doc_id in enumerate(self._ids)}
+        self._size = count
+        self._dead = 0
+
+        self._on_compact(kept_rows)
+        logger.debug(f"Compacted vector index to {count} rows")
+
+
+class FlatIndex(BaseVectorIndex):
+    """
+    Exact index: scores every stored vector with one batched matrix product.
+    """
+
+    def _search(self, queries: np.ndarray, top_k: int, threshold: float) -> SearchResults:
+        scores = queries @ self._vectors[:self._size].T
+        if self._dead:
+            scores[:, ~self._live[:self._size]] = -np.inf
+        return self._select_top_k(scores, None, top_k, threshold)
+
+
+class IVFIndex(BaseVectorIndex):
+    """
+    Approximate inverted-file index.
+
+    Vectors are clustered with spherical k-means; a query only scores the
+    vectors in its `n_probe` closest clusters. Rows added since the inverted
+    lists were last built are always scanned exactly, so new documents are
+    searchable immediately. Until the index holds `min_train_size` vectors it
+    behaves like a flat index.
+    """
+
+    def __init__(self, dimension: int, n_lists: Optional[int] = None, n_probe: int = 8,
+                 min_train_size: int = 4096, retrain_growth: float = 4.0,
+                 max_unindexed_ratio: float = 0.1, kmeans_iterations: int = 10,
+                 max_training_points: int = 100000, seed: int = 42, **kwargs):
+        """
+        Initialize the IVF index.
+
+        Args:
+            dimension: Dimension of the stored vectors
+            n_lists: Number of clusters (defaults to sqrt of the corpus size)
+            n_probe: Number of clusters scanned per query
+            min_train_size: Corpus size at which clustering kicks in
+            retrain_growth: Corpus growth factor that triggers re-clustering
+            max_unindexed_ratio: Share of unindexed rows that triggers a list rebuild
+            kmeans_iterations: Number of k-means iterations
+            max_training_points: Maximum number of vectors sampled for k-means
+            seed: Random seed for k-means initialization
+        """
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.min_train_size = min_train_size
+        self.retrain_growth = retrain_growth
+        self.max_unindexed_ratio = max_unindexed_ratio
+        self.kmeans_iterations = kmeans_iterations
+        self.max_training_points = max_training_points
+        self.seed = seed
+        super().__init__(dimension, **kwargs)
+
+    def clear(self) -> None:
+        super().clear()
+        self._centroids: Optional[np.ndarray] = None
+        self._trained_size = 0
+        self._assignments = np.zeros(0, dtype=np.int32)
+        self._list_order = np.zeros(0, dtype=np.int64)
+        self._list_offsets = np.zeros(1, dtype=np.int64)
+        self._indexed_upto = 0
+
+    @property
+    def is_trained(self) -> bool:
+        return self._centroids is not None
+
+    def _search(self, queries: np.ndarray, top_k: int, threshold: float) -> SearchResults:
+        if not self._ensure_index():
+            scores = queries @ self._vectors[:self._size].T
+            if self._dead:
+                scores[:, ~self._live[:self._size]] = -np.inf
+            return self._select_top_k(scores, None, top_k, threshold)
+
+        n_lists = self._centroids.shape[0]
+        n_probe = min(self.n_probe, n_lists)
+        coarse_scores = queries @ self._centroids.T
+        if n_probe < n_lists:
+            probes = np.argpartition(-coarse_scores, n_probe - 1, axis=1)[:, :n_probe]
+        else:
+            probes = np.broadcast_to(np.arange(n_lists), (queries.shape[0], n_lists))
+
+        unindexed_rows = np.arange(self._indexed_upto, self._size)
+        results = []
+        for query, probe in zip(queries, probes):
+            rows = np.concatenate(
+                [self._list_order[self._list_offsets[c]:self._list_offsets[c + 1]] for c in probe]
+                + [unindexed_rows]
+            )
+            rows = rows[self._live[rows]]
+            scores = (self._vectors[rows] @ query).reshape(1, -1)
+            results.extend(self._select_top_k(scores, rows, top_k, threshold))
+
+        return results
+
+    def _ensure_index(self) -> bool:
+        """Train or refresh the inverted lists as needed; False while too small to cluster."""
+        live_count = len(self)
+        if self._centroids is None:
+            if live_count < self.min_train_size:
+                return False
+            self._train()
+        elif live_count > self.retrain_growth * self._trained_size:
+            self._train()
+        elif self._size - self._indexed_upto > self.max_unindexed_ratio * self._size:
+            self._rebuild_lists()
+        return True
+
+    def _train(self) -> None:
+        """Cluster the live vectors with spherical k-means and rebuild the lists."""
+        rng = np.random.default_rng(self.seed)
+        live_rows = np.flatnonzero(self._live[:self._size])
+        if len(live_rows) > self.max_training_points:
+            live_rows = np.sort(rng.choice(live_rows, self.max_training_points, replace=False))
+        data = self._vectors[live_rows]
+
+        n_lists = self.n_lists or int(np.sqrt(len(self)))
+        n_lists = int(np.clip(n_lists, 1, len(data)))
+        centroids = data[rng.choice(len(data), n_lists, replace=False)].copy()
+
+        for _ in range(self.kmeans_iterations):
+            assignments = self._assign(data, centroids)
+            order = np.argsort(assignments, kind='stable')
+            counts = np.bincount(assignments, minlength=n_lists)
+            non_empty = np.flatnonzero(counts)
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[non_empty]
+            sums = np.add.reduceat(data[order], starts, axis=0)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids[non_empty] = sums / np.where(norms > 0, norms, 1.0)
+
+        self._centroids = centroids
+        self._trained_size = len(self)
+        self._assignments = np.zeros(0, dtype=np.int32)
+        self._indexed_upto = 0
+        self._rebuild_lists()
+        logger.info(f"Trained IVF index with {n_lists} lists on {len(data)} vectors")
+
+    def _rebuild_lists(self) -> None:
+        """Assign unindexed rows to clusters and regroup the inverted lists."""
+        new_assignments = self._assign(self._vectors[self._indexed_upto:self._size], self._centroids)
+        self._assignments = np.concatenate([self._assignments[:self._indexed_upto], new_assignments])
+        self._indexed_upto = self._size
+        self._group_lists()
+
+    def _group_lists(self) -> None:
+        """Sort row numbers by cluster so each list is a contiguous slice."""
+        n_lists = self._centroids.shape[0]
+        self._list_order = np.argsort(self._assignments, kind='stable')
+        counts = np.bincount(self._assignments, minlength=n_lists)
+        self._list_offsets = np.concatenate(([0], np.cumsum(counts)))
+
+    def _assign(self, data: np.ndarray, centroids: np.ndarray, chunk_size: int = 65536) -> np.ndarray:
+        """Nearest centroid (by dot product) for each row, in bounded-memory chunks."""
+        assignments = np.empty(len(data), dtype=np.int32)
+        for start in range(0, len(data), chunk_size):
+            chunk = data[start:start + chunk_size]
+            assignments[start:start + chunk_size] = np.argmax(chunk @ centroids.T, axis=1)
+        return assignments
+
+    def _on_compact(self, kept_rows: np.ndarray) -> None:
+        if self._centroids is None:
+            return
+        indexed_rows = kept_rows[kept_rows < self._indexed_upto]
+        self._assignments = self._assignments[indexed_rows]
+        self._indexed_upto = len(indexed_rows)
+        self._group_lists()
+
+
+INDEX_TYPES = {
+    'flat': FlatIndex,
+    'ivf': IVFIndex,
+}
+
+
+def create_vector_index(index_type: str, dimension: int, **params: Any) -> BaseVectorIndex:
+    """
+    Create a vector index backend.
+
+    Args:
+        index_type: Backend name ('flat' or 'ivf')
+        dimension: Dimension of the stored vectors
+        **params: Backend-specific parameters
+
+    Returns:
+        Vector index instance
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown vector index type '{index_type}', expected one of {sorted(INDEX_TYPES)}")
+    return INDEX_TYPES[index_type](dimension, **params)
@@ -0,0 +1,282 @@
+"""
+Segment Storage for the RAG Vector Database
+
+This module provides the on-disk format used by the vector database. Data
+lives in a base segment plus an append log:
+
+- vectors.<gen>.npy: float32 matrix of the base segment, memory-mapped on load
+- records.<gen>.jsonl: one record (id, metadata, info) per base row
+- append.<gen>.f32: raw float32 rows appended since the last compaction
+- append.<gen>.jsonl: add records and removal tombstones, in write order
+- manifest.json: format version, dimension and the current generation
+
+Saves only append the documents changed since the previous save. Once the log
+and tombstones grow large relative to the base segment, the live documents are
+rewritten into a new generation and the manifest is swapped atomically, so a
+crash during compaction leaves the previous generation intact.
+"""
+
+import json
+import os
+import numpy as np
+from typing import Dict, Tuple, Optional, Any, Iterable, Set
+from pathlib import Path
+import logging
+
+from .jsonl import read_jsonl
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+# doc_id -> (vector, metadata, info)
+StoredDocuments = Dict[str, Tuple[np.ndarray, Dict[str, Any], Dict[str, Any]]]
+
+
+class SegmentStore:
+    """
+    Append-only segment storage for embeddings and their metadata.
+
+    Base segment vectors are returned as read-only memory-mapped rows, so a
+    cold start maps the file instead of deserializing every embedding.
+    """
+
+    MANIFEST = 'manifest.json'
+
+    def __init__(self, path: Path, dimension: int, compaction_ratio: float = 0.5,
+                 min_compaction_rows: int = 1024):
+        """
+        Initialize the segment store.
+
+        Args:
+            path: Directory holding the segment files
+            dimension: Dimension of the stored vectors
+            compaction_ratio: Share of log rows plus tombstones (relative to the
+                base segment) that triggers compaction
+            min_compaction_rows: Log rows plus tombstones always tolerated before compacting
+        """
+        self.path = Path(path)
+        self.dimension = dimension
+        self.compaction_ratio = compaction_ratio
+        self.min_compaction_rows = min_compaction_rows
+
+        self.generation = 0
+        self.base_rows = 0
+        self.log_rows = 0
+        self.tombstones = 0
+        self._persisted_ids: Set[str] = set()
+        self._base_vectors: Optional[np.ndarray] = None
+
+    def exists(self) -> bool:
+        """Whether a segment store has been written to this directory."""
+        return (self.path / self.MANIFEST).exists()
+
+    def load(self) -> StoredDocuments:
+        """
+        Load the current generation.
+
+        Returns:
+            Mapping of doc_id to (vector, metadata, info); base segment vectors
+            are views into the memory-mapped base file
+        """
+        manifest = json.loads((self.path / self.MANIFEST).read_text())
+        if manifest.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported vector store format {manifest.get('format_version')}")
+        if manifest.get('dimension') != self.dimension:
+            raise ValueError(f"Stored dimension {manifest.get('dimension')} does not match {self.dimension}")
+
+        self.generation = manifest['generation']
+        documents: StoredDocuments = {}
+
+        # Base segment
+        base_records = read_jsonl(self._records_file(self.generation))
+        vectors_file = self._vectors_file(self.generation)
+        if vectors_file.exists():
+            base_vectors = np.load(vectors_file, mmap_mode='r')
+        else:
+            base_vectors = np.zeros((0, self.dimension), dtype=np.float32)
+        if len(base_records) != base_vectors.shape[0]:
+            raise ValueError(f"Base segment has {base_vectors.shape[0]} vectors for {len(base_records)} records")
+
+        for row, record in enumerate(base_records):
+            documents[record['id']] = (base_vectors[row], record.get('metadata', {}), record.get('info', {}))
+        self._base_vectors = base_vectors
+        self.base_rows = len(base_records)
+
+        # Append log; rows whose record or vector never made it to disk are skipped
+        log_vectors = self._read_log_vectors(self.generation)
+        self.log_rows = 0
+        self.tombstones = 0
+        for record in read_jsonl(self._log_records_file(self.generation), repair=True):
+            doc_id = record['id']
+            if record.get('op') == 'remove':
+                if documents.pop(doc_id, None) is not None:
+                    self.tombstones += 1
+                continue
+
+            row = record['row']
+            if row >= log_vectors.shape[0]:
+                logger.warning(f"Skipping log record for {doc_id}: vector row {row} is missing")
+                continue
+            if documents.pop(doc_id, None) is not None:
+                self.tombstones += 1  # re-added documents move to the end
+            documents[doc_id] = (log_vectors[row], record.get('metadata', {}), record.get('info', {}))
+            self.log_rows = max(self.log_rows, row + 1)
+
+        self._persisted_ids = set(documents)
+        logger.info(f"Loaded vector store generation {self.generation}: "
+                    f"{self.base_rows} base rows, {self.log_rows} log rows, {self.tombstones} tombstones")
+        return documents
+
+    def append(self, added: Iterable[Tuple[str, Any, Dict[str, Any], Dict[str, Any]]],
+               removed: Iterable[str]) -> None:
+        """
+        Append changed documents and removal tombstones to the log.
+
+        Args:
+            added: (doc_id, vector, metadata, info) for new or replaced documents
+            removed: Identifiers of removed documents
+        """
+        added = list(added)
+        removed = [doc_id for doc_id in removed if doc_id in self._persisted_ids]
+        if not added and not removed:
+            return
+
+        # Serialize everything first so a bad record cannot leave a partial write
+        lines = []
+        for doc_id in removed:
+            lines.append(json.dumps({'op': 'remove', 'id': doc_id}))
+        for offset, (doc_id, _, metadata, info) in enumerate(added):
+            lines.append(json.dumps({'op': 'add', 'id': doc_id, 'row': self.log_rows + offset,
+                                     'metadata': metadata, 'info': info}))
+        vectors = np.asarray([vector for _, vector, _, _ in added], dtype=np.float32).reshape(-1, self.dimension)
+
+        if not self.exists():
+            self._write_manifest(self.generation)
+
+        # Vectors go first: a record is only honoured once its row is on disk
+        with open(self._log_vectors_file(self.generation), 'ab') as f:
+            f.seek(self.log_rows * self.dimension * 4)
+            f.truncate()
+            f.write(vectors.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        with open(self._log_records_file(self.generation), 'a') as f:
+            f.write('\n'.join(lines) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+        for doc_id in removed:
+            self._persisted_ids.discard(doc_id)
+        for doc_id, _, _, _ in added:
+            if doc_id in self._persisted_ids:
+                self.tombstones += 1
+            self._persisted_ids.add(doc_id)
+        self.tombstones += len(removed)
+        self.log_rows += len(added)
+
+    def needs_compaction(self, pending: int = 0) -> bool:
+        """
+        Whether the log has grown enough to rewrite the base segment.
+
+        Args:
+            pending: Rows and tombstones about to be appended
+        """
+        garbage = self.log_rows + self.tombstones + pending
+        return garbage > max(self.min_compaction_rows, self.compaction_ratio * self.base_rows)
+
+    def compact(self, documents: Iterable[Tuple[str, Any, Dict[str, Any], Dict[str, Any]]]) -> np.ndarray:
+        """
+        Rewrite the live documents into a new generation and drop the log.
+
+        Args:
+            documents: (doc_id, vector, metadata, info) for every live document
+
+        Returns:
+            Memory-mapped base vectors of the new generation, in document order
+        """
+        documents = list(documents)
+        generation = self.generation + 1
+
+        vectors = np.lib.format.open_memmap(
+            self._vectors_file(generation), mode='w+', dtype=np.float32,
+            shape=(len(documents), self.dimension)
+        )
+        for row, (_, vector, _, _) in enumerate(documents):
+            vectors[row] = vector
+        vectors.flush()
+        del vectors
+
+        with open(self._records_file(generation), 'w') as f:
+            for doc_id, _, metadata, info in documents:
+                f.write(json.dumps({'id': doc_id, 'metadata': metadata, 'info': info}) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+        self._write_manifest(generation)
+        self._remove_generation(self.generation)
+
+        self.generation = generation
+        self.base_rows = len(documents)
+        self.log_rows = 0
+        self.tombstones = 0
+        self._persisted_ids = {doc_id for doc_id, _, _, _ in documents}
+        self._base_vectors = np.load(self._vectors_file(generation), mmap_mode='r')
+
+        logger.info(f"Compacted vector store to generation {generation} with {len(documents)} documents")
+        return self._base_vectors
+
+    def disk_size(self) -> int:
+        """Total size in bytes of the current generation's files."""
+        files = [
+            self.path / self.MANIFEST,
+            self._vectors_file(self.generation),
+            self._records_file(self.generation),
+            self._log_vectors_file(self.generation),
+            self._log_records_file(self.generation),
+        ]
+        return sum(f.stat().st_size for f in files if f.exists())
+
+    def _read_log_vectors(self, generation: int) -> np.ndarray:
+        """Memory-map the complete rows of the log vector file."""
+        log_file = self._log_vectors_file(generation)
+        row_bytes = self.dimension * 4
+        rows = log_file.stat().st_size // row_bytes if log_file.exists() else 0
+        if rows == 0:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        return np.memmap(log_file, dtype=np.float32, mode='r', shape=(rows, self.dimension))
+
+    def _write_manifest(self, generation: int) -> None:
+        """Atomically point the manifest at a generation."""
+        manifest = {
+            'format_version': FORMAT_VERSION,
+            'dimension': self.dimension,
+            'generation': generation,
+        }
+        tmp_file = self.path / (self.MANIFEST + '.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.path / self.MANIFEST)
+
+    def _remove_generation(self, generation: int) -> None:
+        """Delete the files of a superseded generation."""
+        for f in (self._vectors_file(generation), self._records_file(generation),
+                  self._log_vectors_file(generation), self._log_records_file(generation)):
+            try:
+                f.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _vectors_file(self, generation: int) -> Path:
+        return self.path / f'vectors.{generation}.npy'
+
+    def _records_file(self, generation: int) -> Path:
+        return self.path / f'records.{generation}.jsonl'
+
+    def _log_vectors_file(self, generation: int) -> Path:
+        return self.path / f'append.{generation}.f32'
+
+    def _log_records_file(self, generation: int) -> Path:
+        return self.path / f'append.{generation}.jsonl'
@@ -3,11 +3,14 @@ Risk management module for AI Market Analysis System.
 """
 
 from .monte_carlo_simulator import MonteCarloSimulator, SimulationResult, RiskScenario, SimulationType, RiskMetric
+from .streaming_stats import QuantileSketch, RunningMoments
 
 __all__ = [
     'MonteCarloSimulator',
     'SimulationResult',
     'RiskScenario',
     'SimulationType',
-    'RiskMetric'
+    'RiskMetric',
+    'QuantileSketch',
+    'RunningMoments'
 ]
@@ -3,18 +3,41 @@ Monte Carlo Risk Simulation System
 
 This module provides Monte Carlo simulation capabilities for
 risk modeling and portfolio optimization.
+
+Paths are generated as NumPy arrays in blocks of time steps, and drawdowns,
+final values and returns are accumulated block by block, so a simulation can
+either keep the full path matrix or return only summary statistics without
+ever holding all paths in memory.
+
+Simulations are split into chunks of paths. Each chunk draws from its own
+random stream spawned from the configured seed and reduces to mergeable
+statistics, so chunks can run across a process pool and the results do not
+depend on the number of workers.
 """
 
+import os
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Dict, Any, Optional, List, Tuple, Iterator, Iterable
 from datetime import datetime, timedelta
 import logging
 from dataclasses import dataclass
+from collections import deque
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
 from enum import Enum
 import warnings
 warnings.filterwarnings('ignore')
 
+try:
+    from scipy.stats import qmc
+    from scipy.special import ndtri
+    SCIPY_QMC_AVAILABLE = True
+except ImportError:
+    SCIPY_QMC_AVAILABLE = False
+
+from .streaming_stats import QuantileSketch, RunningMoments
+
 logger = logging.getLogger(__name__)
 
 
@@ -51,7 +74,7 @@ class SimulationResult:
     final_values: List[float]
     max_drawdowns: List[float]
     statistics: Dict[str, float]
-    scenarios: Optional[pd.DataFrame] = None
+    scenarios: Optional[pd.DataFrame] = None  # simulations x time steps, step 0 is the initial value
 
 
 @dataclass
@@ -65,6 +88,81 @@ class RiskScenario:
     description: str
 
 
+@dataclass
+class PathSummary:
+    """Mergeable statistics of a chunk of simulated paths."""
+    returns: QuantileSketch
+    return_moments: RunningMoments
+    max_drawdowns: QuantileSketch
+    max_drawdown_moments: RunningMoments
+    
+    @classmethod
+    def from_values(cls, returns: np.ndarray, max_drawdowns: np.ndarray,
+                    relative_accuracy: float) -> 'PathSummary':
+        """Summarize the returns and maximum drawdowns of a chunk."""
+        summary = cls(QuantileSketch(relative_accuracy), RunningMoments.from_values(returns),
+                      QuantileSketch(relative_accuracy), RunningMoments.from_values(max_drawdowns))
+        summary.returns.add(returns)
+        summary.max_drawdowns.add(max_drawdowns)
+        return summary
+    
+    def merge(self, other: 'PathSummary') -> 'PathSummary':
+        """Fold the summary of another chunk into this one."""
+        self.returns.merge(other.returns)
+        self.return_moments.merge(other.return_moments)
+        self.max_drawdowns.merge(other.max_drawdowns)
+        self.max_drawdown_moments.merge(other.max_drawdown_moments)
+        return self
+
+
+@dataclass
+class PathChunk:
+    """Simulation output for one chunk of paths."""
+    summary: PathSummary
+    paths: Optional[np.ndarray] = None  # per-path outputs are only kept with keep_paths
+    final_values: Optional[np.ndarray] = None
+    max_drawdowns: Optional[np.ndarray] = None
+
+
+@lru_cache(maxsize=8)
+def _brownian_bridge_plan(steps: int) -> Tuple[Tuple[int, int, int, float, float, float], ...]:
+    """
+    Construction order of a Brownian bridge over `steps` unit time steps.
+
+    The endpoint comes first; then, breadth first, each interval is split at
+    its midpoint, which is normal around the interpolation of its ends.
+
+    Returns:
+        (mid, left, right, left_weight, right_weight, sd) per midpoint, in order
+    """
+    plan = []
+    intervals = deque([(0, steps)])
+    while intervals:
+        left, right = intervals.popleft()
+        if right - left < 2:
+            continue
+        mid = (left + right) // 2
+        width = right - left
+        plan.append((mid, left, right, (right - mid) / width, (mid - left) / width,
+                     float(np.sqrt((mid - left) * (right - mid) / width))))
+        intervals.extend([(left, mid), (mid, right)])
+    return tuple(plan)
+
+
+# Per-process simulator set up by the pool initializer
+_worker_state: Dict[str, Any] = {}
+
+
+def _init_worker(config: Dict[str, Any]) -> None:
+    """Create the worker's simulator once."""
+    _worker_state['simulator'] = MonteCarloSimulator(config)
+
+
+def _run_chunk(job: Tuple) -> PathChunk:
+    """Simulate one chunk of paths in a worker process."""
+    return _worker_state['simulator']._simulate_chunk(*job)
+
+
 class MonteCarloSimulator:
     """
     Monte Carlo simulation engine for risk modeling.
@@ -77,6 +175,15 @@ class MonteCarloSimulator:
     - Scenario analysis
     """
     
+    # Path models and the kernels generating them
+    PATH_MODELS = {
+        'geometric_brownian_motion': '_simulate_gbm',
+        'jump_diffusion': '_simulate_jump_diffusion',
+        'garch': '_simulate_garch',
+        'portfolio': '_simulate_portfolio_values',
+        'stress': '_simulate_stressed_values'
+    }
+    
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         """
         Initialize the Monte Carlo Simulator.
@@ -90,6 +197,13 @@ class MonteCarloSimulator:
             'confidence_levels': [0.95, 0.99, 0.999],
             'risk_free_rate': 0.02,
             'random_seed': 42,
+            'dtype': 'float64',  # or 'float32' to halve path memory
+            'keep_paths': True,  # False returns summary statistics only
+            'time_chunk_steps': 64,  # time steps generated per block
+            'chunk_size': 10000,  # paths per independently seeded chunk
+            'max_workers': 1,  # processes simulating chunks (None uses the CPU count)
+            'sketch_relative_accuracy': 0.001,  # quantile error when paths are not kept
+            'variance_reduction': None,  # None, 'antithetic' or 'sobol' for portfolio simulations
             'models': {
                 'geometric_brownian_motion': True,
                 'jump_diffusion': True,
@@ -108,7 +222,8 @@ class MonteCarloSimulator:
             default_config.update(config)
         
         self.config = default_config
-        np.random.seed(self.config['random_seed'])
+        self.dtype = np.dtype(self.config['dtype'])
+        self._seed_sequence = np.random.SeedSequence(self.config['random_seed'])
         
         logger.info(f"Initialized MonteCarloSimulator with config: {self.config}")
     
@@ -118,7 +233,8 @@ class MonteCarloSimulator:
                            volatility: float,
                            time_horizon: Optional[int] = None,
                            n_simulations: Optional[int] = None,
-                           model: str = 'geometric_brownian_motion') -> SimulationResult:
+                           model: str = 'geometric_brownian_motion',
+                           keep_paths: Optional[bool] = None) -> SimulationResult:
         """
         Simulate price paths using Monte Carlo methods.
         
@@ -129,6 +245,8 @@ class MonteCarloSimulator:
             time_horizon: Number of time steps
             n_simulations: Number of simulations
             model: Simulation model to use
+            keep_paths: Keep the paths and per-path values; False returns
+                summary statistics only (defaults to config['keep_paths'])
             
         Returns:
             Simulation results
@@ -139,17 +257,12 @@ class MonteCarloSimulator:
             
             logger.info(f"Running {n_simulations} price simulations over {time_horizon} periods")
             
-            if model == 'geometric_brownian_motion':
-                scenarios = self._simulate_gbm(initial_price, expected_return, volatility, time_horizon, n_simulations)
-            elif model == 'jump_diffusion':
-                scenarios = self._simulate_jump_diffusion(initial_price, expected_return, volatility, time_horizon, n_simulations)
-            elif model == 'garch':
-                scenarios = self._simulate_garch(initial_price, expected_return, volatility, time_horizon, n_simulations)
-            else:
-                scenarios = self._simulate_gbm(initial_price, expected_return, volatility, time_horizon, n_simulations)
+            if model not in ('jump_diffusion', 'garch'):
+                model = 'geometric_brownian_motion'
             
-            # Calculate results
-            result = self._calculate_simulation_results(scenarios, SimulationType.PRICE_SIMULATION, time_horizon, n_simulations)
+            result = self._run_simulation(SimulationType.PRICE_SIMULATION, model,
+                                          (initial_price, expected_return, volatility),
+                                          initial_price, time_horizon, n_simulations, keep_paths)
             
             return result
             
@@ -163,10 +276,16 @@ class MonteCarloSimulator:
                               covariance_matrix: pd.DataFrame,
                               initial_value: float = 100000,
                               time_horizon: Optional[int] = None,
-                              n_simulations: Optional[int] = None) -> SimulationResult:
+                              n_simulations: Optional[int] = None,
+                              keep_paths: Optional[bool] = None,
+                              variance_reduction: Optional[str] = None) -> SimulationResult:
         """
         Simulate portfolio risk using Monte Carlo methods.
         
+        Because the portfolio is rebalanced to its weights every step, its
+        daily return is normal with volatility sqrt(w' C w), so one shock per
+        path and step is drawn instead of one correlated shock per asset.
+        
         Args:
             portfolio_weights: Portfolio weights for each asset
             expected_returns: Expected returns for each asset
@@ -174,6 +293,11 @@ class MonteCarloSimulator:
             initial_value: Initial portfolio value
             time_horizon: Number of time steps
             n_simulations: Number of simulations
+            keep_paths: Keep the paths and per-path values; False returns
+                summary statistics only (defaults to config['keep_paths'])
+            variance_reduction: 'none', 'antithetic' (mirrored shock pairs) or
+                'sobol' (one scrambled Sobol point per path, built into a
+                Brownian bridge); defaults to config['variance_reduction']
             
         Returns:
             Portfolio simulation results
@@ -184,42 +308,80 @@ class MonteCarloSimulator:
             
             logger.info(f"Running {n_simulations} portfolio simulations over {time_horizon} periods")
             
-            # Generate correlated returns
-            assets = list(portfolio_weights.keys())
-            n_assets = len(assets)
-            
             # Convert to numpy arrays
+            assets = list(portfolio_weights.keys())
             weights = np.array([portfolio_weights[asset] for asset in assets])
             expected_returns_array = np.array([expected_returns[asset] for asset in assets])
             cov_matrix = covariance_matrix.values
             
-            # Generate random returns
-            random_returns = np.random.multivariate_normal(
-                expected_returns_array / 252,  # Daily returns
-                cov_matrix / 252,  # Daily covariance
-                (n_simulations, time_horizon)
-            )
-            
-            # Calculate portfolio returns
-            portfolio_returns = np.sum(random_returns * weights, axis=2)
-            
-            # Calculate portfolio values
-            portfolio_values = initial_value * np.cumprod(1 + portfolio_returns, axis=1)
+            variance_reduction = variance_reduction or self.config['variance_reduction']
+            if variance_reduction == 'sobol' and not SCIPY_QMC_AVAILABLE:
+                logger.warning("scipy.stats.qmc not available, using pseudo-random shocks")
+                variance_reduction = None
             
-            # Create scenarios DataFrame
-            scenarios = pd.DataFrame(portfolio_values)
-            scenarios.columns = [f'day_{i}' for i in range(time_horizon)]
-            scenarios['simulation'] = range(n_simulations)
+            # Daily portfolio drift and volatility
+            daily_return = float(weights @ expected_returns_array) / 252
+            daily_volatility = float(np.sqrt(max(weights @ cov_matrix @ weights, 0.0))) / np.sqrt(252)
             
-            # Calculate results
-            result = self._calculate_simulation_results(scenarios, SimulationType.PORTFOLIO_SIMULATION, time_horizon, n_simulations)
+            result = self._run_simulation(SimulationType.PORTFOLIO_SIMULATION, 'portfolio',
+                                          (daily_return, daily_volatility, initial_value, variance_reduction),
+                                          initial_value, time_horizon, n_simulations, keep_paths)
             
             return result
             
         except Exception as e:
             logger.error(f"Portfolio risk simulation failed: {e}")
             return self._create_empty_result(SimulationType.PORTFOLIO_SIMULATION)
-    
+
+    def estimate_var_standard_error(self,
+                                    portfolio_weights: Dict[str, float],
+                                    expected_returns: Dict[str, float],
+                                    covariance_matrix: pd.DataFrame,
+                                    n_simulations: Optional[int] = None,
+                                    time_horizon: Optional[int] = None,
+                                    n_repeats: int = 10,
+                                    confidence_level: float = 0.95,
+                                    methods: Optional[List[Optional[str]]] = None) -> Dict[str, float]:
+        """
+        Measure the standard error of portfolio VaR per variance reduction method.
+
+        Each method reruns the portfolio simulation n_repeats times on fresh
+        random streams and reports the standard deviation of the resulting
+        VaR, so a method is only worth enabling if its value is lower than
+        the pseudo-random ('none') one at the path count in use.
+
+        Args:
+            portfolio_weights: Portfolio weights for each asset
+            expected_returns: Expected returns for each asset
+            covariance_matrix: Asset covariance matrix
+            n_simulations: Paths per run
+            time_horizon: Number of time steps
+            n_repeats: Independent runs per method
+            confidence_level: VaR confidence level
+            methods: Variance reduction methods to compare (defaults to all)
+
+        Returns:
+            Standard deviation of VaR across runs, by method
+        """
+        try:
+            methods = methods if methods is not None else [None, 'antithetic', 'sobol']
+            standard_errors = {}
+
+            for method in methods:
+                var_estimates = []
+                for _ in range(n_repeats):
+                    result = self.simulate_portfolio_risk(portfolio_weights, expected_returns, covariance_matrix,
+                                                          time_horizon=time_horizon, n_simulations=n_simulations,
+                                                          keep_paths=True, variance_reduction=method or 'none')
+                    var_estimates.append(self.calculate_var(result.expected_returns, [confidence_level])[confidence_level])
+                standard_errors[method or 'none'] = float(np.std(var_estimates, ddof=1))
+
+            return standard_errors
+
+        except Exception as e:
+            logger.error(f"VaR standard error estimation failed: {e}")
+            return {}
+
     def calculate_var(self,
                      returns: List[float],
                      confidence_levels: Optional[List[float]] = None,
@@ -254,7 +416,7 @@ class MonteCarloSimulator:
                 elif method == 'monte_carlo':
                     # Monte Carlo simulation
                     n_simulations = 10000
-                    simulated_returns = np.random.normal(
+                    simulated_returns = self._spawn_generator().normal(
                         np.mean(returns_array),
                         np.std(returns_array),
                         n_simulations
@@ -341,177 +503,391 @@ class MonteCarloSimulator:
             logger.error(f"Stress test failed: {e}")
             return {}
     
-    def _simulate_gbm(self, initial_price: float, expected_return: float, volatility: float, 
-                     time_horizon: int, n_simulations: int) -> pd.DataFrame:
-        """Simulate using Geometric Brownian Motion."""
-        try:
-            dt = 1 / 252  # Daily time step
-            drift = (expected_return - 0.5 * volatility**2) * dt
-            diffusion = volatility * np.sqrt(dt)
-            
-            # Generate random shocks
-            random_shocks = np.random.normal(0, 1, (n_simulations, time_horizon))
-            
-            # Calculate price paths
-            price_paths = np.zeros((n_simulations, time_horizon + 1))
-            price_paths[:, 0] = initial_price
-            
-            for t in range(time_horizon):
-                price_paths[:, t + 1] = price_paths[:, t] * np.exp(drift + diffusion * random_shocks[:, t])
-            
-            # Create DataFrame
-            scenarios = pd.DataFrame(price_paths)
-            scenarios.columns = [f'day_{i}' for i in range(time_horizon + 1)]
-            scenarios['simulation'] = range(n_simulations)
-            
-            return scenarios
+    def _time_chunks(self, time_horizon: int) -> Iterator[int]:
+        """Number of time steps in each consecutive block of a simulation."""
+        chunk = max(1, int(self.config['time_chunk_steps']))
+        for start in range(0, time_horizon, chunk):
+            yield min(chunk, time_horizon - start)
+    
+    def _spawn_generator(self) -> np.random.Generator:
+        """Independent random stream spawned from the configured seed."""
+        return np.random.default_rng(self._seed_sequence.spawn(1)[0])
+    
+    def _standard_normal(self, rng: np.random.Generator, shape: Tuple[int, ...]) -> np.ndarray:
+        """Standard normal shocks in the configured dtype."""
+        return rng.standard_normal(shape, dtype=self.dtype)
+    
+    def _cumulate_log_returns(self, log_returns: np.ndarray, log_value: np.ndarray) -> np.ndarray:
+        """
+        Turn a block of log-returns into values, in place.
+        
+        Args:
+            log_returns: Log-returns of one time block (simulations x steps); overwritten
+            log_value: Log-value before the block; advanced to the end of the block
             
-        except Exception as e:
-            logger.error(f"GBM simulation failed: {e}")
-            return pd.DataFrame()
+        Returns:
+            Values at each step of the block
+        """
+        np.cumsum(log_returns, axis=1, out=log_returns)
+        log_returns += log_value[:, None]
+        log_value[:] = log_returns[:, -1]
+        return np.exp(log_returns, out=log_returns)
+    
+    def _simulate_gbm(self, initial_price: float, expected_return: float, volatility: float, 
+                     time_horizon: int, n_simulations: int, rng: np.random.Generator) -> Iterator[np.ndarray]:
+        """Simulate using Geometric Brownian Motion as cumulative log-returns."""
+        dt = 1 / 252  # Daily time step
+        drift = (expected_return - 0.5 * volatility**2) * dt
+        diffusion = volatility * np.sqrt(dt)
+        log_price = np.full(n_simulations, np.log(initial_price), dtype=self.dtype)
+        
+        for steps in self._time_chunks(time_horizon):
+            log_returns = self._standard_normal(rng, (n_simulations, steps))
+            log_returns *= diffusion
+            log_returns += drift
+            yield self._cumulate_log_returns(log_returns, log_price)
     
     def _simulate_jump_diffusion(self, initial_price: float, expected_return: float, volatility: float,
-                                time_horizon: int, n_simulations: int) -> pd.DataFrame:
+                                time_horizon: int, n_simulations: int,
+                                rng: np.random.Generator) -> Iterator[np.ndarray]:
         """Simulate using Jump Diffusion model."""
-        try:
-            dt = 1 / 252
-            drift = (expected_return - 0.5 * volatility**2) * dt
-            diffusion = volatility * np.sqrt(dt)
-            
-            # Jump parameters
-            jump_intensity = 0.1  # Average number of jumps per year
-            jump_mean = 0.0  # Mean jump size
-            jump_std = 0.02  # Jump volatility
+        dt = 1 / 252
+        drift = (expected_return - 0.5 * volatility**2) * dt
+        diffusion = volatility * np.sqrt(dt)
+        
+        # Jump parameters
+        jump_intensity = 0.1  # Average number of jumps per year
+        jump_mean = 0.0  # Mean jump size
+        jump_std = 0.02  # Jump volatility
+        
+        log_price = np.full(n_simulations, np.log(initial_price), dtype=self.dtype)
+        
+        for steps in self._time_chunks(time_horizon):
+            # Brownian motion component
+            log_returns = self._standard_normal(rng, (n_simulations, steps))
+            log_returns *= diffusion
+            log_returns += drift
+            
+            # Jump component; jumps are rare, so sizes are only drawn where one occurs
+            jump_events = rng.poisson(jump_intensity * dt, (n_simulations, steps))
+            jumps = np.nonzero(jump_events)
+            log_returns[jumps] += jump_events[jumps] * rng.normal(jump_mean, jump_std, len(jumps[0]))
+            
+            yield self._cumulate_log_returns(log_returns, log_price)
+    
+    def _simulate_garch(self, initial_price: float, expected_return: float, volatility: float,
+                       time_horizon: int, n_simulations: int, rng: np.random.Generator) -> Iterator[np.ndarray]:
+        """Simulate using GARCH model."""
+        # Simplified GARCH(1,1) simulation
+        dt = 1 / 252
+        alpha = 0.1  # ARCH coefficient
+        beta = 0.85  # GARCH coefficient
+        omega = volatility**2 * (1 - alpha - beta)  # Long-term variance
+        
+        log_price = np.full(n_simulations, np.log(initial_price), dtype=self.dtype)
+        variance = np.full(n_simulations, volatility**2, dtype=self.dtype)
+        volatility_t = np.empty_like(variance)
+        
+        for steps in self._time_chunks(time_horizon):
+            shocks = self._standard_normal(rng, (n_simulations, steps))
+            log_returns = np.empty_like(shocks)
+            
+            # The variance recursion is sequential in time but vectorized across paths
+            for t in range(steps):
+                np.sqrt(variance, out=volatility_t)
+                np.multiply(volatility_t, shocks[:, t], out=log_returns[:, t])
+                
+                # Next variance from the squared (annualized) innovation of this step
+                variance *= alpha * shocks[:, t]**2 + beta
+                variance += omega
             
-            price_paths = np.zeros((n_simulations, time_horizon + 1))
-            price_paths[:, 0] = initial_price
+            log_returns *= np.sqrt(dt)
+            log_returns += expected_return * dt
+            yield self._cumulate_log_returns(log_returns, log_price)
+    
+    def _portfolio_shocks(self, rng: np.random.Generator, n_simulations: int, steps: int,
+                          variance_reduction: Optional[str]) -> np.ndarray:
+        """
+        Standard normal shocks for one time block of a portfolio simulation.
+        
+        Args:
+            rng: Random stream of the chunk
+            n_simulations: Number of paths
+            steps: Number of time steps in the block
+            variance_reduction: None or 'antithetic'
             
-            for t in range(time_horizon):
-                # Brownian motion component
-                brownian_shock = np.random.normal(0, 1, n_simulations)
-                
-                # Jump component
-                jump_events = np.random.poisson(jump_intensity * dt, n_simulations)
-                jump_shocks = np.random.normal(jump_mean, jump_std, n_simulations)
-                jump_component = jump_events * jump_shocks
-                
-                # Update prices
-                price_paths[:, t + 1] = price_paths[:, t] * np.exp(
-                    drift + diffusion * brownian_shock + jump_component
-                )
+        Returns:
+            Shocks (simulations x steps) in the configured dtype
+        """
+        if variance_reduction == 'antithetic':
+            half = self._standard_normal(rng, ((n_simulations + 1) // 2, steps))
+            return np.concatenate([half, -half[:n_simulations // 2]])
+        
+        return self._standard_normal(rng, (n_simulations, steps))
+    
+    def _sobol_path_shocks(self, rng: np.random.Generator, n_simulations: int, time_horizon: int) -> np.ndarray:
+        """
+        Standard normal shocks for whole paths from one scrambled Sobol point set.
+        
+        Each path is one point of a single Sobol sequence with one dimension
+        per step, and the points are turned into a Brownian bridge: the first
+        dimension sets the endpoint of the walk and later dimensions fill in
+        ever finer midpoints. The final value, and so VaR, depends mostly on
+        the first few dimensions, where Sobol points are most uniform.
+        Points are drawn in a power-of-two set and the first n_simulations kept.
+        
+        Args:
+            rng: Random stream of the chunk (scrambles the point set)
+            n_simulations: Number of paths
+            time_horizon: Number of time steps
             
-            # Create DataFrame
-            scenarios = pd.DataFrame(price_paths)
-            scenarios.columns = [f'day_{i}' for i in range(time_horizon + 1)]
-            scenarios['simulation'] = range(n_simulations)
+        Returns:
+            Shocks (simulations x time_horizon) in the configured dtype
+        """
+        sobol = qmc.Sobol(d=time_horizon, scramble=True, seed=rng)
+        normals = sobol.random_base2(max(0, int(np.ceil(np.log2(n_simulations)))))[:n_simulations]
+        np.clip(normals, 1e-12, 1 - 1e-12, out=normals)
+        ndtri(normals, out=normals)
+        
+        walk = np.empty((n_simulations, time_horizon + 1))
+        walk[:, 0] = 0
+        walk[:, time_horizon] = np.sqrt(time_horizon) * normals[:, 0]
+        for dimension, (mid, left, right, left_weight, right_weight, sd) in \
+                enumerate(_brownian_bridge_plan(time_horizon), start=1):
+            walk[:, mid] = left_weight * walk[:, left] + right_weight * walk[:, right] + sd * normals[:, dimension]
+        
+        return np.diff(walk, axis=1).astype(self.dtype, copy=False)
+    
+    def _simulate_portfolio_values(self, daily_return: float, daily_volatility: float, initial_value: float,
+                                   variance_reduction: Optional[str], time_horizon: int, n_simulations: int,
+                                   rng: np.random.Generator) -> Iterator[np.ndarray]:
+        """Simulate values of a portfolio rebalanced to constant weights every day."""
+        value = np.full(n_simulations, initial_value, dtype=self.dtype)
+        
+        # Sobol points span whole paths, so they are drawn up front and sliced into blocks
+        path_shocks = None
+        if variance_reduction == 'sobol':
+            path_shocks = self._sobol_path_shocks(rng, n_simulations, time_horizon)
+        
+        start = 0
+        for steps in self._time_chunks(time_horizon):
+            if path_shocks is not None:
+                portfolio_returns = path_shocks[:, start:start + steps]
+            else:
+                portfolio_returns = self._portfolio_shocks(rng, n_simulations, steps, variance_reduction)
+            start += steps
+            portfolio_returns *= daily_volatility
+            portfolio_returns += daily_return
             
-            return scenarios
+            yield self._compound_returns(portfolio_returns, value)
+    
+    def _simulate_stressed_values(self, scenario: RiskScenario, initial_value: float,
+                                  time_horizon: int, n_simulations: int,
+                                  rng: np.random.Generator) -> Iterator[np.ndarray]:
+        """Simulate portfolio values under a stress scenario."""
+        value = np.full(n_simulations, initial_value, dtype=self.dtype)
+        
+        for steps in self._time_chunks(time_horizon):
+            # Generate stressed returns
+            stressed_returns = rng.normal(
+                scenario.market_shock / 252,  # Daily stressed return
+                scenario.volatility_multiplier * 0.02,  # Stressed volatility
+                (n_simulations, steps)
+            ).astype(self.dtype, copy=False)
             
-        except Exception as e:
-            logger.error(f"Jump diffusion simulation failed: {e}")
-            return pd.DataFrame()
+            yield self._compound_returns(stressed_returns, value)
     
-    def _simulate_garch(self, initial_price: float, expected_return: float, volatility: float,
-                       time_horizon: int, n_simulations: int) -> pd.DataFrame:
-        """Simulate using GARCH model."""
-        try:
-            # Simplified GARCH(1,1) simulation
-            dt = 1 / 252
-            alpha = 0.1  # ARCH coefficient
-            beta = 0.85  # GARCH coefficient
-            omega = volatility**2 * (1 - alpha - beta)  # Long-term variance
-            
-            price_paths = np.zeros((n_simulations, time_horizon + 1))
-            variance_paths = np.zeros((n_simulations, time_horizon + 1))
-            
-            price_paths[:, 0] = initial_price
-            variance_paths[:, 0] = volatility**2
-            
-            for t in range(time_horizon):
-                # Update variance
-                if t > 0:
-                    variance_paths[:, t] = omega + alpha * (price_paths[:, t] * np.log(price_paths[:, t] / price_paths[:, t-1]))**2 + beta * variance_paths[:, t-1]
-                
-                # Generate returns
-                current_volatility = np.sqrt(variance_paths[:, t])
-                returns = expected_return * dt + current_volatility * np.sqrt(dt) * np.random.normal(0, 1, n_simulations)
-                
-                # Update prices
-                price_paths[:, t + 1] = price_paths[:, t] * np.exp(returns)
+    def _compound_returns(self, returns: np.ndarray, value: np.ndarray) -> np.ndarray:
+        """
+        Turn a block of simple returns into values, in place.
+        
+        Args:
+            returns: Simple returns of one time block (simulations x steps); overwritten
+            value: Value before the block; advanced to the end of the block
             
-            # Create DataFrame
-            scenarios = pd.DataFrame(price_paths)
-            scenarios.columns = [f'day_{i}' for i in range(time_horizon + 1)]
-            scenarios['simulation'] = range(n_simulations)
+        Returns:
+            Values at each step of the block
+        """
+        returns += 1
+        np.cumprod(returns, axis=1, out=returns)
+        returns *= value[:, None]
+        value[:] = returns[:, -1]
+        return returns
+    
+    def _run_simulation(self, simulation_type: SimulationType, model: str, model_args: Tuple,
+                        initial_value: float, time_horizon: int, n_simulations: int,
+                        keep_paths: Optional[bool] = None) -> SimulationResult:
+        """
+        Simulate paths chunk by chunk and merge the chunk results.
+        
+        Chunk boundaries and random streams depend only on the configuration
+        and n_simulations, never on the number of workers.
+        
+        Args:
+            simulation_type: Type of simulation
+            model: Path model (key of PATH_MODELS)
+            model_args: Model arguments preceding time_horizon
+            initial_value: Value of every path at step 0
+            time_horizon: Number of time steps
+            n_simulations: Number of simulations
+            keep_paths: Keep the paths and per-path values (defaults to config['keep_paths'])
             
-            return scenarios
+        Returns:
+            Simulation results
+        """
+        if keep_paths is None:
+            keep_paths = self.config['keep_paths']
+        
+        chunk_size = max(1, int(self.config['chunk_size']))
+        sizes = [min(chunk_size, n_simulations - start) for start in range(0, n_simulations, chunk_size)]
+        seeds = self._seed_sequence.spawn(len(sizes))
+        jobs = [
+            (model, model_args, initial_value, time_horizon, size, seed, keep_paths)
+            for size, seed in zip(sizes, seeds)
+        ]
+        
+        max_workers = min(self.config['max_workers'] or os.cpu_count() or 1, len(jobs))
+        if max_workers <= 1:
+            return self._calculate_simulation_results(
+                (self._simulate_chunk(*job) for job in jobs),
+                initial_value, simulation_type, time_horizon, n_simulations
+            )
+        
+        logger.info(f"Simulating {len(jobs)} chunks on {max_workers} workers")
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(self.config,)) as pool:
+            return self._calculate_simulation_results(
+                pool.map(_run_chunk, jobs), initial_value, simulation_type, time_horizon, n_simulations
+            )
+    
+    def _simulate_chunk(self, model: str, model_args: Tuple, initial_value: float, time_horizon: int,
+                        n_simulations: int, seed: np.random.SeedSequence, keep_paths: bool) -> PathChunk:
+        """
+        Simulate one chunk of paths and summarize it.
+        
+        Args:
+            model: Path model (key of PATH_MODELS)
+            model_args: Model arguments preceding time_horizon
+            initial_value: Value of every path at step 0
+            time_horizon: Number of time steps
+            n_simulations: Number of paths in the chunk
+            seed: Seed of the chunk's random stream
+            keep_paths: Keep the paths and per-path values
             
-        except Exception as e:
-            logger.error(f"GARCH simulation failed: {e}")
-            return pd.DataFrame()
+        Returns:
+            Chunk summary, plus the per-path outputs with keep_paths
+        """
+        kernel = getattr(self, self.PATH_MODELS[model])
+        blocks = kernel(*model_args, time_horizon, n_simulations, np.random.default_rng(seed))
+        
+        paths = None
+        if keep_paths:
+            paths = np.empty((n_simulations, time_horizon + 1), dtype=self.dtype)
+            paths[:, 0] = initial_value
+        
+        # Running peak and maximum drawdown per path, updated block by block
+        final_values = np.full(n_simulations, initial_value, dtype=self.dtype)
+        peaks = final_values.copy()
+        max_drawdowns = np.zeros(n_simulations, dtype=self.dtype)
+        step = 1
+        
+        for block in blocks:
+            running_peaks = np.maximum.accumulate(block, axis=1)
+            np.maximum(running_peaks, peaks[:, None], out=running_peaks)
+            drawdowns = np.divide(block, running_peaks, out=running_peaks)
+            np.maximum(max_drawdowns, 1 - drawdowns.min(axis=1), out=max_drawdowns)
+            np.maximum(peaks, block.max(axis=1), out=peaks)
+            final_values[:] = block[:, -1]
+            
+            if paths is not None:
+                paths[:, step:step + block.shape[1]] = block
+            step += block.shape[1]
+        
+        returns = (final_values - initial_value) / initial_value
+        summary = PathSummary.from_values(returns, max_drawdowns, self.config['sketch_relative_accuracy'])
+        if not keep_paths:
+            return PathChunk(summary)
+        return PathChunk(summary, paths, final_values, max_drawdowns)
     
-    def _calculate_simulation_results(self, scenarios: pd.DataFrame, simulation_type: SimulationType,
-                                    time_horizon: int, n_simulations: int) -> SimulationResult:
-        """Calculate simulation results and statistics."""
+    def _calculate_simulation_results(self, chunks: Iterable[PathChunk], initial_value: float,
+                                    simulation_type: SimulationType, time_horizon: int,
+                                    n_simulations: int) -> SimulationResult:
+        """
+        Calculate simulation results and statistics.
+        
+        Quantiles are exact when the chunks kept their per-path values and
+        estimated from the merged sketches otherwise.
+        
+        Args:
+            chunks: Simulated chunks, in chunk order
+            initial_value: Value of every path at step 0
+            simulation_type: Type of simulation
+            time_horizon: Number of time steps
+            n_simulations: Number of simulations
+            
+        Returns:
+            Simulation results
+        """
         try:
-            if scenarios.empty:
+            summary = None
+            kept_chunks = []
+            for chunk in chunks:
+                summary = chunk.summary if summary is None else summary.merge(chunk.summary)
+                if chunk.final_values is not None:
+                    kept_chunks.append(chunk)
+            
+            if summary is None or not summary.return_moments.count or time_horizon < 1:
                 return self._create_empty_result(simulation_type)
             
-            # Extract final values
-            final_values = scenarios.iloc[:, -2].values  # Second to last column (before simulation ID)
-            
-            # Calculate returns
-            if simulation_type == SimulationType.PRICE_SIMULATION:
-                initial_value = scenarios.iloc[0, 0]
-                expected_returns = (final_values - initial_value) / initial_value
-            else:
-                initial_value = scenarios.iloc[0, 0]
+            confidence_levels = self.config['confidence_levels']
+            paths = None
+            if kept_chunks:
+                final_values = np.concatenate([chunk.final_values for chunk in kept_chunks])
+                max_drawdowns = np.concatenate([chunk.max_drawdowns for chunk in kept_chunks])
+                if len(kept_chunks) > 1:
+                    paths = np.concatenate([chunk.paths for chunk in kept_chunks])
+                else:
+                    paths = kept_chunks[0].paths
                 expected_returns = (final_values - initial_value) / initial_value
-            
-            # Calculate VaR and CVaR
-            var_results = self.calculate_var(expected_returns.tolist())
-            cvar_results = self.calculate_cvar(expected_returns.tolist())
-            
-            # Calculate max drawdowns
-            max_drawdowns = []
-            for i in range(n_simulations):
-                path = scenarios.iloc[i, :-1].values  # Exclude simulation ID
-                peak = path[0]
-                max_dd = 0
-                
-                for value in path:
-                    if value > peak:
-                        peak = value
-                    drawdown = (peak - value) / peak
-                    max_dd = max(max_dd, drawdown)
                 
-                max_drawdowns.append(max_dd)
+                # Calculate VaR and CVaR
+                var_results = self.calculate_var(expected_returns)
+                cvar_results = self.calculate_cvar(expected_returns)
+                median_return = float(np.median(expected_returns))
+                drawdown_quantiles = {level: float(np.percentile(max_drawdowns, level * 100)) for level in confidence_levels}
+            else:
+                var_results = {level: summary.returns.quantile(1 - level) for level in confidence_levels}
+                cvar_results = {level: summary.returns.tail_mean(1 - level) for level in confidence_levels}
+                median_return = summary.returns.quantile(0.5)
+                drawdown_quantiles = {level: summary.max_drawdowns.quantile(level) for level in confidence_levels}
             
             # Calculate statistics
+            returns, drawdowns = summary.return_moments, summary.max_drawdown_moments
             statistics = {
-                'mean_return': np.mean(expected_returns),
-                'std_return': np.std(expected_returns),
-                'min_return': np.min(expected_returns),
-                'max_return': np.max(expected_returns),
-                'median_return': np.median(expected_returns),
-                'mean_final_value': np.mean(final_values),
-                'std_final_value': np.std(final_values),
-                'mean_max_drawdown': np.mean(max_drawdowns),
-                'max_max_drawdown': np.max(max_drawdowns)
+                'mean_return': returns.mean,
+                'std_return': returns.std,
+                'min_return': returns.min,
+                'max_return': returns.max,
+                'median_return': median_return,
+                'mean_final_value': initial_value * (1 + returns.mean),
+                'std_final_value': abs(initial_value) * returns.std,
+                'mean_max_drawdown': drawdowns.mean,
+                'max_max_drawdown': drawdowns.max
             }
+            for level, drawdown in drawdown_quantiles.items():
+                statistics[f'max_drawdown_p{level * 100:g}'] = drawdown
             
             return SimulationResult(
                 simulation_type=simulation_type,
                 n_simulations=n_simulations,
                 time_horizon=time_horizon,
-                confidence_levels=self.config['confidence_levels'],
+                confidence_levels=confidence_levels,
                 var_results=var_results,
                 cvar_results=cvar_results,
-                expected_returns=expected_returns.tolist(),
-                final_values=final_values.tolist(),
-                max_drawdowns=max_drawdowns,
+                expected_returns=expected_returns.tolist() if kept_chunks else [],
+                final_values=final_values.tolist() if kept_chunks else [],
+                max_drawdowns=max_drawdowns.tolist() if kept_chunks else [],
                 statistics=statistics,
-                scenarios=scenarios
+                scenarios=pd.DataFrame(paths, copy=False) if paths is not None else None
             )
             
         except Exception as e:
@@ -546,25 +922,10 @@ class MonteCarloSimulator:
             # Simplified stress test simulation
             n_simulations = 1000
             time_horizon = 30  # 30 days
-            
-            # Generate stressed returns
-            stressed_returns = np.random.normal(
-                scenario.market_shock / 252,  # Daily stressed return
-                scenario.volatility_multiplier * 0.02,  # Stressed volatility
-                (n_simulations, time_horizon)
-            )
-            
-            # Calculate portfolio values
             initial_value = 100000
-            portfolio_values = initial_value * np.cumprod(1 + stressed_returns, axis=1)
-            
-            # Create scenarios DataFrame
-            scenarios = pd.DataFrame(portfolio_values)
-            scenarios.columns = [f'day_{i}' for i in range(time_horizon)]
-            scenarios['simulation'] = range(n_simulations)
             
-            # Calculate results
-            result = self._calculate_simulation_results(scenarios, SimulationType.STRESS_TEST, time_horizon, n_simulations)
+            result = self._run_simulation(SimulationType.STRESS_TEST, 'stress', (scenario, initial_value),
+                                          initial_value, time_horizon, n_simulations)
             
             return result
             
@@ -0,0 +1,237 @@
+"""
+Mergeable Streaming Statistics for Monte Carlo Simulation
+
+This module provides summaries that can be built independently for blocks of
+simulated paths and merged afterwards, so simulation size is not bounded by
+memory:
+
+- RunningMoments: count, mean, variance, min and max (parallel Welford merge)
+- QuantileSketch: log-bucketed quantile sketch with bounded relative error,
+  used for VaR, expected shortfall and drawdown quantiles
+
+Both merges are deterministic: merging the same blocks in the same order
+always gives bit-identical results.
+"""
+
+import math
+import numpy as np
+from typing import Tuple, Iterable
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class RunningMoments:
+    """
+    Count, mean, variance and range of a stream of values.
+    """
+
+    def __init__(self):
+        """Initialize empty moments."""
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # sum of squared deviations from the mean
+        self.min = math.inf
+        self.max = -math.inf
+
+    @classmethod
+    def from_values(cls, values: Iterable[float]) -> 'RunningMoments':
+        """Moments of a batch of values."""
+        moments = cls()
+        moments.update(values)
+        return moments
+
+    @property
+    def variance(self) -> float:
+        """Population variance."""
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self) -> float:
+        """Population standard deviation."""
+        return math.sqrt(self.variance)
+
+    def update(self, values: Iterable[float]) -> None:
+        """Add a batch of values."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if not len(values):
+            return
+
+        batch = RunningMoments()
+        batch.count = len(values)
+        batch.mean = float(values.mean())
+        batch.m2 = float(np.square(values - batch.mean).sum())
+        batch.min = float(values.min())
+        batch.max = float(values.max())
+        self.merge(batch)
+
+    def merge(self, other: 'RunningMoments') -> 'RunningMoments':
+        """
+        Fold another set of moments into this one.
+
+        Args:
+            other: Moments of a disjoint batch of values
+
+        Returns:
+            self
+        """
+        if not other.count:
+            return self
+        if not self.count:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return self
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+
+class QuantileSketch:
+    """
+    Quantile sketch with relative-error guarantees.
+
+    Values are counted in logarithmically spaced buckets (separately for
+    positive and negative values), so every quantile is returned within
+    `relative_accuracy` of a value of the exact rank. Memory depends on the
+    value range, not on the number of values.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.001, min_value: float = 1e-9):
+        """
+        Initialize an empty sketch.
+
+        Args:
+            relative_accuracy: Relative error bound of returned quantiles
+            min_value: Magnitude below which values are counted as zero
+        """
+        if not 0 < relative_accuracy < 1:
+            raise ValueError(f"relative_accuracy must be in (0, 1), got {relative_accuracy}")
+
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.count = 0
+        self.zero_count = 0
+        self._positive: Tuple[int, np.ndarray] = (0, np.zeros(0, dtype=np.int64))  # (first key, counts)
+        self._negative: Tuple[int, np.ndarray] = (0, np.zeros(0, dtype=np.int64))
+
+    def add(self, values: Iterable[float]) -> None:
+        """Add a batch of values."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        positive = values[values > self.min_value]
+        negative = -values[values < -self.min_value]
+
+        self._positive = _merge_buckets(self._positive, self._bucketize(positive))
+        self._negative = _merge_buckets(self._negative, self._bucketize(negative))
+        self.zero_count += len(values) - len(positive) - len(negative)
+        self.count += len(values)
+
+    def merge(self, other: 'QuantileSketch') -> 'QuantileSketch':
+        """
+        Fold another sketch into this one.
+
+        Args:
+            other: Sketch built with the same relative accuracy
+
+        Returns:
+            self
+        """
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+
+        self._positive = _merge_buckets(self._positive, other._positive)
+        self._negative = _merge_buckets(self._negative, other._negative)
+        self.zero_count += other.zero_count
+        self.count += other.count
+        return self
+
+    def quantile(self, q: float) -> float:
+        """
+        Approximate q-quantile (0 <= q <= 1).
+
+        Args:
+            q: Quantile to estimate
+
+        Returns:
+            Estimated quantile, or NaN for an empty sketch
+        """
+        if not self.count:
+            return float('nan')
+
+        values, counts = self._ordered_buckets()
+        rank = q * (self.count - 1)
+        position = int(np.searchsorted(np.cumsum(counts), rank, side='right'))
+        return float(values[min(position, len(values) - 1)])
+
+    def tail_mean(self, q: float) -> float:
+        """
+        Approximate mean of the lowest q fraction of values (expected shortfall).
+
+        Args:
+            q: Tail fraction (0 < q <= 1)
+
+        Returns:
+            Estimated tail mean, or NaN for an empty sketch
+        """
+        if not self.count:
+            return float('nan')
+
+        values, counts = self._ordered_buckets()
+        tail = max(1.0, q * self.count)
+        cumulative = np.cumsum(counts)
+        full = int(np.searchsorted(cumulative, tail, side='right'))  # buckets entirely inside the tail
+
+        total = float(np.dot(values[:full], counts[:full]))
+        taken = float(cumulative[full - 1]) if full else 0.0
+        if full < len(values) and taken < tail:
+            total += (tail - taken) * values[full]
+        return total / tail
+
+    def _bucketize(self, magnitudes: np.ndarray) -> Tuple[int, np.ndarray]:
+        """Bucket counts of positive magnitudes."""
+        if not len(magnitudes):
+            return 0, np.zeros(0, dtype=np.int64)
+
+        keys = np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64)
+        offset = int(keys.min())
+        return offset, np.bincount(keys - offset).astype(np.int64)
+
+    def _bucket_values(self, offset: int, length: int) -> np.ndarray:
+        """Representative magnitude of each bucket."""
+        keys = np.arange(offset, offset + length, dtype=np.float64)
+        return 2 * np.exp(keys * self._log_gamma) / (self.gamma + 1)
+
+    def _ordered_buckets(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Bucket values and counts in ascending value order."""
+        negative_offset, negative_counts = self._negative
+        positive_offset, positive_counts = self._positive
+        values = np.concatenate([
+            -self._bucket_values(negative_offset, len(negative_counts))[::-1],
+            [0.0],
+            self._bucket_values(positive_offset, len(positive_counts))
+        ])
+        counts = np.concatenate([negative_counts[::-1], [self.zero_count], positive_counts])
+        return values, counts
+
+
+def _merge_buckets(a: Tuple[int, np.ndarray], b: Tuple[int, np.ndarray]) -> Tuple[int, np.ndarray]:
+    """Add two (first key, counts) bucket arrays."""
+    if not len(b[1]):
+        return a
+    if not len(a[1]):
+        return b
+
+    low = min(a[0], b[0])
+    high = max(a[0] + len(a[1]), b[0] + len(b[1]))
+    counts = np.zeros(high - low, dtype=np.int64)
+    for offset, bucket_counts in (a, b):
+        counts[offset - low:offset - low + len(bucket_counts)] += bucket_counts
+    return low, counts
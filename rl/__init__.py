@@ -9,12 +9,15 @@ This module provides the infrastructure for:
 """
 
 from .market_environment import MarketEnvironment
+from .vector_environment import VectorMarketEnvironment, ShardedVectorMarketEnvironment
 from .reward_functions import RewardFunction
 from .experience_replay import ExperienceReplay
 from .training_utils import TrainingUtils
 
 __all__ = [
     'MarketEnvironment',
+    'VectorMarketEnvironment',
+    'ShardedVectorMarketEnvironment',
     'RewardFunction', 
     'ExperienceReplay',
     'TrainingUtils'
@@ -3,17 +3,22 @@ Experience Replay Buffer for Reinforcement Learning
 
 This module provides experience replay functionality for training RL agents,
 including prioritized experience replay and multi-step learning.
+
+With `save_buffer` enabled the buffer arrays are memory-mapped files (see
+replay_store), so checkpoints only flush what changed and a new process can
+attach to a saved buffer without reading it.
 """
 
 import numpy as np
 from typing import Dict, Any, List, Optional, Tuple, Union
-import random
 import logging
 from dataclasses import dataclass
-from collections import deque
 import pickle
 from pathlib import Path
 
+from .sum_tree import SumTree
+from .replay_store import ReplayStore
+
 logger = logging.getLogger(__name__)
 
 
@@ -42,6 +47,33 @@ class MultiStepExperience:
     priority: float = 1.0
 
 
+@dataclass
+class NStepTargets:
+    """N-step return targets for a batch of start slots."""
+    returns: np.ndarray  # discounted reward sums over each window
+    lengths: np.ndarray  # steps in each window (shorter at episode ends and the newest experience)
+    discounts: np.ndarray  # gamma ** lengths, applied to the bootstrap value
+    bootstrap_indices: np.ndarray  # slot whose next state is bootstrapped from
+    next_states: np.ndarray  # next state after each window
+    dones: np.ndarray  # windows ending the episode (no bootstrap)
+
+
+@dataclass
+class ReplayBatch:
+    """A sampled batch as stacked arrays."""
+    states: np.ndarray
+    actions: np.ndarray
+    rewards: np.ndarray
+    next_states: np.ndarray
+    dones: np.ndarray
+    weights: np.ndarray  # importance sampling weights
+    indices: np.ndarray  # storage slots, for update_priorities
+    n_step: Optional[NStepTargets] = None  # set when multi-step learning is enabled
+    
+    def __len__(self) -> int:
+        return len(self.indices)
+
+
 class ExperienceReplay:
     """
     Experience replay buffer for RL training.
@@ -51,6 +83,11 @@ class ExperienceReplay:
     - Prioritized experience replay (PER)
     - Multi-step learning
     - Experience augmentation
+    
+    Experiences live in preallocated ring-buffer arrays (one array per field,
+    allocated on the first insert) and priorities in a sum tree, so inserts,
+    prioritized sampling and priority updates are O(log N). Indices returned
+    by sampling are storage slots and stay valid until the slot is overwritten.
     """
     
     def __init__(self, config: Optional[Dict[str, Any]] = None):
@@ -71,23 +108,38 @@ class ExperienceReplay:
             'multi_step': False,
             'n_steps': 3,
             'gamma': 0.99,
+            'precompute_n_step': False,  # maintain n-step returns as experiences are appended
             'augmentation': False,
             'noise_std': 0.01,
             'save_buffer': False,
-            'buffer_path': 'buffers/experience_replay.pkl'
+            'buffer_path': 'buffers/experience_replay',  # directory of memory-mapped arrays
+            'random_seed': None
         }
         
-        self.config = config or default_config
+        self.config = default_config
+        if config:
+            self.config.update(config)
+        
+        # Buffer path
+        self.buffer_path = Path(self.config['buffer_path'])
+        if self.buffer_path.suffix == '.pkl':
+            self.buffer_path = self.buffer_path.with_suffix('')
+        self.store = ReplayStore(self.buffer_path)
         
         # Buffer storage
-        self.buffer = deque(maxlen=self.config['buffer_size'])
-        self.priorities = deque(maxlen=self.config['buffer_size'])
+        self.capacity = self.config['buffer_size']
+        self.position = 0  # next slot to write
+        self.size = 0
+        self._unsaved_inserts = 0
+        self._allocate_storage(None)
         
         # Prioritized replay parameters
         self.alpha = self.config['alpha']
         self.beta = self.config['beta']
         self.beta_increment = self.config['beta_increment']
         self.epsilon = self.config['epsilon']
+        self.max_priority = 1.0
+        self.rng = np.random.default_rng(self.config['random_seed'])
         
         # Multi-step parameters
         self.multi_step = self.config['multi_step']
@@ -98,12 +150,11 @@ class ExperienceReplay:
         self.total_experiences = 0
         self.sampled_experiences = 0
         
-        # Buffer path
-        self.buffer_path = Path(self.config['buffer_path'])
-        self.buffer_path.parent.mkdir(parents=True, exist_ok=True)
-        
         logger.info(f"Initialized ExperienceReplay with buffer size: {self.config['buffer_size']}")
     
+    def __len__(self) -> int:
+        return self.size
+    
     def add_experience(self, 
                       state: np.ndarray,
                       action: int,
@@ -123,151 +174,215 @@ class ExperienceReplay:
             priority: Priority for prioritized replay (optional)
         """
         try:
-            # Calculate priority if not provided
-            if priority is None:
-                if self.config['prioritized_replay']:
-                    # Use TD error as priority (will be updated later)
-                    priority = max(self.priorities) if self.priorities else 1.0
-                else:
-                    priority = 1.0
-            
-            # Create experience
-            experience = Experience(
-                state=state.copy(),
-                action=action,
-                reward=reward,
-                next_state=next_state.copy(),
-                done=done,
-                priority=priority,
-                timestamp=len(self.buffer)
-            )
-            
-            # Add to buffer
-            self.buffer.append(experience)
-            
-            # Add priority for prioritized replay
-            if self.config['prioritized_replay']:
-                self.priorities.append(priority)
+            if self.states is None:
+                self._allocate_storage(np.shape(state))
             
+            # New experiences get the highest priority seen so far
+            if priority is None:
+                priority = self.max_priority if self.config['prioritized_replay'] else 1.0
+            
+            slot = self.position
+            self.states[slot] = state
+            self.actions[slot] = action
+            self.rewards[slot] = reward
+            self.next_states[slot] = next_state
+            self.dones[slot] = done
+            self.insert_ids[slot] = self.total_experiences
+            self._set_priorities(slot, priority)
+            if self.n_step_returns is not None:
+                self._extend_n_step_returns(slot, reward)
+            
+            self.position = (slot + 1) % self.capacity
+            self.size = min(self.size + 1, self.capacity)
             self.total_experiences += 1
+            self._unsaved_inserts += 1
             
         except Exception as e:
             logger.error(f"Failed to add experience: {e}")
     
-    def sample_batch(self, batch_size: Optional[int] = None) -> Tuple[List[Experience], List[float], List[int]]:
+    def sample(self, batch_size: Optional[int] = None) -> Optional[ReplayBatch]:
         """
-        Sample a batch of experiences from the replay buffer.
+        Sample a batch of experiences as stacked arrays.
         
         Args:
             batch_size: Size of batch to sample (optional)
             
         Returns:
-            Tuple of (experiences, importance_weights, indices)
+            Sampled batch, or None if the buffer is empty
         """
         try:
-            if len(self.buffer) == 0:
-                return [], [], []
+            if self.size == 0:
+                return None
             
             batch_size = batch_size or self.config['batch_size']
-            batch_size = min(batch_size, len(self.buffer))
+            batch_size = min(batch_size, self.size)
             
             if self.config['prioritized_replay']:
-                return self._sample_prioritized_batch(batch_size)
+                indices, weights = self._sample_prioritized_indices(batch_size)
             else:
-                return self._sample_uniform_batch(batch_size)
-                
-        except Exception as e:
-            logger.error(f"Failed to sample batch: {e}")
-            return [], [], []
-    
-    def _sample_uniform_batch(self, batch_size: int) -> Tuple[List[Experience], List[float], List[int]]:
-        """Sample batch uniformly from buffer."""
-        try:
-            indices = random.sample(range(len(self.buffer)), batch_size)
-            experiences = [self.buffer[i] for i in indices]
-            weights = [1.0] * batch_size  # Uniform weights
+                indices, weights = self._sample_uniform_indices(batch_size)
             
             self.sampled_experiences += batch_size
             
-            return experiences, weights, indices
+            return ReplayBatch(
+                states=self.states[indices],
+                actions=self.actions[indices],
+                rewards=self.rewards[indices],
+                next_states=self.next_states[indices],
+                dones=self.dones[indices],
+                weights=weights,
+                indices=indices,
+                n_step=self.get_n_step_targets(indices) if self.multi_step else None
+            )
             
         except Exception as e:
-            logger.error(f"Uniform batch sampling failed: {e}")
-            return [], [], []
+            logger.error(f"Failed to sample batch: {e}")
+            return None
     
-    def _sample_prioritized_batch(self, batch_size: int) -> Tuple[List[Experience], List[float], List[int]]:
-        """Sample batch using prioritized experience replay."""
-        try:
-            # Calculate sampling probabilities
-            priorities = np.array(self.priorities)
-            probabilities = priorities ** self.alpha
-            probabilities = probabilities / np.sum(probabilities)
-            
-            # Sample indices based on probabilities
-            indices = np.random.choice(
-                len(self.buffer),
-                size=batch_size,
-                replace=False,
-                p=probabilities
-            )
-            
-            # Get experiences
-            experiences = [self.buffer[i] for i in indices]
-            
-            # Calculate importance sampling weights
-            weights = []
-            for i in indices:
-                weight = (len(self.buffer) * probabilities[i]) ** (-self.beta)
-                weights.append(weight)
-            
-            # Normalize weights
-            max_weight = max(weights) if weights else 1.0
-            weights = [w / max_weight for w in weights]
-            
-            # Update beta
-            self.beta = min(1.0, self.beta + self.beta_increment)
-            
-            self.sampled_experiences += batch_size
-            
-            return experiences, weights, indices.tolist()
+    def sample_batch(self, batch_size: Optional[int] = None) -> Tuple[List[Experience], List[float], List[int]]:
+        """
+        Sample a batch of experiences from the replay buffer.
+        
+        Args:
+            batch_size: Size of batch to sample (optional)
             
-        except Exception as e:
-            logger.error(f"Prioritized batch sampling failed: {e}")
+        Returns:
+            Tuple of (experiences, importance_weights, indices)
+        """
+        batch = self.sample(batch_size)
+        if batch is None:
             return [], [], []
+        
+        experiences = [self._experience_at(slot) for slot in batch.indices]
+        return experiences, batch.weights.tolist(), batch.indices.tolist()
+    
+    def _sample_uniform_indices(self, batch_size: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Sample slots uniformly without replacement."""
+        indices = self.rng.choice(self.size, size=batch_size, replace=False)
+        weights = np.ones(batch_size, dtype=np.float32)  # Uniform weights
+        return indices, weights
+    
+    def _sample_prioritized_indices(self, batch_size: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Sample slots proportionally to priority, one per equal-mass segment of the sum tree."""
+        total = self._tree.total
+        segment = total / batch_size
+        prefix_sums = (np.arange(batch_size) + self.rng.random(batch_size)) * segment
+        indices = np.minimum(self._tree.find(prefix_sums), self.size - 1)
+        
+        # Calculate importance sampling weights
+        probabilities = self._tree.get(indices) / total
+        weights = (self.size * probabilities) ** (-self.beta)
+        weights = (weights / weights.max()).astype(np.float32)
+        
+        # Update beta
+        self.beta = min(1.0, self.beta + self.beta_increment)
+        
+        return indices, weights
     
     def update_priorities(self, indices: List[int], td_errors: List[float]) -> None:
         """
         Update priorities for experiences based on TD errors.
         
         Args:
-            indices: Indices of experiences to update
+            indices: Slots of the experiences to update, as returned by sampling
             td_errors: TD errors for each experience
         """
         try:
             if not self.config['prioritized_replay']:
                 return
             
-            for idx, td_error in zip(indices, td_errors):
-                if 0 <= idx < len(self.priorities):
-                    # Update priority based on TD error
-                    priority = (abs(td_error) + self.epsilon) ** self.alpha
-                    self.priorities[idx] = priority
+            indices = np.asarray(indices, dtype=np.int64)
+            priorities = np.abs(np.asarray(td_errors, dtype=np.float64)) + self.epsilon
+            valid = (indices >= 0) & (indices < self.size)
+            if not valid.any():
+                return
+            
+            self._set_priorities(indices[valid], priorities[valid])
+            self.max_priority = max(self.max_priority, float(priorities[valid].max()))
                     
         except Exception as e:
             logger.error(f"Failed to update priorities: {e}")
     
+    def get_n_step_targets(self, indices: Union[List[int], np.ndarray]) -> NStepTargets:
+        """
+        N-step discounted returns and bootstrap targets for a batch of slots.
+        
+        Each window runs for n_steps consecutive experiences and stops early
+        after an episode ends or at the newest experience.
+        
+        Args:
+            indices: Start slots, as returned by sampling
+            
+        Returns:
+            N-step targets for every start slot
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        if self.n_step_returns is not None:
+            returns = self.n_step_returns[indices]
+            lengths = self.n_step_lengths[indices].astype(np.int64)
+        else:
+            returns, lengths = self._compute_n_step_returns(indices)
+        
+        bootstrap_indices = (indices + lengths - 1) % self.capacity
+        return NStepTargets(
+            returns=returns,
+            lengths=lengths,
+            discounts=(self.gamma ** lengths).astype(np.float32),
+            bootstrap_indices=bootstrap_indices,
+            next_states=self.next_states[bootstrap_indices],
+            dones=self.dones[bootstrap_indices]
+        )
+    
+    def _compute_n_step_returns(self, indices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Discounted returns and window lengths, computed from the stored rewards."""
+        offsets = np.arange(min(self.n_steps, self.capacity))
+        slots = (indices[:, None] + offsets) % self.capacity
+        
+        # Steps belong to the window while inserts are consecutive and no earlier step ended the episode
+        consecutive = self.insert_ids[slots] == self.insert_ids[indices][:, None] + offsets
+        dones = self.dones[slots]
+        ended_before = (np.cumsum(dones, axis=1) - dones) > 0
+        included = np.logical_and.accumulate(consecutive & ~ended_before, axis=1)
+        
+        discounts = (self.gamma ** offsets).astype(np.float32)
+        returns = (self.rewards[slots] * discounts * included).sum(axis=1, dtype=np.float32)
+        return returns, included.sum(axis=1)
+    
+    def _extend_n_step_returns(self, slot: int, reward: float) -> None:
+        """Start the window of a new experience and extend the open windows ending before it."""
+        self.n_step_returns[slot] = reward
+        self.n_step_lengths[slot] = 1
+        
+        previous = (slot - 1) % self.capacity
+        if self.size == 0 or self.dones[previous]:
+            return
+        
+        steps = np.arange(1, min(self.n_steps, self.capacity))
+        starts = (slot - steps) % self.capacity
+        open_windows = ((self.n_step_lengths[starts] == steps) &
+                        (self.insert_ids[starts] == self.insert_ids[slot] - steps))
+        starts, steps = starts[open_windows], steps[open_windows]
+        self.n_step_returns[starts] += (self.gamma ** steps) * reward
+        self.n_step_lengths[starts] += 1
+    
+    def _recompute_n_step_returns(self, chunk_size: int = 65536) -> None:
+        """Rebuild the precomputed n-step returns, e.g. after n_steps or gamma change."""
+        for start in range(0, self.size, chunk_size):
+            indices = np.arange(start, min(start + chunk_size, self.size))
+            self.n_step_returns[indices], self.n_step_lengths[indices] = self._compute_n_step_returns(indices)
+    
     def get_multi_step_experience(self, start_idx: int) -> Optional[MultiStepExperience]:
         """
         Get multi-step experience starting from given index.
         
         Args:
-            start_idx: Starting index in buffer
+            start_idx: Starting index in buffer (0 is the oldest experience)
             
         Returns:
             Multi-step experience or None
         """
         try:
-            if not self.multi_step or start_idx + self.n_steps >= len(self.buffer):
+            if not self.multi_step or start_idx + self.n_steps >= self.size:
                 return None
             
             # Collect experiences for n-steps
@@ -277,11 +392,8 @@ class ExperienceReplay:
             next_states = []
             dones = []
             
-            total_reward = 0.0
-            gamma_power = 1.0
-            
             for i in range(self.n_steps):
-                exp = self.buffer[start_idx + i]
+                exp = self._experience_at(self._slot(start_idx + i))
                 
                 states.append(exp.state)
                 actions.append(exp.action)
@@ -289,17 +401,10 @@ class ExperienceReplay:
                 next_states.append(exp.next_state)
                 dones.append(exp.done)
                 
-                # Calculate discounted reward
-                total_reward += exp.reward * gamma_power
-                gamma_power *= self.gamma
-                
                 # Stop if episode ends
                 if exp.done:
                     break
             
-            # Get final next state
-            final_next_state = self.buffer[start_idx + self.n_steps - 1].next_state
-            
             return MultiStepExperience(
                 states=states,
                 actions=actions,
@@ -315,6 +420,70 @@ class ExperienceReplay:
             logger.error(f"Failed to get multi-step experience: {e}")
             return None
     
+    def _allocate_storage(self, state_shape: Optional[Tuple[int, ...]]) -> None:
+        """
+        Preallocate the ring-buffer arrays.
+        
+        State arrays are allocated once the state shape is known; from then on
+        the arrays are memory-mapped files when the buffer is saved to disk.
+        """
+        fields = {
+            'actions': ((self.capacity,), np.dtype(np.int64)),
+            'rewards': ((self.capacity,), np.dtype(np.float32)),
+            'dones': ((self.capacity,), np.dtype(bool)),
+            'insert_ids': ((self.capacity,), np.dtype(np.int64)),  # running count at insert time
+            'priorities': ((self.capacity,), np.dtype(np.float64))
+        }
+        if self.config['precompute_n_step']:
+            fields['n_step_returns'] = ((self.capacity,), np.dtype(np.float32))
+            fields['n_step_lengths'] = ((self.capacity,), np.dtype(np.int16))
+        if state_shape is not None:
+            fields['states'] = ((self.capacity, *state_shape), np.dtype(np.float32))
+            fields['next_states'] = ((self.capacity, *state_shape), np.dtype(np.float32))
+        
+        if state_shape is not None and self.config['save_buffer']:
+            arrays = self.store.create(fields)
+        else:
+            self.store.close()
+            arrays = {name: np.zeros(shape, dtype=dtype) for name, (shape, dtype) in fields.items()}
+        self._set_storage(arrays)
+        self._tree = SumTree(self.capacity)
+        self._unsaved_inserts = 0
+    
+    def _set_storage(self, arrays: Dict[str, np.ndarray]) -> None:
+        """Use the given arrays as the ring buffer."""
+        self.states = arrays.get('states')
+        self.next_states = arrays.get('next_states')
+        self.actions = arrays['actions']
+        self.rewards = arrays['rewards']
+        self.dones = arrays['dones']
+        self.insert_ids = arrays['insert_ids']
+        self.priorities = arrays['priorities']
+        self.n_step_returns = arrays.get('n_step_returns')
+        self.n_step_lengths = arrays.get('n_step_lengths')
+    
+    def _set_priorities(self, slots: Union[int, np.ndarray], priorities: Union[float, np.ndarray]) -> None:
+        """Store raw priorities and their prioritization weights in the sum tree."""
+        self.priorities[slots] = priorities
+        self._tree.update(slots, np.asarray(priorities, dtype=np.float64) ** self.alpha)
+    
+    def _slot(self, index: int) -> int:
+        """Storage slot of the index-th oldest experience."""
+        oldest = self.position if self.size == self.capacity else 0
+        return (oldest + index) % self.capacity
+    
+    def _experience_at(self, slot: int) -> Experience:
+        """Experience stored in a slot."""
+        return Experience(
+            state=self.states[slot].copy(),
+            action=int(self.actions[slot]),
+            reward=float(self.rewards[slot]),
+            next_state=self.next_states[slot].copy(),
+            done=bool(self.dones[slot]),
+            priority=float(self.priorities[slot]),
+            timestamp=float(self.insert_ids[slot])
+        )
+    
     def augment_experience(self, experience: Experience) -> List[Experience]:
         """
         Augment experience with noise for data augmentation.
@@ -360,7 +529,7 @@ class ExperienceReplay:
     def get_buffer_stats(self) -> Dict[str, Any]:
         """Get buffer statistics."""
         try:
-            if not self.buffer:
+            if self.size == 0:
                 return {
                     'buffer_size': 0,
                     'total_experiences': 0,
@@ -371,16 +540,16 @@ class ExperienceReplay:
                     'utilization': 0.0
                 }
             
-            priorities = list(self.priorities) if self.priorities else [1.0]
+            priorities = self.priorities[:self.size]
             
             return {
-                'buffer_size': len(self.buffer),
+                'buffer_size': self.size,
                 'total_experiences': self.total_experiences,
                 'sampled_experiences': self.sampled_experiences,
-                'avg_priority': np.mean(priorities),
-                'min_priority': np.min(priorities),
-                'max_priority': np.max(priorities),
-                'utilization': len(self.buffer) / self.config['buffer_size']
+                'avg_priority': float(np.mean(priorities)),
+                'min_priority': float(np.min(priorities)),
+                'max_priority': float(np.max(priorities)),
+                'utilization': self.size / self.capacity
             }
             
         except Exception as e:
@@ -390,8 +559,11 @@ class ExperienceReplay:
     def clear_buffer(self) -> None:
         """Clear the replay buffer."""
         try:
-            self.buffer.clear()
-            self.priorities.clear()
+            state_shape = self.states.shape[1:] if self.states is not None else None
+            self._allocate_storage(state_shape)
+            self.position = 0
+            self.size = 0
+            self.max_priority = 1.0
             self.total_experiences = 0
             self.sampled_experiences = 0
             
@@ -401,23 +573,42 @@ class ExperienceReplay:
             logger.error(f"Failed to clear buffer: {e}")
     
     def save_buffer(self) -> bool:
-        """Save buffer to disk."""
+        """
+        Save buffer to disk.
+        
+        Only the ring segment written since the last save (plus the
+        priorities) is flushed to the memory-mapped files.
+        """
         try:
-            if not self.config['save_buffer']:
+            if not self.config['save_buffer'] or self.states is None:
                 return False
             
-            buffer_data = {
-                'buffer': list(self.buffer),
-                'priorities': list(self.priorities),
+            # Slots written since the last save, as at most two ranges of the ring
+            unsaved = min(self._unsaved_inserts, self.capacity)
+            start = self.position - unsaved
+            if unsaved == self.capacity:
+                segments = ((0, self.capacity),)
+            elif start >= 0:
+                segments = ((start, self.position),)
+            else:
+                segments = ((start + self.capacity, self.capacity), (0, self.position))
+            
+            meta = {
+                'capacity': self.capacity,
+                'state_shape': list(self.states.shape[1:]),
+                'position': self.position,
+                'size': self.size,
+                'max_priority': self.max_priority,
+                'beta': self.beta,
+                'n_step': [self.n_steps, self.gamma] if self.n_step_returns is not None else None,
                 'total_experiences': self.total_experiences,
-                'sampled_experiences': self.sampled_experiences,
-                'config': self.config
+                'sampled_experiences': self.sampled_experiences
             }
+            # Priorities and n-step windows also change outside the new segment
+            self.store.flush(segments, meta, full_fields=('priorities', 'n_step_returns', 'n_step_lengths'))
+            self._unsaved_inserts = 0
             
-            with open(self.buffer_path, 'wb') as f:
-                pickle.dump(buffer_data, f)
-            
-            logger.info(f"Buffer saved to {self.buffer_path}")
+            logger.info(f"Buffer saved to {self.buffer_path} ({unsaved} new experiences)")
             return True
             
         except Exception as e:
@@ -425,45 +616,83 @@ class ExperienceReplay:
             return False
     
     def load_buffer(self) -> bool:
-        """Load buffer from disk."""
+        """
+        Load buffer from disk.
+        
+        Saved buffers are attached by mapping their files, without reading
+        them. Unless `save_buffer` is enabled, changes stay in memory and never
+        reach the files.
+        """
         try:
-            if not self.buffer_path.exists():
-                logger.info(f"No saved buffer found at {self.buffer_path}")
-                return False
+            if self.store.exists():
+                arrays, meta = self.store.attach(writable=self.config['save_buffer'])
+                if meta['capacity'] != self.capacity:
+                    logger.warning(f"Saved buffer capacity {meta['capacity']} overrides buffer_size {self.capacity}")
+                    self.capacity = meta['capacity']
+                
+                self._set_storage(arrays)
+                self.position = meta['position']
+                self.size = meta['size']
+                self.max_priority = meta['max_priority']
+                self.beta = meta['beta']
+                self.total_experiences = meta['total_experiences']
+                self.sampled_experiences = meta['sampled_experiences']
+                self._unsaved_inserts = 0
+                
+                self._tree = SumTree(self.capacity)
+                if self.size:
+                    self._tree.update(np.arange(self.size), self.priorities[:self.size] ** self.alpha)
+                if self.n_step_returns is not None and meta.get('n_step') != [self.n_steps, self.gamma]:
+                    self._recompute_n_step_returns()
             
-            with open(self.buffer_path, 'rb') as f:
-                buffer_data = pickle.load(f)
+            elif self.buffer_path.with_suffix('.pkl').exists():
+                self._load_pickled_buffer(self.buffer_path.with_suffix('.pkl'))
             
-            self.buffer = deque(buffer_data['buffer'], maxlen=self.config['buffer_size'])
-            self.priorities = deque(buffer_data['priorities'], maxlen=self.config['buffer_size'])
-            self.total_experiences = buffer_data['total_experiences']
-            self.sampled_experiences = buffer_data['sampled_experiences']
+            else:
+                logger.info(f"No saved buffer found at {self.buffer_path}")
+                return False
             
-            logger.info(f"Buffer loaded from {self.buffer_path}")
+            logger.info(f"Buffer loaded from {self.buffer_path} ({self.size} experiences)")
             return True
             
         except Exception as e:
             logger.error(f"Failed to load buffer: {e}")
             return False
     
+    def _load_pickled_buffer(self, path: Path) -> None:
+        """Load a buffer pickled as a list of experiences by earlier versions."""
+        with open(path, 'rb') as f:
+            buffer_data = pickle.load(f)
+        
+        experiences = buffer_data['buffer'][-self.capacity:]
+        priorities = list(buffer_data['priorities'])[-self.capacity:] or [1.0] * len(experiences)
+        self.clear_buffer()
+        for experience, priority in zip(experiences, priorities):
+            self.add_experience(experience.state, experience.action, experience.reward,
+                                experience.next_state, experience.done, priority)
+        
+        self.max_priority = max(priorities, default=1.0)
+        self.total_experiences = buffer_data['total_experiences']
+        self.sampled_experiences = buffer_data['sampled_experiences']
+    
     def get_recent_experiences(self, n: int = 100) -> List[Experience]:
         """Get the most recent n experiences."""
         try:
-            if len(self.buffer) == 0:
+            if self.size == 0:
                 return []
             
-            n = min(n, len(self.buffer))
-            return list(self.buffer)[-n:]
+            n = min(n, self.size)
+            return [self._experience_at(self._slot(i)) for i in range(self.size - n, self.size)]
             
         except Exception as e:
             logger.error(f"Failed to get recent experiences: {e}")
             return []
     
     def get_experience_by_index(self, index: int) -> Optional[Experience]:
-        """Get experience by index."""
+        """Get experience by index (0 is the oldest experience)."""
         try:
-            if 0 <= index < len(self.buffer):
-                return self.buffer[index]
+            if 0 <= index < self.size:
+                return self._experience_at(self._slot(index))
             return None
             
         except Exception as e:
@@ -484,6 +713,12 @@ class ExperienceReplay:
             self.n_steps = self.config['n_steps']
             self.gamma = self.config['gamma']
             
+            # Reweight the sum tree for a new prioritization exponent
+            if self.size:
+                self._set_priorities(np.arange(self.size), self.priorities[:self.size])
+                if self.n_step_returns is not None:
+                    self._recompute_n_step_returns()
+            
             logger.info(f"Configuration updated: {new_config}")
             
         except Exception as e:
@@ -0,0 +1,344 @@
+"""
+Incremental Technical Indicators for the Market Environments
+
+This module keeps the indicators of the RL market environments up to date one
+price at a time. Every update is O(1): rolling windows keep running sums over
+fixed NumPy ring buffers and EMAs are updated recursively, so no price
+history is rescanned per step. The Batch* classes do the same for many
+independent streams at once, one NumPy call per step.
+
+The values match the pandas formulas the environment used before (rolling
+means, sample standard deviations, `ewm(span=...).mean()` with adjust=True).
+The scalar building blocks come from the shared indicator engine.
+"""
+
+import math
+import numpy as np
+from typing import Dict
+import logging
+
+from services.indicator_engine import RingBuffer, RollingWindow, ExponentialMean
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalIndicators:
+    """
+    SMA, EMA/MACD, RSI, Bollinger Bands, volatility and momentum of a price stream.
+    """
+
+    MIN_PRICES = 20  # indicators are reported once this many prices were seen
+
+    def __init__(self, history_length: int = 1000, rsi_period: int = 14, bollinger_period: int = 20,
+                 momentum_period: int = 10):
+        """
+        Initialize the indicators.
+
+        Args:
+            history_length: Prices covered by the volatility estimate
+            rsi_period: RSI window
+            bollinger_period: Bollinger Band (and long SMA) window
+            momentum_period: Momentum lookback
+        """
+        self.rsi_period = rsi_period
+        self.momentum_period = momentum_period
+        self._prices = RingBuffer(max(momentum_period, 2))
+        self._sma_5 = RollingWindow(5)
+        self._sma_long = RollingWindow(bollinger_period)
+        self._gains = RollingWindow(rsi_period)
+        self._losses = RollingWindow(rsi_period)
+        self._ema_12 = ExponentialMean(12)
+        self._ema_26 = ExponentialMean(26)
+        self._returns = RollingWindow(max(history_length - 1, 2))
+        self.count = 0
+
+    def update(self, price: float) -> None:
+        """Add the next price."""
+        if self.count:
+            previous = self._prices.last()
+            delta = price - previous
+            self._gains.update(delta if delta > 0 else 0.0)
+            self._losses.update(-delta if delta < 0 else 0.0)
+            self._returns.update(delta / previous)
+
+        self._prices.append(price)
+        self._sma_5.update(price)
+        self._sma_long.update(price)
+        self._ema_12.update(price)
+        self._ema_26.update(price)
+        self.count += 1
+
+    def clear(self) -> None:
+        """Forget all prices."""
+        for component in (self._prices, self._sma_5, self._sma_long, self._gains, self._losses,
+                          self._ema_12, self._ema_26, self._returns):
+            component.clear()
+        self.count = 0
+
+    @property
+    def price(self) -> float:
+        return self._prices.last()
+
+    @property
+    def sma_5(self) -> float:
+        return self._sma_5.mean
+
+    @property
+    def sma_20(self) -> float:
+        return self._sma_long.mean
+
+    @property
+    def rsi(self) -> float:
+        """Simple-average RSI; 50 until enough prices were seen."""
+        if self.count < self.rsi_period + 1:
+            return 50.0
+        gain, loss = self._gains.mean, self._losses.mean
+        if loss == 0:
+            return 100.0 if gain > 0 else 50.0
+        return 100.0 - 100.0 / (1.0 + gain / loss)
+
+    @property
+    def macd(self) -> float:
+        if self.count < 26:
+            return 0.0
+        return self._ema_12.value - self._ema_26.value
+
+    @property
+    def bollinger_std(self) -> float:
+        std = self._sma_long.std
+        return 0.0 if math.isnan(std) else std
+
+    @property
+    def volatility(self) -> float:
+        std = self._returns.std
+        return 0.0 if math.isnan(std) else std
+
+    @property
+    def momentum(self) -> float:
+        if self.count < self.momentum_period:
+            return 0.0
+        past = self._prices.last(self.momentum_period)
+        return (self.price - past) / past
+
+    def as_dict(self) -> Dict[str, float]:
+        """Indicator values keyed by name; empty until MIN_PRICES prices were seen."""
+        if self.count < self.MIN_PRICES:
+            return {}
+
+        band = 2 * self.bollinger_std
+        return {
+            'sma_5': self.sma_5,
+            'sma_20': self.sma_20,
+            'rsi': self.rsi,
+            'macd': self.macd,
+            'bb_upper': self.sma_20 + band,
+            'bb_lower': self.sma_20 - band,
+            'volatility': self.volatility,
+            'momentum': self.momentum
+        }
+
+
+class BatchRollingWindow:
+    """
+    RollingWindow over a batch of independent streams that advance together.
+
+    Values are kept as a (window, n_streams) ring; the ring position is shared
+    and each stream has its own fill count, so single streams can be reloaded
+    (e.g. on an environment reset) without touching the others.
+    """
+
+    def __init__(self, n_streams: int, window: int):
+        """
+        Initialize empty windows.
+
+        Args:
+            n_streams: Number of streams
+            window: Number of values in each window
+        """
+        self.window = window
+        self._values = np.zeros((window, n_streams), dtype=np.float64)
+        self._next = 0
+        self.count = np.zeros(n_streams, dtype=np.int64)
+        self._sum = np.zeros(n_streams, dtype=np.float64)
+        self._sum_sq = np.zeros(n_streams, dtype=np.float64)
+
+    @property
+    def mean(self) -> np.ndarray:
+        return np.divide(self._sum, self.count, out=np.zeros_like(self._sum), where=self.count > 0)
+
+    @property
+    def std(self) -> np.ndarray:
+        """Sample standard deviation (ddof=1); NaN for streams with fewer than two values."""
+        n = self.count
+        variance = np.full_like(self._sum, np.nan)
+        valid = n >= 2
+        variance[valid] = (self._sum_sq[valid] - self._sum[valid] ** 2 / n[valid]) / (n[valid] - 1)
+        return np.sqrt(np.maximum(variance, 0.0, where=valid, out=variance))
+
+    def last(self, n: int = 1) -> np.ndarray:
+        """The n-th most recent value of each stream (1 is the newest)."""
+        return self._values[(self._next - n) % self.window]
+
+    def update(self, values: np.ndarray) -> None:
+        """Add one value per stream, dropping the oldest of full windows."""
+        row = self._values[self._next]
+        self._sum += values - row  # slots not yet filled hold zeros
+        self._sum_sq += values * values - row * row
+        row[:] = values
+        self._next = (self._next + 1) % self.window
+        np.minimum(self.count + 1, self.window, out=self.count)
+
+    def load(self, streams: np.ndarray, history: np.ndarray) -> None:
+        """
+        Replace the contents of some streams.
+
+        Args:
+            streams: Stream indices
+            history: (length, len(streams)) values, oldest first
+        """
+        recent = history[max(len(history) - self.window, 0):]
+        slots = (self._next - len(recent) + np.arange(len(recent))) % self.window
+        self._values[:, streams] = 0.0
+        self._values[np.ix_(slots, streams)] = recent
+        self._sum[streams] = recent.sum(axis=0)
+        self._sum_sq[streams] = np.square(recent).sum(axis=0)
+        self.count[streams] = len(recent)
+
+
+class BatchExponentialMean:
+    """
+    ExponentialMean over a batch of streams.
+    """
+
+    def __init__(self, n_streams: int, span: int):
+        """
+        Initialize empty means.
+
+        Args:
+            n_streams: Number of streams
+            span: EWM span
+        """
+        self.decay = 1.0 - 2.0 / (span + 1.0)
+        self._weighted_sum = np.zeros(n_streams, dtype=np.float64)
+        self._weight = np.zeros(n_streams, dtype=np.float64)
+
+    @property
+    def value(self) -> np.ndarray:
+        return np.divide(self._weighted_sum, self._weight, out=np.full_like(self._weight, np.nan),
+                         where=self._weight > 0)
+
+    def update(self, values: np.ndarray) -> None:
+        """Add one value per stream."""
+        self._weighted_sum *= self.decay
+        self._weighted_sum += values
+        self._weight *= self.decay
+        self._weight += 1.0
+
+    def load(self, streams: np.ndarray, history: np.ndarray) -> None:
+        """Replace the contents of some streams with (length, len(streams)) values, oldest first."""
+        weights = self.decay ** np.arange(len(history) - 1, -1, -1, dtype=np.float64)
+        self._weighted_sum[streams] = weights @ history
+        self._weight[streams] = weights.sum()
+
+
+class BatchIndicators:
+    """
+    IncrementalIndicators for a batch of price streams, updated in one NumPy call per step.
+    """
+
+    MIN_PRICES = IncrementalIndicators.MIN_PRICES
+
+    def __init__(self, n_streams: int, history_length: int = 1000, rsi_period: int = 14,
+                 bollinger_period: int = 20, momentum_period: int = 10):
+        """
+        Initialize the indicators.
+
+        Args:
+            n_streams: Number of price streams
+            history_length: Prices covered by the volatility estimate
+            rsi_period: RSI window
+            bollinger_period: Bollinger Band (and long SMA) window
+            momentum_period: Momentum lookback
+        """
+        self.rsi_period = rsi_period
+        self.momentum_period = momentum_period
+        self._prices = BatchRollingWindow(n_streams, max(momentum_period, 2))
+        self._sma_5 = BatchRollingWindow(n_streams, 5)
+        self._sma_long = BatchRollingWindow(n_streams, bollinger_period)
+        self._gains = BatchRollingWindow(n_streams, rsi_period)
+        self._losses = BatchRollingWindow(n_streams, rsi_period)
+        self._ema_12 = BatchExponentialMean(n_streams, 12)
+        self._ema_26 = BatchExponentialMean(n_streams, 26)
+        self._returns = BatchRollingWindow(n_streams, max(history_length - 1, 2))
+        self.count = np.zeros(n_streams, dtype=np.int64)
+
+    def update(self, prices: np.ndarray) -> None:
+        """Add the next price of every stream (all streams must have been loaded)."""
+        previous = self._prices.last()
+        delta = prices - previous
+        self._gains.update(np.maximum(delta, 0.0))
+        self._losses.update(np.maximum(-delta, 0.0))
+        self._returns.update(delta / previous)
+
+        self._prices.update(prices)
+        self._sma_5.update(prices)
+        self._sma_long.update(prices)
+        self._ema_12.update(prices)
+        self._ema_26.update(prices)
+        self.count += 1
+
+    def load(self, streams: np.ndarray, history: np.ndarray) -> None:
+        """
+        Restart some streams from a price history.
+
+        Args:
+            streams: Stream indices
+            history: (length, len(streams)) prices, oldest first; length >= 2
+        """
+        deltas = np.diff(history, axis=0)
+        for window in (self._prices, self._sma_5, self._sma_long, self._ema_12, self._ema_26):
+            window.load(streams, history)
+        self._gains.load(streams, np.maximum(deltas, 0.0))
+        self._losses.load(streams, np.maximum(-deltas, 0.0))
+        self._returns.load(streams, deltas / history[:-1])
+        self.count[streams] = len(history)
+
+    @property
+    def price(self) -> np.ndarray:
+        return self._prices.last()
+
+    @property
+    def sma_5(self) -> np.ndarray:
+        return self._sma_5.mean
+
+    @property
+    def sma_20(self) -> np.ndarray:
+        return self._sma_long.mean
+
+    @property
+    def rsi(self) -> np.ndarray:
+        gain, loss = self._gains.mean, self._losses.mean
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = 100.0 - 100.0 / (1.0 + gain / loss)
+        rsi[loss == 0] = np.where(gain[loss == 0] > 0, 100.0, 50.0)
+        rsi[self.count < self.rsi_period + 1] = 50.0
+        return rsi
+
+    @property
+    def macd(self) -> np.ndarray:
+        return np.where(self.count >= 26, self._ema_12.value - self._ema_26.value, 0.0)
+
+    @property
+    def bollinger_std(self) -> np.ndarray:
+        return np.nan_to_num(self._sma_long.std)
+
+    @property
+    def volatility(self) -> np.ndarray:
+        return np.nan_to_num(self._returns.std)
+
+    @property
+    def momentum(self) -> np.ndarray:
+        past = self._prices.last(self.momentum_period)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            momentum = (self.price - past) / past
+        return np.where(self.count >= self.momentum_period, momentum, 0.0)
@@ -8,12 +8,14 @@ with realistic market dynamics, transaction costs, and risk management.
 import pandas as pd
 import numpy as np
 from typing import Dict, Any, List, Tuple, Optional, Union
-from datetime import datetime, timedelta
+from datetime import datetime
 import logging
 from dataclasses import dataclass
 from enum import Enum
 import random
 
+from .incremental_indicators import IncrementalIndicators
+
 logger = logging.getLogger(__name__)
 
 
@@ -26,6 +28,25 @@ class MarketState(Enum):
     TRENDING = "trending"
 
 
+MARKET_STATES = list(MarketState)
+
+# Features of the compact observation vector, in order
+OBSERVATION_FEATURES = [
+    'log_return',         # log return of the last price move
+    'sma_5_gap',          # sma_5 / price - 1
+    'sma_20_gap',         # sma_20 / price - 1
+    'rsi',                # RSI scaled to [0, 1]
+    'macd',               # MACD relative to price
+    'bb_position',        # (price - sma_20) / (2 * std_20), Bollinger position
+    'volatility',         # std of returns over the price history
+    'momentum',           # 10-step price momentum
+    'position_weight',    # position value / portfolio value
+    'cash_weight',        # cash / portfolio value
+    'unrealized_return',  # price / entry price - 1 of the open position
+    'episode_progress'    # current step / episode length
+]
+
+
 @dataclass
 class Position:
     """Represents a trading position."""
@@ -59,10 +80,11 @@ class EnvironmentState:
     portfolio_value: float
     cash: float
     positions: Dict[str, Position]
-    trades: List[Trade]
-    market_data: pd.DataFrame
+    trades: List[Trade]  # the environment's trade log, shared rather than copied
+    market_data: Optional[pd.DataFrame]  # only built with config['include_market_data']
     technical_indicators: Dict[str, float]
     timestamp: datetime
+    observation: Optional[np.ndarray] = None  # compact features, see OBSERVATION_FEATURES
 
 
 class MarketEnvironment:
@@ -74,6 +96,12 @@ class MarketEnvironment:
     - Transaction costs and slippage
     - Portfolio management and risk constraints
     - Market regime changes
+
+    Prices are kept in a fixed-size ring buffer and technical indicators are
+    updated incrementally, so a step costs O(1) regardless of history length.
+    With config['observation_mode'] = 'vector', reset() and step() return the
+    compact observation vector (see OBSERVATION_FEATURES) instead of an
+    EnvironmentState.
     """
     
     def __init__(self, config: Optional[Dict[str, Any]] = None):
@@ -96,10 +124,13 @@ class MarketEnvironment:
             'episode_length': 252,  # 1 year of trading days
             'market_hours': True,
             'weekend_trading': False,
-            'holiday_trading': False
+            'holiday_trading': False,
+            'history_length': 1000,  # market data rows kept
+            'observation_mode': 'state',  # 'state' (EnvironmentState) or 'vector'
+            'include_market_data': False  # attach a market data DataFrame to each state
         }
         
-        self.config = config or default_config
+        self.config = {**default_config, **(config or {})}
         
         # Environment state
         self.current_step = 0
@@ -107,8 +138,17 @@ class MarketEnvironment:
         self.cash = self.config['initial_cash']
         self.positions = {}
         self.trades = []
-        self.market_data = pd.DataFrame()
-        self.technical_indicators = {}
+        
+        # Market data ring buffer: price, volume, volatility, trend_direction
+        history_length = self.config['history_length']
+        self._history = np.zeros((history_length, 4), dtype=np.float64)
+        self._history_times = np.zeros(history_length, dtype='datetime64[us]')
+        self._history_states = np.zeros(history_length, dtype=np.int8)
+        self._history_next = 0
+        self._history_count = 0
+        self.indicators = IncrementalIndicators(history_length=history_length)
+        self._previous_price = self.current_price
+        self._observation = np.zeros(len(OBSERVATION_FEATURES), dtype=np.float32)
         
         # Market dynamics
         self.market_state = MarketState.SIDEWAYS
@@ -124,12 +164,70 @@ class MarketEnvironment:
         
         logger.info(f"Initialized MarketEnvironment with config: {self.config}")
     
-    def reset(self) -> EnvironmentState:
+    @property
+    def market_data(self) -> pd.DataFrame:
+        """Recent market data (oldest first), built from the ring buffer."""
+        if not self._history_count:
+            return pd.DataFrame()
+        
+        order = (np.arange(self._history_count) + self._history_next - self._history_count) % len(self._history)
+        values = self._history[order]
+        return pd.DataFrame({
+            'timestamp': self._history_times[order],
+            'price': values[:, 0],
+            'volume': values[:, 1],
+            'market_state': [MARKET_STATES[code].value for code in self._history_states[order]],
+            'volatility': values[:, 2],
+            'trend_direction': values[:, 3]
+        })
+    
+    @property
+    def technical_indicators(self) -> Dict[str, float]:
+        """Current technical indicators; empty until 20 prices were seen."""
+        return self.indicators.as_dict()
+    
+    def get_observation(self) -> np.ndarray:
+        """
+        Compact observation of the current state.
+        
+        Returns:
+            float32 vector ordered as OBSERVATION_FEATURES
+        """
+        obs = self._observation
+        indicators = self.indicators
+        price = self.current_price
+        portfolio_value = self._get_portfolio_value()
+        
+        obs[:] = 0.0
+        if self._previous_price > 0:
+            obs[0] = np.log(price / self._previous_price)
+        if indicators.count >= indicators.MIN_PRICES:
+            std_20 = indicators.bollinger_std
+            obs[1] = indicators.sma_5 / price - 1
+            obs[2] = indicators.sma_20 / price - 1
+            obs[3] = indicators.rsi / 100.0
+            obs[4] = indicators.macd / price
+            obs[5] = (price - indicators.sma_20) / (2 * std_20) if std_20 > 0 else 0.0
+            obs[6] = indicators.volatility
+            obs[7] = indicators.momentum
+        
+        position = self.positions.get("STOCK")
+        if portfolio_value > 0:
+            if position is not None:
+                obs[8] = position.quantity * position.current_price / portfolio_value
+            obs[9] = self.cash / portfolio_value
+        if position is not None and position.entry_price > 0:
+            obs[10] = position.current_price / position.entry_price - 1
+        obs[11] = self.current_step / self.config['episode_length']
+        
+        return obs.copy()
+    
+    def reset(self) -> Union[EnvironmentState, np.ndarray]:
         """
         Reset the environment to initial state.
         
         Returns:
-            Initial environment state
+            Initial environment state, or observation vector in 'vector' mode
         """
         try:
             # Reset environment variables
@@ -138,8 +236,9 @@ class MarketEnvironment:
             self.cash = self.config['initial_cash']
             self.positions = {}
             self.trades = []
-            self.market_data = pd.DataFrame()
-            self.technical_indicators = {}
+            self._history_next = 0
+            self._history_count = 0
+            self.indicators.clear()
             
             # Reset market dynamics
             self.market_state = MarketState.SIDEWAYS
@@ -147,23 +246,21 @@ class MarketEnvironment:
             self.volatility = self.config['volatility']
             self.regime_duration = 0
             
-            # Generate initial market data
+            # Generate initial market data (also warms up the indicators)
             self._generate_initial_market_data()
             
-            # Calculate initial technical indicators
-            self._calculate_technical_indicators()
-            
-            # Create initial state
-            initial_state = self._create_environment_state()
-            
-            logger.info("Environment reset to initial state")
-            return initial_state
+            logger.debug("Environment reset to initial state")
+            if self.config['observation_mode'] == 'vector':
+                return self.get_observation()
+            return self._create_environment_state()
             
         except Exception as e:
             logger.error(f"Environment reset failed: {e}")
+            if self.config['observation_mode'] == 'vector':
+                return np.zeros(len(OBSERVATION_FEATURES), dtype=np.float32)
             return self._create_default_state()
     
-    def step(self, action: int) -> Tuple[EnvironmentState, float, bool, Dict[str, Any]]:
+    def step(self, action: int) -> Tuple[Union[EnvironmentState, np.ndarray], float, bool, Dict[str, Any]]:
         """
         Execute one step in the environment.
         
@@ -171,7 +268,8 @@ class MarketEnvironment:
             action: Action to take (0=buy, 1=hold, 2=sell, 3=strong_buy, 4=strong_sell)
             
         Returns:
-            Tuple of (next_state, reward, done, info)
+            Tuple of (next_state, reward, done, info); next_state is the
+            observation vector in 'vector' mode
         """
         try:
             # Execute action
@@ -183,14 +281,14 @@ class MarketEnvironment:
             # Update positions
             self._update_positions()
             
-            # Calculate technical indicators
-            self._calculate_technical_indicators()
-            
             # Check if episode is done
             done = self._is_done()
             
             # Create next state
-            next_state = self._create_environment_state()
+            if self.config['observation_mode'] == 'vector':
+                next_state = self.get_observation()
+            else:
+                next_state = self._create_environment_state()
             
             # Create info dictionary
             info = self._create_info_dict()
@@ -202,6 +300,8 @@ class MarketEnvironment:
             
         except Exception as e:
             logger.error(f"Environment step failed: {e}")
+            if self.config['observation_mode'] == 'vector':
+                return np.zeros(len(OBSERVATION_FEATURES), dtype=np.float32), 0.0, True, {"error": str(e)}
             return self._create_default_state(), 0.0, True, {"error": str(e)}
     
     def _execute_action(self, action: int) -> float:
@@ -449,6 +549,7 @@ class MarketEnvironment:
             
             # Generate price movement
             price_change = self._generate_price_change()
+            self._previous_price = self.current_price
             self.current_price *= (1 + price_change)
             
             # Ensure price doesn't go negative
@@ -542,29 +643,32 @@ class MarketEnvironment:
             return 0.0
     
     def _update_market_data(self) -> None:
-        """Update market data DataFrame."""
+        """Append the current market row to the ring buffer and update indicators."""
         try:
-            # Create new row
-            new_row = {
-                'timestamp': datetime.now(),
-                'price': self.current_price,
-                'volume': random.uniform(1000000, 5000000),  # Random volume
-                'market_state': self.market_state.value,
-                'volatility': self.volatility,
-                'trend_direction': self.trend_direction
-            }
-            
-            # Add to DataFrame
-            new_df = pd.DataFrame([new_row])
-            self.market_data = pd.concat([self.market_data, new_df], ignore_index=True)
-            
-            # Keep only recent data (last 1000 rows)
-            if len(self.market_data) > 1000:
-                self.market_data = self.market_data.tail(1000).reset_index(drop=True)
+            self._record_market_row(
+                np.datetime64(datetime.now(), 'us'),
+                self.current_price,
+                random.uniform(1000000, 5000000)  # Random volume
+            )
             
         except Exception as e:
             logger.error(f"Market data update failed: {e}")
     
+    def _record_market_row(self, timestamp: np.datetime64, price: float, volume: float) -> None:
+        """Write one market data row, overwriting the oldest once the buffer is full."""
+        slot = self._history_next
+        row = self._history[slot]
+        row[0] = price
+        row[1] = volume
+        row[2] = self.volatility
+        row[3] = self.trend_direction
+        self._history_times[slot] = timestamp
+        self._history_states[slot] = MARKET_STATES.index(self.market_state)
+        
+        self._history_next = (slot + 1) % len(self._history)
+        self._history_count = min(self._history_count + 1, len(self._history))
+        self.indicators.update(price)
+    
     def _update_positions(self) -> None:
         """Update position values."""
         try:
@@ -575,96 +679,6 @@ class MarketEnvironment:
         except Exception as e:
             logger.error(f"Position update failed: {e}")
     
-    def _calculate_technical_indicators(self) -> None:
-        """Calculate technical indicators."""
-        try:
-            if len(self.market_data) < 20:
-                self.technical_indicators = {}
-                return
-            
-            prices = self.market_data['price']
-            
-            # Simple Moving Averages
-            self.technical_indicators['sma_5'] = prices.tail(5).mean()
-            self.technical_indicators['sma_20'] = prices.tail(20).mean()
-            
-            # RSI
-            self.technical_indicators['rsi'] = self._calculate_rsi(prices)
-            
-            # MACD
-            self.technical_indicators['macd'] = self._calculate_macd(prices)
-            
-            # Bollinger Bands
-            bb_upper, bb_lower = self._calculate_bollinger_bands(prices)
-            self.technical_indicators['bb_upper'] = bb_upper
-            self.technical_indicators['bb_lower'] = bb_lower
-            
-            # Volatility
-            self.technical_indicators['volatility'] = prices.pct_change().std()
-            
-            # Price momentum
-            self.technical_indicators['momentum'] = (prices.iloc[-1] - prices.iloc[-10]) / prices.iloc[-10] if len(prices) >= 10 else 0
-            
-        except Exception as e:
-            logger.error(f"Technical indicators calculation failed: {e}")
-            self.technical_indicators = {}
-    
-    def _calculate_rsi(self, prices: pd.Series, period: int = 14) -> float:
-        """Calculate RSI indicator."""
-        try:
-            if len(prices) < period + 1:
-                return 50.0
-            
-            delta = prices.diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-            
-            rs = gain / loss
-            rsi = 100 - (100 / (1 + rs))
-            
-            return float(rsi.iloc[-1]) if not np.isnan(rsi.iloc[-1]) else 50.0
-            
-        except Exception as e:
-            logger.error(f"RSI calculation failed: {e}")
-            return 50.0
-    
-    def _calculate_macd(self, prices: pd.Series) -> float:
-        """Calculate MACD indicator."""
-        try:
-            if len(prices) < 26:
-                return 0.0
-            
-            ema_12 = prices.ewm(span=12).mean()
-            ema_26 = prices.ewm(span=26).mean()
-            macd = ema_12 - ema_26
-            
-            return float(macd.iloc[-1]) if not np.isnan(macd.iloc[-1]) else 0.0
-            
-        except Exception as e:
-            logger.error(f"MACD calculation failed: {e}")
-            return 0.0
-    
-    def _calculate_bollinger_bands(self, prices: pd.Series, period: int = 20) -> Tuple[float, float]:
-        """Calculate Bollinger Bands."""
-        try:
-            if len(prices) < period:
-                return 0.0, 0.0
-            
-            sma = prices.rolling(window=period).mean()
-            std = prices.rolling(window=period).std()
-            
-            upper_band = sma + (std * 2)
-            lower_band = sma - (std * 2)
-            
-            upper = float(upper_band.iloc[-1]) if not np.isnan(upper_band.iloc[-1]) else 0.0
-            lower = float(lower_band.iloc[-1]) if not np.isnan(lower_band.iloc[-1]) else 0.0
-            
-            return upper, lower
-            
-        except Exception as e:
-            logger.error(f"Bollinger Bands calculation failed: {e}")
-            return 0.0, 0.0
-    
     def _is_done(self) -> bool:
         """Check if episode is done."""
         try:
@@ -684,11 +698,12 @@ class MarketEnvironment:
                 market_state=self.market_state,
                 portfolio_value=self._get_portfolio_value(),
                 cash=self.cash,
-                positions=self.positions.copy(),
-                trades=self.trades.copy(),
-                market_data=self.market_data.copy(),
-                technical_indicators=self.technical_indicators.copy(),
-                timestamp=datetime.now()
+                positions=dict(self.positions),
+                trades=self.trades,
+                market_data=self.market_data if self.config['include_market_data'] else None,
+                technical_indicators=self.technical_indicators,
+                timestamp=datetime.now(),
+                observation=self.get_observation()
             )
             
         except Exception as e:
@@ -707,7 +722,8 @@ class MarketEnvironment:
             trades=[],
             market_data=pd.DataFrame(),
             technical_indicators={},
-            timestamp=datetime.now()
+            timestamp=datetime.now(),
+            observation=np.zeros(len(OBSERVATION_FEATURES), dtype=np.float32)
         )
     
     def _create_info_dict(self) -> Dict[str, Any]:
@@ -745,30 +761,22 @@ class MarketEnvironment:
     def _generate_initial_market_data(self) -> None:
         """Generate initial market data."""
         try:
-            # Generate some historical data for technical indicators
-            initial_data = []
-            base_price = self.config['initial_price']
-            
-            for i in range(50):  # 50 days of historical data
-                # Generate price with some trend and volatility
-                price_change = np.random.normal(0, self.volatility)
-                base_price *= (1 + price_change)
-                
-                initial_data.append({
-                    'timestamp': datetime.now() - timedelta(days=50-i),
-                    'price': base_price,
-                    'volume': random.uniform(1000000, 5000000),
-                    'market_state': self.market_state.value,
-                    'volatility': self.volatility,
-                    'trend_direction': self.trend_direction
-                })
-            
-            self.market_data = pd.DataFrame(initial_data)
-            self.current_price = base_price
+            # Generate some historical data for technical indicators (50 days)
+            n_days = 50
+            price_changes = np.random.normal(0, self.volatility, n_days)
+            prices = self.config['initial_price'] * np.cumprod(1 + price_changes)
+            timestamps = np.datetime64(datetime.now(), 'us') - np.arange(n_days, 0, -1) * np.timedelta64(1, 'D')
+            
+            for timestamp, price in zip(timestamps, prices):
+                self._record_market_row(timestamp, float(price), random.uniform(1000000, 5000000))
+            
+            self.current_price = float(prices[-1])
+            self._previous_price = float(prices[-2])
             
         except Exception as e:
             logger.error(f"Initial market data generation failed: {e}")
-            self.market_data = pd.DataFrame()
+            self._history_count = 0
+            self.indicators.clear()
     
     def get_performance_metrics(self) -> Dict[str, float]:
         """Get performance metrics for the episode."""
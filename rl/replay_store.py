@@ -0,0 +1,173 @@
+"""
+Memory-Mapped Storage for the Experience Replay Buffer
+
+Each field of the replay ring buffer lives in its own .npy file that is mapped
+into memory and used directly as the buffer's array, so attaching to an
+existing buffer only maps the files instead of reading them. Saving flushes
+the ring segment written since the last save and then atomically replaces a
+small JSON file with the buffer position and counters.
+
+Layout:
+    <path>/<field>.npy   one file per field, `capacity` rows
+    <path>/meta.json     format version, shapes, ring position and counters
+"""
+
+import json
+import mmap
+import os
+import numpy as np
+from typing import Dict, Any, Tuple
+from pathlib import Path
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class MappedArray:
+    """
+    A .npy file mapped into memory, with page-range flushing.
+    """
+
+    def __init__(self, path: Path, writable: bool = True):
+        """
+        Map an existing .npy file.
+
+        Args:
+            path: File to map
+            writable: Write changes through to the file; otherwise changes
+                stay private to this process
+        """
+        self.path = Path(path)
+        with open(self.path, 'r+b' if writable else 'rb') as f:
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            if fortran_order:
+                raise ValueError(f"{self.path.name} is not C-ordered")
+            self._offset = f.tell()
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_COPY)
+
+        self.array = np.ndarray(shape, dtype=dtype, buffer=self._mmap, offset=self._offset)
+        self._row_bytes = self.array.strides[0] if self.array.ndim else self.array.nbytes
+
+    @classmethod
+    def create(cls, path: Path, shape: Tuple[int, ...], dtype: np.dtype) -> 'MappedArray':
+        """Create a zero-filled .npy file and map it."""
+        np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=shape).flush()
+        return cls(path)
+
+    def flush_rows(self, start: int, stop: int) -> None:
+        """Write rows [start, stop) back to the file."""
+        if stop <= start:
+            return
+        begin = self._offset + start * self._row_bytes
+        end = self._offset + stop * self._row_bytes
+        aligned = begin - begin % mmap.ALLOCATIONGRANULARITY
+        self._mmap.flush(aligned, end - aligned)
+
+    def flush(self) -> None:
+        """Write the whole array back to the file."""
+        self._mmap.flush()
+
+    def close(self) -> None:
+        """Unmap the file; the array must no longer be used."""
+        self.array = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Views of the array are still alive; the mapping closes when they are collected
+            pass
+
+
+class ReplayStore:
+    """
+    Directory of memory-mapped ring-buffer fields plus metadata.
+    """
+
+    META = 'meta.json'
+    FORMAT_VERSION = 1
+
+    def __init__(self, path: Path):
+        """
+        Initialize the store.
+
+        Args:
+            path: Directory holding the files
+        """
+        self.path = Path(path)
+        self._files: Dict[str, MappedArray] = {}
+
+    def exists(self) -> bool:
+        """Whether a buffer has been saved to this directory."""
+        return (self.path / self.META).exists()
+
+    def create(self, fields: Dict[str, Tuple[Tuple[int, ...], np.dtype]]) -> Dict[str, np.ndarray]:
+        """
+        Create zero-filled field files, replacing any existing buffer.
+
+        Args:
+            fields: Mapping of field name to (shape, dtype)
+
+        Returns:
+            Mapping of field name to its memory-mapped array
+        """
+        self.close()
+        self.path.mkdir(parents=True, exist_ok=True)
+        (self.path / self.META).unlink(missing_ok=True)
+
+        for name, (shape, dtype) in fields.items():
+            self._files[name] = MappedArray.create(self.path / f'{name}.npy', shape, dtype)
+        return {name: mapped.array for name, mapped in self._files.items()}
+
+    def attach(self, writable: bool = True) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """
+        Map the field files of a saved buffer.
+
+        Args:
+            writable: Write changes through to the files; otherwise they stay private
+
+        Returns:
+            Tuple of (field arrays, metadata)
+        """
+        with open(self.path / self.META, 'r') as f:
+            meta = json.load(f)
+        if meta.get('format_version') != self.FORMAT_VERSION:
+            raise ValueError(f"Unsupported replay buffer format {meta.get('format_version')}")
+
+        self.close()
+        for name in meta['fields']:
+            self._files[name] = MappedArray(self.path / f'{name}.npy', writable=writable)
+        return {name: mapped.array for name, mapped in self._files.items()}, meta
+
+    def flush(self, segments: Tuple[Tuple[int, int], ...], meta: Dict[str, Any],
+              full_fields: Tuple[str, ...] = ()) -> None:
+        """
+        Flush changed rows, then atomically replace the metadata.
+
+        Args:
+            segments: Row ranges [start, stop) written since the last flush
+            meta: Metadata describing the flushed state
+            full_fields: Fields flushed completely (e.g. randomly updated priorities)
+        """
+        for name, mapped in self._files.items():
+            if name in full_fields:
+                mapped.flush()
+                continue
+            for start, stop in segments:
+                mapped.flush_rows(start, stop)
+
+        data = dict(meta, format_version=self.FORMAT_VERSION, fields=list(self._files))
+        tmp_file = self.path / (self.META + '.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.path / self.META)
+
+    def close(self) -> None:
+        """Unmap all field files."""
+        for mapped in self._files.values():
+            mapped.close()
+        self._files = {}
@@ -0,0 +1,89 @@
+"""
+Sum Tree for Prioritized Experience Replay
+
+A complete binary tree stored in a flat array whose leaves hold sampling
+weights and whose inner nodes hold the sum of their children. Updating a
+leaf and finding the leaf for a prefix sum are both O(log N), and both are
+vectorized over batches of leaves.
+"""
+
+import numpy as np
+from typing import Union
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SumTree:
+    """
+    Array-backed sum tree over a fixed number of leaves.
+    """
+
+    def __init__(self, capacity: int):
+        """
+        Initialize a tree with all leaves at zero.
+
+        Args:
+            capacity: Number of leaves
+        """
+        self.capacity = capacity
+        self._leaf_offset = 1
+        while self._leaf_offset < capacity:
+            self._leaf_offset *= 2
+        self._depth = self._leaf_offset.bit_length() - 1
+        self._nodes = np.zeros(2 * self._leaf_offset, dtype=np.float64)  # node 1 is the root
+
+    @property
+    def total(self) -> float:
+        """Sum of all leaves."""
+        return float(self._nodes[1])
+
+    def get(self, indices: Union[int, np.ndarray]) -> np.ndarray:
+        """Values of the given leaves."""
+        return self._nodes[self._leaf_offset + np.asarray(indices)]
+
+    def update(self, indices: Union[int, np.ndarray], values: Union[float, np.ndarray]) -> None:
+        """
+        Set leaf values and refresh the sums above them.
+
+        Args:
+            indices: Leaf indices; with duplicates, the last value wins
+            values: New leaf values (non-negative)
+        """
+        if np.ndim(indices) == 0:
+            # Single leaf: walk up with plain integers
+            node = self._leaf_offset + int(indices)
+            self._nodes[node] = values
+            node //= 2
+            while node:
+                self._nodes[node] = self._nodes[2 * node] + self._nodes[2 * node + 1]
+                node //= 2
+            return
+
+        nodes = self._leaf_offset + np.asarray(indices, dtype=np.int64)
+        self._nodes[nodes] = values
+
+        for _ in range(self._depth):
+            nodes = np.unique(nodes // 2)
+            self._nodes[nodes] = self._nodes[2 * nodes] + self._nodes[2 * nodes + 1]
+
+    def find(self, prefix_sums: np.ndarray) -> np.ndarray:
+        """
+        Leaves at which the cumulative sum first exceeds each prefix sum.
+
+        Args:
+            prefix_sums: Values in [0, total)
+
+        Returns:
+            Leaf indices
+        """
+        remaining = np.minimum(np.asarray(prefix_sums, dtype=np.float64), np.nextafter(self.total, 0))
+        nodes = np.ones(len(remaining), dtype=np.int64)
+
+        for _ in range(self._depth):
+            left = self._nodes[2 * nodes]
+            go_right = remaining >= left
+            remaining -= left * go_right
+            nodes = 2 * nodes + go_right
+
+        return np.minimum(nodes - self._leaf_offset, self.capacity - 1)
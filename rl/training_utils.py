@@ -217,7 +217,7 @@ class TrainingUtils:
                 )
                 
                 # Train agent if enough experiences
-                if len(experience_replay.buffer) >= experience_replay.config['batch_size']:
+                if len(experience_replay) >= experience_replay.config['batch_size']:
                     loss = agent.update_model(experience_replay)
                     training_loss += loss if loss is not None else 0.0
                 
@@ -246,6 +246,105 @@ class TrainingUtils:
                 'exploration_rate': 0.0
             }
     
+    def collect_experience(self,
+                           agent,
+                           vector_environment,
+                           experience_replay,
+                           num_steps: int,
+                           exploration_rate: float = 0.1,
+                           observations: Optional[np.ndarray] = None,
+                           trajectories: Optional[List[List[Tuple]]] = None) -> Dict[str, Any]:
+        """
+        Collect experience from a batch of environments stepped together.
+
+        With multi_step enabled the replay buffer assumes consecutive slots hold
+        one episode, so each environment's transitions are staged and written as a
+        contiguous trajectory once its episode ends. Unfinished trajectories are
+        returned and must be passed back in to be kept; they are dropped when the
+        environments are reset.
+
+        Args:
+            agent: Agent with get_actions(observations, exploration_rate=...) for a
+                batch, or get_action(state, exploration_rate=...) for one state
+            vector_environment: VectorMarketEnvironment or ShardedVectorMarketEnvironment
+            experience_replay: Replay buffer receiving one experience per environment and step
+                (per finished episode with multi_step)
+            num_steps: Number of batched steps
+            exploration_rate: Exploration rate passed to the agent
+            observations: Current observations to continue from (default: reset the environments)
+            trajectories: Staged trajectories from the previous call, used with multi_step
+
+        Returns:
+            Collection statistics, including the observations and staged trajectories
+            to continue from
+        """
+        try:
+            if observations is None:
+                observations = vector_environment.reset()
+                trajectories = None
+
+            staged = None
+            if getattr(experience_replay, 'multi_step', False):
+                staged = trajectories if trajectories is not None else [[] for _ in range(len(observations))]
+
+            episode_rewards = []
+            transitions = 0
+
+            for _ in range(num_steps):
+                if hasattr(agent, 'get_actions'):
+                    actions = np.asarray(agent.get_actions(observations, exploration_rate=exploration_rate))
+                else:
+                    actions = np.array([agent.get_action(obs, exploration_rate=exploration_rate)
+                                        for obs in observations])
+
+                next_observations, rewards, dones, info = vector_environment.step(actions)
+
+                # Finished environments were reset; store their terminal observation instead
+                stored_next = next_observations
+                if 'done_envs' in info:
+                    stored_next = next_observations.copy()
+                    stored_next[info['done_envs']] = info['terminal_observations']
+                    episode_rewards.extend(info['episode_rewards'].tolist())
+
+                for i in range(len(actions)):
+                    experience = (observations[i], int(actions[i]), float(rewards[i]),
+                                  stored_next[i], bool(dones[i]))
+                    if staged is None:
+                        self._store_transitions(experience_replay, [experience])
+                    else:
+                        # Copy rows so the staged trajectory survives environments reusing arrays
+                        staged[i].append((np.array(experience[0]),) + experience[1:3] +
+                                         (np.array(experience[3]), experience[4]))
+                        if experience[4]:
+                            self._store_transitions(experience_replay, staged[i])
+                            staged[i] = []
+                transitions += len(actions)
+                observations = next_observations
+
+            return {
+                'transitions': transitions,
+                'episodes_completed': len(episode_rewards),
+                'mean_episode_reward': float(np.mean(episode_rewards)) if episode_rewards else 0.0,
+                'observations': observations,
+                'trajectories': staged
+            }
+
+        except Exception as e:
+            logger.error(f"Experience collection failed: {e}")
+            return {'transitions': 0, 'episodes_completed': 0, 'mean_episode_reward': 0.0,
+                    'observations': observations, 'trajectories': trajectories, 'error': str(e)}
+
+    def _store_transitions(self, experience_replay, experiences: List[Tuple]):
+        """Add (state, action, reward, next_state, done) tuples to the buffer in order."""
+        for state, action, reward, next_state, done in experiences:
+            experience_replay.add_experience(
+                state=state,
+                action=action,
+                reward=reward,
+                next_state=next_state,
+                done=done
+            )
+
     def _evaluate_agent(self, agent, environment, num_episodes: int = 5) -> float:
         """Evaluate agent performance."""
         try:
@@ -306,6 +405,10 @@ class TrainingUtils:
         try:
             # This is a simplified conversion
             # In practice, you'd need to handle different state types
+            if isinstance(state, np.ndarray):
+                return state
+            if getattr(state, 'observation', None) is not None:
+                return state.observation
             if hasattr(state, 'technical_indicators'):
                 indicators = state.technical_indicators
                 return np.array(list(indicators.values()))
@@ -0,0 +1,462 @@
+"""
+Vectorized Market Environments for Reinforcement Learning
+
+This module advances many independent market simulations at once:
+
+- VectorMarketEnvironment: N environments stepped with one NumPy call per step
+- ShardedVectorMarketEnvironment: the same, split across worker processes
+
+The market dynamics, trading rules, rewards and observation features follow
+MarketEnvironment; each environment switches regimes on its own and is reset
+automatically when its episode ends.
+"""
+
+import multiprocessing
+import os
+import numpy as np
+from typing import Dict, Any, List, Tuple, Optional
+import logging
+
+from .market_environment import MarketState, MARKET_STATES, OBSERVATION_FEATURES
+from .incremental_indicators import BatchIndicators
+
+logger = logging.getLogger(__name__)
+
+
+# Regime parameters, indexed by position in MARKET_STATES
+# (mirrors MarketEnvironment._change_market_regime and _generate_price_change)
+_REGIME_TRENDS = np.array([
+    {MarketState.BULL: (0.001, 0.005), MarketState.BEAR: (-0.005, -0.001),
+     MarketState.TRENDING: (-0.003, 0.003)}.get(state, (0.0, 0.0))
+    for state in MARKET_STATES
+])
+_REGIME_VOLATILITIES = np.array([
+    {MarketState.BULL: (0.015, 0.025), MarketState.BEAR: (0.020, 0.030), MarketState.VOLATILE: (0.030, 0.050),
+     MarketState.TRENDING: (0.010, 0.020)}.get(state, (0.015, 0.025))
+    for state in MARKET_STATES
+])
+_REGIME_MULTIPLIERS = np.array([
+    {MarketState.VOLATILE: 1.5, MarketState.TRENDING: 0.8}.get(state, 1.0) for state in MARKET_STATES
+])
+
+# Trade size per action (0=buy, 1=hold, 2=sell, 3=strong_buy, 4=strong_sell)
+_BUY_FRACTIONS = np.array([0.4, 0.0, 0.0, 0.8, 0.0])  # of the maximum position value
+_SELL_FRACTIONS = np.array([0.0, 0.0, 0.5, 0.0, 1.0])  # of the held quantity
+
+
+class VectorMarketEnvironment:
+    """
+    Batch of independent market environments advanced together.
+
+    State is kept in one array per field with an entry per environment, so
+    trading, market moves, indicators and observations are computed for all
+    environments in a handful of NumPy operations. Observations are
+    (n_envs, len(OBSERVATION_FEATURES)) float32 arrays.
+
+    Environments whose episode ends are reset inside step(); the returned
+    observation is then the first one of the new episode, and the final one
+    is in info['terminal_observations'] (rows for info['done_envs']).
+    """
+
+    def __init__(self, n_envs: int, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the environments.
+
+        Args:
+            n_envs: Number of environments
+            config: Configuration dictionary (MarketEnvironment keys plus random_seed)
+        """
+        default_config = {
+            'initial_cash': 100000.0,
+            'initial_price': 100.0,
+            'transaction_cost': 0.001,  # 0.1% transaction cost
+            'slippage': 0.0005,  # 0.05% slippage
+            'max_position_size': 0.2,  # 20% max position size
+            'volatility': 0.02,  # 2% daily volatility
+            'regime_change_probability': 0.05,
+            'episode_length': 252,  # 1 year of trading days
+            'history_length': 1000,  # prices covered by the volatility indicator
+            'warmup_length': 50,  # historical prices generated on reset
+            'random_seed': None
+        }
+
+        self.config = {**default_config, **(config or {})}
+        self.n_envs = n_envs
+        self.rng = np.random.default_rng(self.config['random_seed'])
+
+        # Per-environment state
+        self.prices = np.zeros(n_envs, dtype=np.float64)
+        self._previous_prices = np.zeros(n_envs, dtype=np.float64)
+        self.cash = np.zeros(n_envs, dtype=np.float64)
+        self.quantities = np.zeros(n_envs, dtype=np.float64)
+        self.entry_prices = np.zeros(n_envs, dtype=np.float64)
+        self.mark_prices = np.zeros(n_envs, dtype=np.float64)  # price the position is valued at
+        self.realized_pnl = np.zeros(n_envs, dtype=np.float64)
+        self.trade_counts = np.zeros(n_envs, dtype=np.int64)
+        self.steps = np.zeros(n_envs, dtype=np.int64)
+        self.episode_rewards = np.zeros(n_envs, dtype=np.float64)
+
+        # Market dynamics
+        self.market_states = np.zeros(n_envs, dtype=np.int8)  # index into MARKET_STATES
+        self.trend_directions = np.zeros(n_envs, dtype=np.float64)
+        self.volatilities = np.zeros(n_envs, dtype=np.float64)
+        self.regime_durations = np.zeros(n_envs, dtype=np.int64)
+        self.indicators = BatchIndicators(n_envs, history_length=self.config['history_length'])
+
+        # Statistics
+        self.total_steps = 0
+        self.episodes_completed = 0
+
+        logger.info(f"Initialized VectorMarketEnvironment with {n_envs} environments")
+
+    @property
+    def portfolio_values(self) -> np.ndarray:
+        """Portfolio value of each environment."""
+        return self.cash + self.quantities * self.mark_prices
+
+    def reset(self) -> np.ndarray:
+        """
+        Reset all environments.
+
+        Returns:
+            Initial observations
+        """
+        try:
+            self._reset_envs(np.arange(self.n_envs))
+            return self.get_observations()
+
+        except Exception as e:
+            logger.error(f"Vector environment reset failed: {e}")
+            return np.zeros((self.n_envs, len(OBSERVATION_FEATURES)), dtype=np.float32)
+
+    def step(self, actions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Dict[str, Any]]:
+        """
+        Execute one step in every environment.
+
+        Args:
+            actions: One action per environment (0=buy, 1=hold, 2=sell, 3=strong_buy, 4=strong_sell)
+
+        Returns:
+            Tuple of (observations, rewards, dones, info); info holds per-environment arrays
+        """
+        try:
+            actions = np.asarray(actions, dtype=np.int64)
+            actions = np.where((actions >= 0) & (actions < len(_BUY_FRACTIONS)), actions, 1)
+
+            rewards = self._execute_actions(actions)
+            self._update_markets()
+
+            dones = self.steps >= self.config['episode_length']
+            observations = self.get_observations()
+            info = self._create_info()
+
+            self.steps += 1
+            self.episode_rewards += rewards
+            self.total_steps += self.n_envs
+
+            if dones.any():
+                done_envs = np.flatnonzero(dones)
+                info['done_envs'] = done_envs
+                info['terminal_observations'] = observations[done_envs]
+                info['episode_rewards'] = self.episode_rewards[done_envs]
+                self.episodes_completed += len(done_envs)
+
+                self._reset_envs(done_envs)
+                observations[done_envs] = self.get_observations()[done_envs]
+
+            return observations, rewards.astype(np.float32), dones, info
+
+        except Exception as e:
+            logger.error(f"Vector environment step failed: {e}")
+            return (np.zeros((self.n_envs, len(OBSERVATION_FEATURES)), dtype=np.float32),
+                    np.zeros(self.n_envs, dtype=np.float32), np.ones(self.n_envs, dtype=bool), {"error": str(e)})
+
+    def get_observations(self) -> np.ndarray:
+        """
+        Compact observations of all environments.
+
+        Returns:
+            (n_envs, len(OBSERVATION_FEATURES)) float32 array
+        """
+        indicators = self.indicators
+        prices = self.prices
+        portfolio_values = self.portfolio_values
+        position_values = self.quantities * self.mark_prices
+        warm = indicators.count >= indicators.MIN_PRICES
+        std_20 = indicators.bollinger_std
+        sma_20 = indicators.sma_20
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            columns = [
+                np.log(prices / self._previous_prices),
+                np.where(warm, indicators.sma_5 / prices - 1, 0.0),
+                np.where(warm, sma_20 / prices - 1, 0.0),
+                np.where(warm, indicators.rsi / 100.0, 0.0),
+                np.where(warm, indicators.macd / prices, 0.0),
+                np.where(warm & (std_20 > 0), (prices - sma_20) / (2 * std_20), 0.0),
+                np.where(warm, indicators.volatility, 0.0),
+                np.where(warm, indicators.momentum, 0.0),
+                np.where(portfolio_values > 0, position_values / portfolio_values, 0.0),
+                np.where(portfolio_values > 0, self.cash / portfolio_values, 0.0),
+                np.where((self.quantities > 0) & (self.entry_prices > 0), self.mark_prices / self.entry_prices - 1, 0.0),
+                self.steps / self.config['episode_length']
+            ]
+
+        return np.nan_to_num(np.stack(columns, axis=1)).astype(np.float32)
+
+    def _execute_actions(self, actions: np.ndarray) -> np.ndarray:
+        """Execute trading actions and return rewards."""
+        transaction_cost = self.config['transaction_cost']
+        slippage = self.config['slippage']
+        max_position_size = self.config['max_position_size']
+        prices = self.prices
+
+        # Trade sizes
+        max_position_values = self.portfolio_values * max_position_size
+        buy_quantities = max_position_values * _BUY_FRACTIONS[actions] / prices
+        sell_quantities = self.quantities * _SELL_FRACTIONS[actions]
+        is_buy = _BUY_FRACTIONS[actions] > 0
+        is_sell = _SELL_FRACTIONS[actions] > 0
+
+        # Buys need cash for the quantity at the quoted price plus costs
+        buy_prices = prices * (1 + slippage)
+        buy_commissions = buy_quantities * buy_prices * transaction_cost
+        buy_costs = buy_quantities * buy_prices + buy_commissions
+        buys = (is_buy & (buy_quantities > 0) & (self.cash >= buy_quantities * prices * (1 + transaction_cost)) &
+                (self.cash >= buy_costs))
+
+        # Sells need an open position
+        sell_prices = prices * (1 - slippage)
+        sell_commissions = sell_quantities * sell_prices * transaction_cost
+        sells = is_sell & (sell_quantities > 0) & (self.quantities >= sell_quantities)
+        sell_pnl = (sell_prices - self.entry_prices) * sell_quantities - sell_commissions
+
+        # Apply buys: average into existing positions, new positions are valued at the trade price
+        opened = buys & (self.quantities <= 0)
+        new_quantities = self.quantities + buy_quantities
+        with np.errstate(divide='ignore', invalid='ignore'):
+            averaged = (self.quantities * self.entry_prices + buy_quantities * buy_prices) / new_quantities
+        self.entry_prices = np.where(buys, np.where(opened, buy_prices, averaged), self.entry_prices)
+        self.mark_prices = np.where(opened, buy_prices, self.mark_prices)
+        self.quantities = np.where(buys, new_quantities, self.quantities)
+        self.cash = self.cash - np.where(buys, buy_costs, 0.0)
+
+        # Apply sells
+        self.cash = self.cash + np.where(sells, sell_quantities * sell_prices - sell_commissions, 0.0)
+        self.quantities = self.quantities - np.where(sells, sell_quantities, 0.0)
+        self.realized_pnl = self.realized_pnl + np.where(sells, sell_pnl, 0.0)
+        closed = self.quantities <= 0
+        self.quantities[closed] = 0.0
+        self.entry_prices[closed] = 0.0
+
+        traded = buys | sells
+        self.trade_counts += traded
+
+        # Rewards: PnL and commission for trades, penalty for oversized positions or failed trades
+        position_values = self.quantities * self.mark_prices
+        portfolio_values = self.cash + position_values
+        commissions = np.where(buys, buy_commissions, np.where(sells, sell_commissions, 0.0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            oversized = (self.quantities > 0) & (position_values / portfolio_values > max_position_size)
+        trade_rewards = (np.where(sells, sell_pnl, 0.0) - commissions) / 1000.0 - 0.1 * oversized
+
+        return np.where(traded, trade_rewards, np.where(is_buy | is_sell, -0.01, 0.0))
+
+    def _update_markets(self) -> None:
+        """Switch regimes, move prices and update indicators."""
+        n = self.n_envs
+
+        changes = self.rng.random(n) < self.config['regime_change_probability']
+        if changes.any():
+            self._change_regimes(np.flatnonzero(changes))
+
+        # Trend persistence with random walk, kept within bounds
+        self.trend_directions = np.clip(self.trend_directions + self.rng.uniform(-0.0001, 0.0001, n), -0.01, 0.01)
+
+        # Trend and volatility components, scaled by regime, with mean reversion of large moves
+        price_changes = ((self.trend_directions + self.rng.standard_normal(n) * self.volatilities) *
+                         _REGIME_MULTIPLIERS[self.market_states])
+        price_changes[np.abs(price_changes) > self.volatilities * 2] *= 0.5
+
+        self._previous_prices = self.prices
+        self.prices = np.maximum(self.prices * (1 + price_changes), 0.01)
+        self.mark_prices = self.prices.copy()
+        self.indicators.update(self.prices)
+        self.regime_durations += 1
+
+    def _change_regimes(self, envs: np.ndarray) -> None:
+        """Move the given environments to a different, randomly chosen regime."""
+        n_states = len(MARKET_STATES)
+        new_states = (self.market_states[envs] + self.rng.integers(1, n_states, len(envs))) % n_states
+
+        self.market_states[envs] = new_states
+        self.regime_durations[envs] = 0
+        self.trend_directions[envs] = self.rng.uniform(*_REGIME_TRENDS[new_states].T)
+        self.volatilities[envs] = self.rng.uniform(*_REGIME_VOLATILITIES[new_states].T)
+
+    def _reset_envs(self, envs: np.ndarray) -> None:
+        """Reset the given environments and generate their warm-up price history."""
+        self.cash[envs] = self.config['initial_cash']
+        self.quantities[envs] = 0.0
+        self.entry_prices[envs] = 0.0
+        self.realized_pnl[envs] = 0.0
+        self.trade_counts[envs] = 0
+        self.steps[envs] = 0
+        self.episode_rewards[envs] = 0.0
+
+        self.market_states[envs] = MARKET_STATES.index(MarketState.SIDEWAYS)
+        self.trend_directions[envs] = 0.0
+        self.volatilities[envs] = self.config['volatility']
+        self.regime_durations[envs] = 0
+
+        warmup = max(self.config['warmup_length'], 2)
+        price_changes = self.rng.normal(0, self.config['volatility'], (warmup, len(envs)))
+        history = self.config['initial_price'] * np.cumprod(1 + price_changes, axis=0)
+        self.indicators.load(envs, history)
+
+        self.prices[envs] = history[-1]
+        self._previous_prices[envs] = history[-2]
+        self.mark_prices[envs] = history[-1]
+
+    def _create_info(self) -> Dict[str, Any]:
+        """Create per-environment info arrays for a step."""
+        return {
+            'portfolio_value': self.portfolio_values,
+            'cash': self.cash.copy(),
+            'positions': (self.quantities > 0).astype(np.int64),
+            'trades': self.trade_counts.copy(),
+            'market_state': self.market_states.copy(),  # index into MARKET_STATES
+            'volatility': self.volatilities.copy(),
+            'trend_direction': self.trend_directions.copy(),
+            'regime_duration': self.regime_durations.copy()
+        }
+
+    def close(self) -> None:
+        """Release resources (nothing to release in-process)."""
+
+
+def _vector_env_worker(connection, n_envs: int, config: Dict[str, Any]) -> None:
+    """Run a VectorMarketEnvironment shard, serving commands from the parent process."""
+    env = VectorMarketEnvironment(n_envs, config)
+    try:
+        while True:
+            command, data = connection.recv()
+            if command == 'step':
+                connection.send(env.step(data))
+            elif command == 'reset':
+                connection.send(env.reset())
+            elif command == 'close':
+                break
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        connection.close()
+
+
+class ShardedVectorMarketEnvironment:
+    """
+    VectorMarketEnvironment split into shards that run in worker processes.
+
+    Every step sends each shard its slice of the actions, lets the shards
+    advance in parallel and concatenates their results, so the interface is
+    the same as VectorMarketEnvironment. Shards are seeded from independent
+    SeedSequence children of config['random_seed'].
+    """
+
+    def __init__(self, n_envs: int, config: Optional[Dict[str, Any]] = None, n_workers: Optional[int] = None):
+        """
+        Start the worker processes.
+
+        Args:
+            n_envs: Total number of environments
+            config: Configuration dictionary passed to each shard
+            n_workers: Number of worker processes (default: CPU count)
+        """
+        self.config = dict(config or {})
+        self.n_envs = n_envs
+        n_workers = max(1, min(n_workers or os.cpu_count() or 1, n_envs))
+
+        shard_sizes = [len(shard) for shard in np.array_split(np.arange(n_envs), n_workers)]
+        self._offsets = np.cumsum([0] + shard_sizes[:-1])
+        seeds = np.random.SeedSequence(self.config.get('random_seed')).spawn(n_workers)
+
+        self._connections = []
+        self._processes = []
+        for size, seed in zip(shard_sizes, seeds):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_vector_env_worker,
+                                              args=(child, size, dict(self.config, random_seed=seed)),
+                                              daemon=True)
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._processes.append(process)
+
+        self._bounds = list(zip(self._offsets, self._offsets + np.array(shard_sizes)))
+        logger.info(f"Initialized ShardedVectorMarketEnvironment with {n_envs} environments in {n_workers} processes")
+
+    def reset(self) -> np.ndarray:
+        """
+        Reset all environments.
+
+        Returns:
+            Initial observations
+        """
+        for connection in self._connections:
+            connection.send(('reset', None))
+        return np.concatenate([connection.recv() for connection in self._connections])
+
+    def step(self, actions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Dict[str, Any]]:
+        """
+        Execute one step in every environment.
+
+        Args:
+            actions: One action per environment
+
+        Returns:
+            Tuple of (observations, rewards, dones, info), as VectorMarketEnvironment.step
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+        for connection, (start, stop) in zip(self._connections, self._bounds):
+            connection.send(('step', actions[start:stop]))
+        results = [connection.recv() for connection in self._connections]
+
+        observations = np.concatenate([result[0] for result in results])
+        rewards = np.concatenate([result[1] for result in results])
+        dones = np.concatenate([result[2] for result in results])
+        return observations, rewards, dones, self._merge_infos([result[3] for result in results])
+
+    def _merge_infos(self, infos: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Concatenate shard infos, translating shard-local environment indices."""
+        merged: Dict[str, Any] = {}
+        keys = dict.fromkeys(key for info in infos for key in info)
+        for key in keys:
+            parts = [(offset, info[key]) for offset, info in zip(self._offsets, infos) if key in info]
+            if key == 'done_envs':
+                merged[key] = np.concatenate([values + offset for offset, values in parts])
+            elif isinstance(parts[0][1], np.ndarray):
+                merged[key] = np.concatenate([values for _, values in parts])
+            else:
+                merged[key] = [values for _, values in parts]
+        return merged
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        for connection in self._connections:
+            try:
+                connection.send(('close', None))
+                connection.close()
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._connections = []
+        self._processes = []
+
+    def __enter__(self) -> 'ShardedVectorMarketEnvironment':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
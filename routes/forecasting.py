@@ -4,18 +4,71 @@ Forecasting Routes - Day and swing forecasting
 from fastapi import APIRouter, HTTPException
 from datetime import datetime, timedelta
 from loguru import logger
-from typing import Optional
+from typing import Any, Dict, List, Optional
+import asyncio
 import random
 import json
+import uuid
 
 from routes import dependencies
+from services.batch_writer import BatchWriter
+from services.blocking_calls import BlockingCallRunner
+from services.price_cache import PriceCache
 
 router = APIRouter()
 
+# yfinance requests run off the event loop, at most two per symbol at a time
+_blocking_calls = BlockingCallRunner(max_workers=8, per_key_limit=2, timeout=15.0)
+
+# Current prices shared by all requests, refreshed in bulk once a minute
+_price_cache = PriceCache(_blocking_calls, ttl=60.0)
+
+
+def _fetch_history(symbol: str, period: str):
+    """Daily bars of a symbol (blocking)."""
+    import yfinance as yf
+    return yf.Ticker(symbol).history(period=period)
+
+
+def _fetch_news(symbol: str):
+    """Recent news items of a symbol (blocking)."""
+    import yfinance as yf
+    return yf.Ticker(symbol).news
+
+
+DAY_FORECAST_COLUMNS = (
+    'symbol', 'direction', 'confidence', 'target_price', 'stop_loss',
+    'current_price', 'predicted_price', 'price_change', 'volume_forecast',
+    'risk_score', 'signal_strength', 'technical_indicators', 'market_regime',
+    'volatility_forecast', 'key_events', 'macro_factors', 'fundamental_score',
+    'sentiment_score', 'horizon', 'valid_until'
+)
+
+SWING_FORECAST_COLUMNS = (
+    'symbol', 'direction', 'confidence', 'target_price', 'stop_loss',
+    'current_price', 'predicted_price', 'price_change', 'trend',
+    'support_level', 'resistance_level', 'risk_score', 'signal_strength',
+    'technical_indicators', 'market_regime', 'volume_forecast',
+    'volatility_forecast', 'key_events', 'macro_factors', 'fundamental_score',
+    'sentiment_score', 'horizon', 'valid_until'
+)
+
+# Background forecast generation jobs by job id (most recent _MAX_FORECAST_JOBS kept)
+_forecast_jobs: Dict[str, Dict[str, Any]] = {}
+_forecast_tasks: Dict[str, asyncio.Task] = {}
+_MAX_FORECAST_JOBS = 20
+
 
 @router.get("/forecasting/generate-all-forecasts")
-async def generate_all_forecasts_for_managed_symbols():
-    """Generate day and swing forecasts for all managed symbols."""
+async def generate_all_forecasts_for_managed_symbols(concurrency: int = 8, background: bool = False):
+    """
+    Generate day and swing forecasts for all managed symbols.
+    
+    Symbols are forecast concurrently, at most `concurrency` at a time, and the
+    forecasts are written in bulk. With background=true the endpoint returns a
+    job id right away; poll /forecasting/generate-all-forecasts/jobs/{job_id}
+    for progress and results.
+    """
     try:
         if not dependencies.db_pool:
             raise HTTPException(status_code=500, detail="Database not available")
@@ -27,138 +80,244 @@ async def generate_all_forecasts_for_managed_symbols():
                 ORDER BY priority DESC, symbol
             """)
             
-            if not managed_symbols:
-                return {"message": "No managed symbols found", "forecasts_generated": 0}
-            
-            forecasts_generated = 0
-            results = []
-            
-            for symbol_row in managed_symbols:
-                symbol = symbol_row['symbol']
-                
-                try:
-                    # Generate day forecast for end_of_day horizon
-                    day_forecast = await generate_day_forecast_for_symbol(symbol, "end_of_day")
-                    
-                    # Generate swing forecast for medium_swing horizon  
-                    swing_forecast = await generate_swing_forecast_for_symbol(symbol, "medium_swing")
-                    
-                    # Save day forecast to database
-                    try:
-                        await conn.execute("""
-                            INSERT INTO day_forecasts (
-                                symbol, direction, confidence, target_price, stop_loss,
-                                current_price, predicted_price, price_change, volume_forecast,
-                                risk_score, signal_strength, technical_indicators, market_regime,
-                                volatility_forecast, key_events, macro_factors, fundamental_score,
-                                sentiment_score, horizon, valid_until
-                            ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17, $18, $19, $20)
-                        """,
-                            day_forecast.get('symbol'),
-                            day_forecast.get('signal_type', day_forecast.get('direction')),
-                            float(day_forecast.get('confidence', 0)),
-                            float(day_forecast.get('target_price', 0)) if day_forecast.get('target_price') else None,
-                            float(day_forecast.get('stop_loss', 0)) if day_forecast.get('stop_loss') else None,
-                            float(day_forecast.get('current_price', 0)) if day_forecast.get('current_price') else None,
-                            float(day_forecast.get('predicted_price', 0)) if day_forecast.get('predicted_price') else None,
-                            float(day_forecast.get('price_change', 0)) if day_forecast.get('price_change') else None,
-                            str(day_forecast.get('volume_forecast')) if day_forecast.get('volume_forecast') else None,
-                            float(day_forecast.get('risk_score', 0)) if day_forecast.get('risk_score') else None,
-                            day_forecast.get('signal_strength'),
-                            json.dumps(day_forecast.get('technical_indicators', {})) if isinstance(day_forecast.get('technical_indicators'), dict) else day_forecast.get('technical_indicators'),
-                            day_forecast.get('market_regime'),
-                            str(day_forecast.get('volatility_forecast')) if day_forecast.get('volatility_forecast') else None,
-                            json.dumps(day_forecast.get('key_events', [])),
-                            json.dumps(day_forecast.get('macro_factors', {})),
-                            float(day_forecast.get('fundamental_score', 0)) if day_forecast.get('fundamental_score') else None,
-                            float(day_forecast.get('sentiment_score', 0)) if day_forecast.get('sentiment_score') else None,
-                            day_forecast.get('horizon'),
-                            datetime.fromisoformat(day_forecast.get('valid_until')) if day_forecast.get('valid_until') else None
-                        )
-                        logger.info(f"Saved day forecast for {symbol} to database")
-                    except Exception as save_error:
-                        logger.error(f"Error saving day forecast for {symbol}: {save_error}")
-                    
-                    # Save swing forecast to database
-                    try:
-                        await conn.execute("""
-                            INSERT INTO swing_forecasts (
-                                symbol, direction, confidence, target_price, stop_loss,
-                                current_price, predicted_price, price_change, trend,
-                                support_level, resistance_level, risk_score, signal_strength,
-                                technical_indicators, market_regime, volume_forecast,
-                                volatility_forecast, key_events, macro_factors, fundamental_score,
-                                sentiment_score, horizon, valid_until
-                            ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17, $18, $19, $20, $21, $22, $23)
-                        """,
-                            swing_forecast.get('symbol'),
-                            swing_forecast.get('signal_type', swing_forecast.get('direction')),
-                            float(swing_forecast.get('confidence', 0)),
-                            float(swing_forecast.get('target_price', 0)) if swing_forecast.get('target_price') else None,
-                            float(swing_forecast.get('stop_loss', 0)) if swing_forecast.get('stop_loss') else None,
-                            float(swing_forecast.get('current_price', 0)) if swing_forecast.get('current_price') else None,
-                            float(swing_forecast.get('predicted_price', 0)) if swing_forecast.get('predicted_price') else None,
-                            float(swing_forecast.get('price_change', 0)) if swing_forecast.get('price_change') else None,
-                            swing_forecast.get('trend'),
-                            float(swing_forecast.get('support_level', 0)) if swing_forecast.get('support_level') else None,
-                            float(swing_forecast.get('resistance_level', 0)) if swing_forecast.get('resistance_level') else None,
-                            float(swing_forecast.get('risk_score', 0)) if swing_forecast.get('risk_score') else None,
-                            swing_forecast.get('signal_strength'),
-                            json.dumps(swing_forecast.get('technical_indicators', {})) if isinstance(swing_forecast.get('technical_indicators'), dict) else swing_forecast.get('technical_indicators'),
-                            swing_forecast.get('market_regime'),
-                            str(swing_forecast.get('volume_forecast')) if swing_forecast.get('volume_forecast') else None,
-                            str(swing_forecast.get('volatility_forecast')) if swing_forecast.get('volatility_forecast') else None,
-                            json.dumps(swing_forecast.get('key_events', [])),
-                            json.dumps(swing_forecast.get('macro_factors', {})),
-                            float(swing_forecast.get('fundamental_score', 0)) if swing_forecast.get('fundamental_score') else None,
-                            float(swing_forecast.get('sentiment_score', 0)) if swing_forecast.get('sentiment_score') else None,
-                            swing_forecast.get('horizon'),
-                            datetime.fromisoformat(swing_forecast.get('valid_until')) if swing_forecast.get('valid_until') else None
-                        )
-                        logger.info(f"Saved swing forecast for {symbol} to database")
-                    except Exception as save_error:
-                        logger.error(f"Error saving swing forecast for {symbol}: {save_error}")
-                    
-                    results.append({
-                        "symbol": symbol,
-                        "day_forecast": day_forecast,
-                        "swing_forecast": swing_forecast,
-                        "status": "success"
-                    })
-                    forecasts_generated += 2
-                    
-                except Exception as e:
-                    logger.error(f"Error generating forecasts for {symbol}: {e}")
-                    results.append({
-                        "symbol": symbol,
-                        "error": str(e),
-                        "status": "error"
-                    })
-            
+        if not managed_symbols:
+            return {"message": "No managed symbols found", "forecasts_generated": 0}
+        
+        symbols = [row['symbol'] for row in managed_symbols]
+        concurrency = max(1, min(concurrency, 64))
+        job = _create_forecast_job(symbols, concurrency)
+        
+        if background:
+            task = asyncio.create_task(_run_forecast_job(job, symbols, concurrency))
+            _forecast_tasks[job['job_id']] = task
+            task.add_done_callback(lambda _: _forecast_tasks.pop(job['job_id'], None))
             return {
-                "message": f"Generated forecasts for {len(managed_symbols)} managed symbols",
-                "forecasts_generated": forecasts_generated,
-                "symbols_processed": len(managed_symbols),
-                "results": results
+                "message": f"Generating forecasts for {len(symbols)} managed symbols in the background",
+                "job_id": job['job_id'],
+                "status": job['status'],
+                "symbols_total": len(symbols),
+                "status_url": f"/forecasting/generate-all-forecasts/jobs/{job['job_id']}"
             }
+        
+        await _run_forecast_job(job, symbols, concurrency)
+        if job['status'] == 'failed':
+            raise Exception(job['error'])
+        
+        return {
+            "message": f"Generated forecasts for {len(symbols)} managed symbols",
+            "status": job['status'],
+            "error": job['error'],
+            "forecasts_generated": job['forecasts_generated'],
+            "rows_written": job['rows_written'],
+            "rows_failed": job['rows_failed'],
+            "symbols_processed": len(symbols),
+            "results": job['results']
+        }
             
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in generate_all_forecasts_for_managed_symbols: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/forecasting/generate-all-forecasts/jobs/{job_id}")
+async def get_forecast_generation_job(job_id: str):
+    """Progress of a background forecast generation job (results once completed)."""
+    job = _forecast_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Forecast job {job_id} not found")
+    
+    status = {key: value for key, value in job.items() if key != 'results'}
+    status['progress'] = job['symbols_processed'] / job['symbols_total'] if job['symbols_total'] else 1.0
+    if job['status'] != 'running':
+        status['results'] = job['results']
+    return status
+
+
+def _create_forecast_job(symbols: List[str], concurrency: int) -> Dict[str, Any]:
+    """Register a forecast generation job, dropping the oldest finished jobs."""
+    job = {
+        "job_id": str(uuid.uuid4()),
+        "status": "running",
+        "symbols_total": len(symbols),
+        "symbols_processed": 0,
+        "symbols_failed": 0,
+        "forecasts_generated": 0,
+        "rows_written": 0,
+        "rows_failed": 0,
+        "concurrency": concurrency,
+        "started_at": datetime.now().isoformat(),
+        "finished_at": None,
+        "error": None,
+        "results": []
+    }
+    _forecast_jobs[job['job_id']] = job
+    
+    finished = [job_id for job_id, other in _forecast_jobs.items() if other['status'] != 'running']
+    for job_id in finished[:max(len(_forecast_jobs) - _MAX_FORECAST_JOBS, 0)]:
+        del _forecast_jobs[job_id]
+    
+    return job
+
+
+async def _run_forecast_job(job: Dict[str, Any], symbols: List[str], concurrency: int) -> None:
+    """Forecast all symbols with bounded concurrency and write the forecasts in bulk."""
+    slots = asyncio.Semaphore(concurrency)
+    writer = BatchWriter(dependencies.db_pool, flush_size=200)
+    
+    async def forecast_symbol(symbol: str) -> None:
+        async with slots:
+            try:
+                # Day forecast for end_of_day and swing forecast for medium_swing horizon
+                day_forecast, swing_forecast = await asyncio.gather(
+                    generate_day_forecast_for_symbol(symbol, "end_of_day"),
+                    generate_swing_forecast_for_symbol(symbol, "medium_swing")
+                )
+                
+                await writer.add('day_forecasts', DAY_FORECAST_COLUMNS, _day_forecast_record(day_forecast))
+                await writer.add('swing_forecasts', SWING_FORECAST_COLUMNS, _swing_forecast_record(swing_forecast))
+                
+                job['results'].append({
+                    "symbol": symbol,
+                    "day_forecast": day_forecast,
+                    "swing_forecast": swing_forecast,
+                    "status": "success"
+                })
+                job['forecasts_generated'] += 2
+                
+            except Exception as e:
+                logger.error(f"Error generating forecasts for {symbol}: {e}")
+                job['results'].append({
+                    "symbol": symbol,
+                    "error": str(e),
+                    "status": "error"
+                })
+                job['symbols_failed'] += 1
+            
+            job['symbols_processed'] += 1
+    
+    error = None
+    try:
+        await asyncio.gather(*(forecast_symbol(symbol) for symbol in symbols))
+        
+    except asyncio.CancelledError:
+        error = "Forecast generation was cancelled"
+        raise
+    
+    except Exception as e:
+        logger.error(f"Forecast generation job {job['job_id']} failed: {e}")
+        error = str(e)
+    
+    finally:
+        # Always stop the writer's background flush task, even when the request is cancelled
+        try:
+            await writer.close()
+        except Exception as e:
+            logger.error(f"Failed to flush forecasts of job {job['job_id']}: {e}")
+        _finish_forecast_job(job, symbols, writer, error)
+
+
+def _finish_forecast_job(job: Dict[str, Any], symbols: List[str], writer: BatchWriter, error: Optional[str]) -> None:
+    """Record what a forecast job saved and set its final status."""
+    stats = writer.get_stats()
+    job['rows_written'] = stats['rows_written']
+    job['rows_failed'] = stats['rows_failed'] + stats['rows_pending']
+    
+    # Symbols whose forecasts were generated but not saved
+    unsaved = {record[0] for _, record in writer.failed_records}
+    for result in job['results']:
+        if result['status'] == 'success' and result['symbol'] in unsaved:
+            result['status'] = 'error'
+            result['error'] = "Forecast could not be saved to database"
+            job['symbols_failed'] += 1
+    
+    # Report results in managed symbol (priority) order
+    order = {symbol: i for i, symbol in enumerate(symbols)}
+    job['results'].sort(key=lambda result: order[result['symbol']])
+    
+    if error is None and job['rows_failed']:
+        error = f"Failed to save {job['rows_failed']} of {job['rows_written'] + job['rows_failed']} forecasts to database"
+    
+    if error is None:
+        job['status'] = 'completed'
+    elif job['rows_written']:
+        job['status'] = 'partial'
+    else:
+        job['status'] = 'failed'
+    job['error'] = error
+    job['finished_at'] = datetime.now().isoformat()
+    
+    log = logger.info if error is None else logger.error
+    log(f"Forecast job {job['job_id']} {job['status']}: saved {job['rows_written']} forecasts "
+        f"for {len(symbols)} managed symbols, {job['rows_failed']} failed")
+
+
+def _day_forecast_record(day_forecast: dict) -> tuple:
+    """day_forecasts row (DAY_FORECAST_COLUMNS order) of a generated day forecast."""
+    return (
+        day_forecast.get('symbol'),
+        day_forecast.get('signal_type', day_forecast.get('direction')),
+        float(day_forecast.get('confidence', 0)),
+        float(day_forecast.get('target_price', 0)) if day_forecast.get('target_price') else None,
+        float(day_forecast.get('stop_loss', 0)) if day_forecast.get('stop_loss') else None,
+        float(day_forecast.get('current_price', 0)) if day_forecast.get('current_price') else None,
+        float(day_forecast.get('predicted_price', 0)) if day_forecast.get('predicted_price') else None,
+        float(day_forecast.get('price_change', 0)) if day_forecast.get('price_change') else None,
+        str(day_forecast.get('volume_forecast')) if day_forecast.get('volume_forecast') else None,
+        float(day_forecast.get('risk_score', 0)) if day_forecast.get('risk_score') else None,
+        day_forecast.get('signal_strength'),
+        json.dumps(day_forecast.get('technical_indicators', {})) if isinstance(day_forecast.get('technical_indicators'), dict) else day_forecast.get('technical_indicators'),
+        day_forecast.get('market_regime'),
+        str(day_forecast.get('volatility_forecast')) if day_forecast.get('volatility_forecast') else None,
+        json.dumps(day_forecast.get('key_events', [])),
+        json.dumps(day_forecast.get('macro_factors', {})),
+        float(day_forecast.get('fundamental_score', 0)) if day_forecast.get('fundamental_score') else None,
+        float(day_forecast.get('sentiment_score', 0)) if day_forecast.get('sentiment_score') else None,
+        day_forecast.get('horizon'),
+        datetime.fromisoformat(day_forecast.get('valid_until')) if day_forecast.get('valid_until') else None
+    )
+
+
+def _swing_forecast_record(swing_forecast: dict) -> tuple:
+    """swing_forecasts row (SWING_FORECAST_COLUMNS order) of a generated swing forecast."""
+    return (
+        swing_forecast.get('symbol'),
+        swing_forecast.get('signal_type', swing_forecast.get('direction')),
+        float(swing_forecast.get('confidence', 0)),
+        float(swing_forecast.get('target_price', 0)) if swing_forecast.get('target_price') else None,
+        float(swing_forecast.get('stop_loss', 0)) if swing_forecast.get('stop_loss') else None,
+        float(swing_forecast.get('current_price', 0)) if swing_forecast.get('current_price') else None,
+        float(swing_forecast.get('predicted_price', 0)) if swing_forecast.get('predicted_price') else None,
+        float(swing_forecast.get('price_change', 0)) if swing_forecast.get('price_change') else None,
+        swing_forecast.get('trend'),
+        float(swing_forecast.get('support_level', 0)) if swing_forecast.get('support_level') else None,
+        float(swing_forecast.get('resistance_level', 0)) if swing_forecast.get('resistance_level') else None,
+        float(swing_forecast.get('risk_score', 0)) if swing_forecast.get('risk_score') else None,
+        swing_forecast.get('signal_strength'),
+        json.dumps(swing_forecast.get('technical_indicators', {})) if isinstance(swing_forecast.get('technical_indicators'), dict) else swing_forecast.get('technical_indicators'),
+        swing_forecast.get('market_regime'),
+        str(swing_forecast.get('volume_forecast')) if swing_forecast.get('volume_forecast') else None,
+        str(swing_forecast.get('volatility_forecast')) if swing_forecast.get('volatility_forecast') else None,
+        json.dumps(swing_forecast.get('key_events', [])),
+        json.dumps(swing_forecast.get('macro_factors', {})),
+        float(swing_forecast.get('fundamental_score', 0)) if swing_forecast.get('fundamental_score') else None,
+        float(swing_forecast.get('sentiment_score', 0)) if swing_forecast.get('sentiment_score') else None,
+        swing_forecast.get('horizon'),
+        datetime.fromisoformat(swing_forecast.get('valid_until')) if swing_forecast.get('valid_until') else None
+    )
+
+
 async def generate_day_forecast_for_symbol(symbol: str, horizon: str = "end_of_day"):
     """Helper function to generate day forecast for a specific symbol."""
     try:
-        import yfinance as yf
         import random
         import numpy as np
         
         logger.info(f"Generating day forecast for {symbol}")
         
         # Get real market data
-        ticker = yf.Ticker(symbol)
-        hist = ticker.history(period="5d")
+        hist = await _blocking_calls.run(symbol, _fetch_history, symbol, "5d")
         
         if hist.empty:
             raise Exception(f"No historical data available for {symbol}")
@@ -283,15 +442,13 @@ async def generate_day_forecast_for_symbol(symbol: str, horizon: str = "end_of_d
 async def generate_swing_forecast_for_symbol(symbol: str, horizon: str = "medium_swing"):
     """Helper function to generate swing forecast for a specific symbol."""
     try:
-        import yfinance as yf
         import random
         import numpy as np
         
         logger.info(f"Generating swing forecast for {symbol}")
         
         # Get more historical data for swing analysis
-        ticker = yf.Ticker(symbol)
-        hist = ticker.history(period="1mo")
+        hist = await _blocking_calls.run(symbol, _fetch_history, symbol, "1mo")
         
         if hist.empty:
             raise Exception(f"No historical data available for {symbol}")
@@ -631,7 +788,6 @@ async def get_day_forecast(symbol: str = "AAPL", horizon: str = "end_of_day"):
         
         # Get real sentiment analysis directly
         try:
-            import yfinance as yf
             import random
             import numpy as np
             
@@ -639,8 +795,7 @@ async def get_day_forecast(symbol: str = "AAPL", horizon: str = "end_of_day"):
             
             # Get real news data from Yahoo Finance (with rate limiting protection)
             try:
-                ticker = yf.Ticker(symbol)
-                news_data = ticker.news
+                news_data = await _blocking_calls.run(symbol, _fetch_news, symbol)
             except Exception as yf_error:
                 logger.warning(f"Yahoo Finance rate limited for {symbol}: {yf_error}")
                 news_data = None
@@ -1046,23 +1201,8 @@ async def get_advanced_forecasts_for_all_symbols():
             if not managed_symbols:
                 return {"message": "No managed symbols found", "forecasts": []}
             
-            advanced_forecasts = []
-            
-            for symbol_row in managed_symbols:
-                symbol = symbol_row['symbol']
-                
-                try:
-                    # Build comprehensive advanced forecast from all agent systems
-                    forecast = await _build_advanced_forecast_for_symbol(symbol, conn)
-                    advanced_forecasts.append(forecast)
-                    
-                except Exception as e:
-                    logger.error(f"Error generating advanced forecast for {symbol}: {e}")
-                    advanced_forecasts.append({
-                        "symbol": symbol,
-                        "status": "error",
-                        "error": str(e)
-                    })
+            # Build comprehensive advanced forecasts from all agent systems
+            advanced_forecasts = await _build_advanced_forecasts([row['symbol'] for row in managed_symbols], conn)
             
             return {
                 "forecasts": advanced_forecasts,
@@ -1083,74 +1223,128 @@ async def get_advanced_forecasts_for_all_symbols():
 
 async def _build_advanced_forecast_for_symbol(symbol: str, conn):
     """Build comprehensive advanced forecast from all agent data."""
-    try:
-        # Get current market price
-        import yfinance as yf
-        ticker = yf.Ticker(symbol)
-        hist = ticker.history(period="1d")
-        current_price = float(hist['Close'].iloc[-1]) if not hist.empty else 100.0
-        
-        # 1. Get predictions from all 10 individual agents
-        agent_signals = await conn.fetch("""
-            SELECT agent_name, signal_type, confidence, reasoning, timestamp
-            FROM agent_signals
-            WHERE symbol = $1
-            AND timestamp >= NOW() - INTERVAL '2 hours'
-            ORDER BY timestamp DESC
-        """, symbol)
-        
-        # 2. Get ensemble signal (blended from all agents)
-        ensemble_signal = await conn.fetchrow("""
-            SELECT signal_type, blended_confidence as confidence, quality_score, contributors, created_at as timestamp
-            FROM ensemble_signals
-            WHERE symbol = $1
-            AND created_at >= NOW() - INTERVAL '2 hours'
-            ORDER BY created_at DESC
-            LIMIT 1
-        """, symbol)
-        
-        # 3. Get RAG Event Agent analysis (if exists)
-        rag_analysis = await conn.fetchrow("""
-            SELECT analysis_type as event_type, confidence as impact_score, 
-                   confidence as sentiment_score, llm_response as key_events, 
-                   reasoning as analysis_summary, created_at as timestamp
-            FROM rag_analysis
-            WHERE created_at >= NOW() - INTERVAL '24 hours'
-            ORDER BY created_at DESC
-            LIMIT 1
-        """)
-        
-        # 4. Get RL Strategy Agent recommendation (if exists)
-        rl_action = await conn.fetchrow("""
-            SELECT action_type, confidence, expected_return, 
-                   risk_score, action_reasoning as reasoning, created_at as timestamp
-            FROM rl_actions
-            WHERE symbol = $1
-            AND created_at >= NOW() - INTERVAL '2 hours'
-            ORDER BY created_at DESC
-            LIMIT 1
-        """, symbol)
-        
-        # 5. Get Meta-Evaluation ranking (overall best agent)
-        meta_ranking = await conn.fetchrow("""
-            SELECT agent_name, composite_score as performance_score, rank, 
-                   accuracy as recent_accuracy, confidence as regime_fitness, created_at as timestamp
-            FROM meta_agent_rankings
-            WHERE created_at >= NOW() - INTERVAL '2 hours'
-            ORDER BY rank ASC
-            LIMIT 1
-        """)
-        
-        # 6. Get Latent Pattern insights (if exists)
-        latent_patterns = await conn.fetch("""
-            SELECT pattern_type, confidence, compression_method as trend_direction,
-                   explained_variance as pattern_strength, pattern_id as description, created_at as timestamp
-            FROM latent_patterns
-            WHERE created_at >= NOW() - INTERVAL '24 hours'
-            ORDER BY confidence DESC
-            LIMIT 3
-        """)
+    return (await _build_advanced_forecasts([symbol], conn))[0]
+
+
+async def _build_advanced_forecasts(symbols: List[str], conn) -> List[Dict[str, Any]]:
+    """
+    Build advanced forecasts for many symbols at once.
+    
+    All agent rows are read with one set-based query per table and grouped
+    in memory; current prices come from the shared price cache, fetched while
+    the queries run.
+    
+    Args:
+        symbols: Ticker symbols
+        conn: Database connection
         
+    Returns:
+        One forecast (or error entry) per symbol, in input order
+    """
+    price_task = asyncio.create_task(_price_cache.get_prices(symbols))
+    try:
+        rows = await _fetch_advanced_forecast_rows(symbols, conn)
+        prices = await price_task
+    except Exception as e:
+        price_task.cancel()
+        logger.error(f"Error loading advanced forecast data: {e}")
+        return [_advanced_forecast_error(symbol, e) for symbol in symbols]
+    
+    return [
+        _assemble_advanced_forecast(
+            symbol,
+            prices.get(symbol, 100.0),
+            rows['agent_signals'].get(symbol, []),
+            rows['ensemble_signals'].get(symbol),
+            rows['rag_analysis'],
+            rows['rl_actions'].get(symbol),
+            rows['meta_ranking'],
+            rows['latent_patterns']
+        )
+        for symbol in symbols
+    ]
+
+
+async def _fetch_advanced_forecast_rows(symbols: List[str], conn) -> Dict[str, Any]:
+    """Agent data of all symbols: per-symbol rows grouped by symbol, plus the shared rows."""
+    # 1. Get predictions from all 10 individual agents
+    agent_signal_rows = await conn.fetch("""
+        SELECT symbol, agent_name, signal_type, confidence, reasoning, timestamp
+        FROM agent_signals
+        WHERE symbol = ANY($1::text[])
+        AND timestamp >= NOW() - INTERVAL '2 hours'
+        ORDER BY symbol, timestamp DESC
+    """, symbols)
+    agent_signals: Dict[str, List[Any]] = {}
+    for row in agent_signal_rows:
+        agent_signals.setdefault(row['symbol'], []).append(row)
+    
+    # 2. Get latest ensemble signal (blended from all agents) per symbol
+    ensemble_signals = await conn.fetch("""
+        SELECT DISTINCT ON (symbol)
+               symbol, signal_type, blended_confidence as confidence, quality_score, contributors, created_at as timestamp
+        FROM ensemble_signals
+        WHERE symbol = ANY($1::text[])
+        AND created_at >= NOW() - INTERVAL '2 hours'
+        ORDER BY symbol, created_at DESC
+    """, symbols)
+    
+    # 3. Get RAG Event Agent analysis (if exists)
+    rag_analysis = await conn.fetchrow("""
+        SELECT analysis_type as event_type, confidence as impact_score, 
+               confidence as sentiment_score, llm_response as key_events, 
+               reasoning as analysis_summary, created_at as timestamp
+        FROM rag_analysis
+        WHERE created_at >= NOW() - INTERVAL '24 hours'
+        ORDER BY created_at DESC
+        LIMIT 1
+    """)
+    
+    # 4. Get latest RL Strategy Agent recommendation per symbol (if exists)
+    rl_actions = await conn.fetch("""
+        SELECT DISTINCT ON (symbol)
+               symbol, action_type, confidence, expected_return, 
+               risk_score, action_reasoning as reasoning, created_at as timestamp
+        FROM rl_actions
+        WHERE symbol = ANY($1::text[])
+        AND created_at >= NOW() - INTERVAL '2 hours'
+        ORDER BY symbol, created_at DESC
+    """, symbols)
+    
+    # 5. Get Meta-Evaluation ranking (overall best agent)
+    meta_ranking = await conn.fetchrow("""
+        SELECT agent_name, composite_score as performance_score, rank, 
+               accuracy as recent_accuracy, confidence as regime_fitness, created_at as timestamp
+        FROM meta_agent_rankings
+        WHERE created_at >= NOW() - INTERVAL '2 hours'
+        ORDER BY rank ASC
+        LIMIT 1
+    """)
+    
+    # 6. Get Latent Pattern insights (if exists)
+    latent_patterns = await conn.fetch("""
+        SELECT pattern_type, confidence, compression_method as trend_direction,
+               explained_variance as pattern_strength, pattern_id as description, created_at as timestamp
+        FROM latent_patterns
+        WHERE created_at >= NOW() - INTERVAL '24 hours'
+        ORDER BY confidence DESC
+        LIMIT 3
+    """)
+    
+    return {
+        'agent_signals': agent_signals,
+        'ensemble_signals': {row['symbol']: row for row in ensemble_signals},
+        'rag_analysis': rag_analysis,
+        'rl_actions': {row['symbol']: row for row in rl_actions},
+        'meta_ranking': meta_ranking,
+        'latent_patterns': latent_patterns
+    }
+
+
+def _assemble_advanced_forecast(symbol: str, current_price: float, agent_signals, ensemble_signal, rag_analysis,
+                                rl_action, meta_ranking, latent_patterns) -> Dict[str, Any]:
+    """Combine one symbol's agent data into an advanced forecast."""
+    try:
         # Process individual agent signals
         agent_contributions = []
         signal_votes = {"BUY": 0, "SELL": 0, "HOLD": 0}
@@ -1289,12 +1483,17 @@ async def _build_advanced_forecast_for_symbol(symbol: str, conn):
         logger.error(f"Error building advanced forecast for {symbol}: {e}")
         import traceback
         traceback.print_exc()
-        return {
-            "symbol": symbol,
-            "status": "error",
-            "error": str(e),
-            "timestamp": datetime.now().isoformat()
-        }
+        return _advanced_forecast_error(symbol, e)
+
+
+def _advanced_forecast_error(symbol: str, error: Exception) -> Dict[str, Any]:
+    """Error entry of a symbol whose advanced forecast could not be built."""
+    return {
+        "symbol": symbol,
+        "status": "error",
+        "error": str(error),
+        "timestamp": datetime.now().isoformat()
+    }
 
 
 # ============================================================================
@@ -0,0 +1,253 @@
+"""
+Batch Writer
+
+Groups rows destined for the same table and writes them in bulk: one pooled
+connection and one transaction per flush, with rows sent through COPY
+(`copy_records_to_table`) or, if COPY fails, a single `executemany` INSERT.
+Buffered rows are flushed when a table reaches `flush_size` rows, every
+`flush_interval` seconds, and on close. Writers wait (back-pressure) while
+more than `max_pending` rows are buffered.
+
+If a flush fails, each table is retried in its own transaction, and a table
+that still fails is written row by row, so one bad row only loses itself.
+"""
+
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+TableKey = Tuple[str, Tuple[str, ...]]  # (table, columns)
+
+
+class BatchWriter:
+    """Async bulk writer for asyncpg connection pools."""
+
+    def __init__(self, db_pool: asyncpg.Pool, flush_size: int = 500, flush_interval: float = 1.0,
+                 max_pending: int = 10000, use_copy: bool = True):
+        """
+        Initialize the writer.
+
+        Args:
+            db_pool: Database connection pool
+            flush_size: Rows per table that trigger a flush
+            flush_interval: Seconds between background flushes of buffered rows
+            max_pending: Buffered rows above which add() waits for a flush
+            use_copy: Write with COPY; otherwise with executemany INSERTs
+        """
+        self.db_pool = db_pool
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.use_copy = use_copy
+
+        self._pending: Dict[TableKey, List[Sequence[Any]]] = {}
+        self._pending_rows = 0
+        self._flush_lock = asyncio.Lock()
+        self._flusher: Optional[asyncio.Task] = None
+
+        # Statistics
+        self.rows_written = 0
+        self.rows_failed = 0
+        self.flushes = 0
+
+        # Most recent rows that could not be written, as (table, record)
+        self.failed_records: Deque[Tuple[str, Sequence[Any]]] = deque(maxlen=1000)
+
+    async def add(self, table: str, columns: Sequence[str], record: Sequence[Any]) -> None:
+        """
+        Buffer one row.
+
+        Args:
+            table: Target table
+            columns: Column names, in record order
+            record: Column values
+        """
+        await self.add_many(table, columns, [record])
+
+    async def add_many(self, table: str, columns: Sequence[str], records: Sequence[Sequence[Any]]) -> None:
+        """
+        Buffer rows for one table.
+
+        Args:
+            table: Target table
+            columns: Column names, in record order
+            records: Rows of column values
+        """
+        if not records:
+            return
+        self._ensure_flusher()
+
+        rows = self._pending.setdefault((table, tuple(columns)), [])
+        rows.extend(records)
+        self._pending_rows += len(records)
+
+        if self._pending_rows >= self.max_pending or len(rows) >= self.flush_size:
+            await self.flush()
+
+    async def write(self, table: str, columns: Sequence[str], records: Sequence[Sequence[Any]],
+                    before: Optional[Tuple[str, ...]] = None) -> bool:
+        """
+        Write rows immediately, in one transaction; rows the database rejects
+        are skipped and counted as failed.
+
+        Args:
+            table: Target table
+            columns: Column names, in record order
+            records: Rows of column values
+            before: SQL statements executed first in the same transaction
+
+        Returns:
+            True if every row was written
+        """
+        batches = [((table, tuple(columns)), list(records))]
+        async with self._flush_lock:
+            return await self._write_batches(batches, before or ())
+
+    async def flush(self) -> bool:
+        """
+        Write all buffered rows.
+
+        Returns:
+            True if every buffered row was written
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return True
+            batches = list(self._pending.items())
+            self._pending = {}
+            self._pending_rows = 0
+            return await self._write_batches(batches, ())
+
+    async def close(self) -> None:
+        """Stop background flushing and write the remaining rows."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Writer statistics."""
+        return {
+            'rows_written': self.rows_written,
+            'rows_failed': self.rows_failed,
+            'rows_pending': self._pending_rows,
+            'flushes': self.flushes
+        }
+
+    def _ensure_flusher(self) -> None:
+        """Start the background flush task if it is not running."""
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_periodically())
+
+    async def _flush_periodically(self) -> None:
+        """Flush buffered rows every flush_interval seconds."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Background flush failed: {e}")
+
+    async def _write_batches(self, batches: List[Tuple[TableKey, List[Sequence[Any]]]],
+                             before: Tuple[str, ...]) -> bool:
+        """
+        Write grouped rows in one transaction, narrowing down failures.
+
+        If the combined transaction fails, each (table, columns) group is
+        retried in its own transaction, and the rows of a group that still
+        fails are inserted one by one. `before` runs at the start of every
+        transaction.
+
+        Returns:
+            True if every row was written
+        """
+        if await self._write_transaction(batches, before):
+            return True
+
+        if len(batches) > 1:
+            logger.warning(f"Writing {len(batches)} tables together failed, retrying each table separately")
+            results = [await self._write_batches([batch], before) for batch in batches]
+            return all(results)
+
+        return await self._write_rows(*batches[0], before)
+
+    async def _write_transaction(self, batches: List[Tuple[TableKey, List[Sequence[Any]]]],
+                                 before: Tuple[str, ...]) -> bool:
+        """Write grouped rows in one transaction, retrying with executemany if COPY fails."""
+        total = sum(len(records) for _, records in batches)
+        methods = [True, False] if self.use_copy else [False]
+
+        for use_copy in methods:
+            try:
+                async with self.db_pool.acquire() as conn:
+                    async with conn.transaction():
+                        for statement in before:
+                            await conn.execute(statement)
+                        for (table, columns), records in batches:
+                            for start in range(0, len(records), self.flush_size):
+                                await self._write_records(conn, table, columns, records[start:start + self.flush_size],
+                                                          use_copy)
+                self.rows_written += total
+                self.flushes += 1
+                return True
+
+            except Exception as e:
+                if use_copy:
+                    logger.warning(f"COPY failed, retrying with INSERT: {e}")
+                else:
+                    logger.warning(f"Failed to write {total} rows in one transaction: {e}")
+
+        return False
+
+    async def _write_rows(self, key: TableKey, records: List[Sequence[Any]], before: Tuple[str, ...]) -> bool:
+        """Insert the rows of one table one by one, each under its own savepoint."""
+        table, columns = key
+        written = 0
+        failed: List[Sequence[Any]] = []
+        error: Optional[Exception] = None
+
+        try:
+            async with self.db_pool.acquire() as conn:
+                async with conn.transaction():
+                    for statement in before:
+                        await conn.execute(statement)
+                    for record in records:
+                        try:
+                            async with conn.transaction():
+                                await self._write_records(conn, table, columns, [record], use_copy=False)
+                            written += 1
+                        except Exception as e:
+                            failed.append(record)
+                            error = error or e
+        except Exception as e:
+            written, failed, error = 0, list(records), e
+
+        if failed:
+            logger.error(f"Failed to write {len(failed)} of {len(records)} rows to {table}: {error}")
+
+        self.rows_written += written
+        self.rows_failed += len(failed)
+        self.failed_records.extend((table, record) for record in failed)
+        self.flushes += 1
+        return not failed
+
+    @staticmethod
+    async def _write_records(conn: asyncpg.Connection, table: str, columns: Tuple[str, ...],
+                             records: List[Sequence[Any]], use_copy: bool) -> None:
+        """Write one chunk of rows."""
+        if use_copy:
+            await conn.copy_records_to_table(table, records=records, columns=list(columns))
+        else:
+            placeholders = ', '.join(f'${i}' for i in range(1, len(columns) + 1))
+            await conn.executemany(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", records
+            )
@@ -0,0 +1,131 @@
+"""
+Blocking Call Runner
+
+Runs synchronous calls (yfinance requests, pandas/ta computations) from async
+code without blocking the event loop. Calls execute in a bounded thread pool,
+at most `per_key_limit` at a time for the same key (usually a symbol), and
+callers stop waiting after a timeout.
+
+A call keeps its concurrency slots until its thread finishes, even after the
+caller timed out, so hung calls reduce the runner's capacity instead of piling
+up in the executor queue behind the slots.
+"""
+
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BlockingCallRunner:
+    """Bounded executor for blocking calls with per-key concurrency limits and timeouts."""
+
+    def __init__(self, max_workers: int = 8, per_key_limit: int = 2, timeout: Optional[float] = 30.0,
+                 executor: Optional[ThreadPoolExecutor] = None):
+        """
+        Initialize the runner.
+
+        Args:
+            max_workers: Maximum number of calls running at once; with an existing
+                executor it must not exceed the executor's threads, or calls queue
+                inside the executor where their timeout already runs
+            per_key_limit: Maximum number of calls running at once for the same key
+            timeout: Default seconds to wait for a call, including the wait for a
+                free slot (None waits indefinitely)
+            executor: Existing thread pool to run calls in (default: a new one with max_workers threads)
+        """
+        self.max_workers = max_workers
+        self.per_key_limit = per_key_limit
+        self.timeout = timeout
+        self.executor = executor or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='blocking-call')
+        threads = getattr(self.executor, '_max_workers', None)
+        if threads is not None and threads < max_workers:
+            logger.warning(f"BlockingCallRunner max_workers={max_workers} exceeds the executor's {threads} threads")
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._key_slots: Dict[Hashable, asyncio.Semaphore] = {}
+
+        # Statistics
+        self.calls = 0
+        self.timeouts = 0
+
+    async def run(self, key: Optional[Hashable], func: Callable[..., Any], *args,
+                  timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        Run a blocking call in the thread pool.
+
+        Args:
+            key: Concurrency key such as a symbol (None for no per-key limit)
+            func: Blocking callable
+            *args: Positional arguments for func
+            timeout: Seconds to wait for the call (default: the runner's timeout)
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            The call's result
+
+        Raises:
+            asyncio.TimeoutError: If no slot was free or the call did not finish
+                in time. The thread keeps running to completion and holds its
+                slots until then; only the caller stops waiting.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+        key_slots = self._key_slots.get(key) if key is not None else None
+        if key is not None and key_slots is None:
+            key_slots = self._key_slots[key] = asyncio.Semaphore(self.per_key_limit)
+
+        timeout = self.timeout if timeout is None else timeout
+        call = functools.partial(func, *args, **kwargs)
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+
+        held = []
+        try:
+            for slots in (key_slots, self._slots):
+                if slots is not None:
+                    await asyncio.wait_for(slots.acquire(), self._remaining(deadline, loop))
+                    held.append(slots)
+            self.calls += 1
+            future = loop.run_in_executor(self.executor, call)
+        except BaseException as e:
+            self._release(held)
+            if isinstance(e, asyncio.TimeoutError):
+                self._timed_out(func, key, timeout, 'waiting for a free slot')
+            raise
+
+        # Slots are freed when the thread finishes, not when the caller stops waiting
+        future.add_done_callback(functools.partial(self._release, held))
+        try:
+            # The shield keeps a timeout from cancelling the future, which would free its slots early
+            return await asyncio.wait_for(asyncio.shield(future), self._remaining(deadline, loop))
+        except asyncio.TimeoutError:
+            self._timed_out(func, key, timeout, 'running')
+            raise
+
+    def shutdown(self) -> None:
+        """Stop the thread pool without waiting for running calls."""
+        self.executor.shutdown(wait=False)
+
+    @staticmethod
+    def _remaining(deadline: Optional[float], loop: asyncio.AbstractEventLoop) -> Optional[float]:
+        """Seconds left until the deadline (None without one)."""
+        return None if deadline is None else max(deadline - loop.time(), 0.0)
+
+    @staticmethod
+    def _release(held: List[asyncio.Semaphore], future: Optional[asyncio.Future] = None) -> None:
+        """Free a call's slots once its thread is done."""
+        for slots in held:
+            slots.release()
+        if future is not None and not future.cancelled():
+            future.exception()  # retrieved here so a timed-out call's error is not reported as unhandled
+
+    def _timed_out(self, func: Callable[..., Any], key: Optional[Hashable], timeout: Optional[float],
+                   stage: str) -> None:
+        """Count and log a call the caller stopped waiting for."""
+        self.timeouts += 1
+        logger.warning(f"Blocking call {getattr(func, '__name__', func)} for {key} timed out after {timeout}s "
+                       f"({stage})")
+
@@ -13,12 +13,15 @@ from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional, Tuple
 import asyncpg
 import yfinance as yf
-import ta
 from dataclasses import dataclass
 import json
 import random
 from concurrent.futures import ThreadPoolExecutor
 
+from services.blocking_calls import BlockingCallRunner
+from services.batch_writer import BatchWriter
+from services.indicator_engine import compute_indicators
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -61,6 +64,10 @@ class EnsemblePerformance:
     change_percent: float
     trend: str
 
+def _fetch_history(symbol: str, period: str) -> pd.DataFrame:
+    """Daily bars of a symbol (blocking)."""
+    return yf.Ticker(symbol).history(period=period, interval="1d")
+
 class EnsembleBlenderService:
     """
     Service for Ensemble Signal Blender real data collection and analysis.
@@ -69,8 +76,13 @@ class EnsembleBlenderService:
     def __init__(self, db_pool: asyncpg.Pool):
         self.db_pool = db_pool
         self.executor = ThreadPoolExecutor(max_workers=4)
+        # yfinance and indicator calls run in the executor, one at a time per symbol
+        self.blocking_calls = BlockingCallRunner(max_workers=4, per_key_limit=1, timeout=20.0, executor=self.executor)
         self.is_running = False
         
+        # Buffered bulk writes of signals, weights and metrics
+        self.writer = BatchWriter(db_pool, flush_size=500, flush_interval=1.0)
+        
         # Available agents
         self.agents = [
             'ForecastAgent', 'MomentumAgent', 'VolatilityAgent', 'SentimentAgent',
@@ -107,6 +119,7 @@ class EnsembleBlenderService:
     async def stop_ensemble_blending(self):
         """Stop the ensemble signal blending process."""
         self.is_running = False
+        await self.writer.close()
         logger.info("Ensemble signal blending stopped")
     
     async def _collect_agent_signals(self):
@@ -143,6 +156,7 @@ class EnsembleBlenderService:
                 # Store updated weights
                 for weight in agent_weights:
                     await self._store_agent_weight(weight)
+                await self.writer.flush()
                 
                 logger.info(f"Updated weights for {len(agent_weights)} agents")
                 
@@ -157,24 +171,20 @@ class EnsembleBlenderService:
         """Generate blended ensemble signals."""
         while self.is_running:
             try:
-                # Get recent agent signals
-                agent_signals = await self._get_recent_agent_signals()
+                # Get all agent signals of the last hour
+                agent_signals = await self._get_recent_agent_signals(limit=None)
                 
                 if agent_signals:
-                    # Get current agent weights
+                    # Get current agent weights and regime
                     agent_weights = await self._get_current_agent_weights()
+                    regime = await self._get_current_regime()
                     
-                    # Generate ensemble signals for each symbol
-                    symbols = list(set([s['symbol'] for s in agent_signals]))
+                    # Blend all symbols at once (minimum 2 signals per symbol, lowered from 3)
+                    ensemble_signals = self._blend_signal_batch(agent_signals, agent_weights, regime, min_signals=2)
+                    await self._store_ensemble_signals(ensemble_signals)
+                    await self.writer.flush()
                     
-                    for symbol in symbols:
-                        symbol_signals = [s for s in agent_signals if s['symbol'] == symbol]
-                        
-                        if len(symbol_signals) >= 2:  # Need minimum 2 signals for blending (lowered from 3)
-                            ensemble_signal = await self._blend_signals(symbol_signals, agent_weights, symbol)
-                            await self._store_ensemble_signal(ensemble_signal)
-                    
-                    logger.info(f"Generated ensemble signals for {len(symbols)} symbols")
+                    logger.info(f"Generated ensemble signals for {len(ensemble_signals)} symbols")
                 
                 # Wait before next generation
                 await asyncio.sleep(120)  # 2 minutes
@@ -197,6 +207,7 @@ class EnsembleBlenderService:
                     # Store quality metrics
                     for metric in quality_metrics:
                         await self._store_quality_metric(metric)
+                    await self.writer.flush()
                     
                     logger.info(f"Calculated {len(quality_metrics)} quality metrics")
                 
@@ -294,8 +305,7 @@ class EnsembleBlenderService:
     async def _get_market_data(self, symbol: str) -> Optional[Dict]:
         """Get market data for a symbol."""
         try:
-            ticker = yf.Ticker(symbol)
-            hist = ticker.history(period="5d", interval="1d")
+            hist = await self.blocking_calls.run(symbol, _fetch_history, symbol, "5d")
             
             if not hist.empty:
                 return {
@@ -314,14 +324,13 @@ class EnsembleBlenderService:
     async def _get_extended_market_data(self, symbol: str) -> Optional[pd.DataFrame]:
         """Get extended market data for technical analysis."""
         try:
-            ticker = yf.Ticker(symbol)
-            hist = ticker.history(period="30d", interval="1d")
+            hist = await self.blocking_calls.run(symbol, _fetch_history, symbol, "30d")
             
             if hist.empty or len(hist) < 20:
                 return None
             
             # Add technical indicators
-            hist = self._add_technical_indicators(hist)
+            hist = await self.blocking_calls.run(symbol, self._add_technical_indicators, hist)
             return hist
             
         except Exception as e:
@@ -331,35 +340,33 @@ class EnsembleBlenderService:
     def _add_technical_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
         """Add technical indicators to market data."""
         try:
-            # RSI
-            df['rsi'] = ta.momentum.RSIIndicator(df['Close']).rsi()
+            indicators = compute_indicators(df)
             
-            # MACD
-            macd = ta.trend.MACD(df['Close'])
-            df['macd'] = macd.macd()
-            df['macd_signal'] = macd.macd_signal()
-            df['macd_histogram'] = macd.macd_diff()
+            # RSI and MACD
+            df['rsi'] = indicators['rsi']
+            df['macd'] = indicators['macd']
+            df['macd_signal'] = indicators['macd_signal']
+            df['macd_histogram'] = indicators['macd_histogram']
             
             # Bollinger Bands
-            bb = ta.volatility.BollingerBands(df['Close'])
-            df['bb_upper'] = bb.bollinger_hband()
-            df['bb_middle'] = bb.bollinger_mavg()
-            df['bb_lower'] = bb.bollinger_lband()
-            df['bb_width'] = (df['bb_upper'] - df['bb_lower']) / df['bb_middle']
+            df['bb_upper'] = indicators['bb_upper']
+            df['bb_middle'] = indicators['bb_middle']
+            df['bb_lower'] = indicators['bb_lower']
+            df['bb_width'] = indicators['bb_width']
             
             # Moving Averages
-            df['sma_20'] = ta.trend.SMAIndicator(df['Close'], window=20).sma_indicator()
-            df['sma_50'] = ta.trend.SMAIndicator(df['Close'], window=50).sma_indicator()
-            df['ema_12'] = ta.trend.EMAIndicator(df['Close'], window=12).ema_indicator()
-            df['ema_26'] = ta.trend.EMAIndicator(df['Close'], window=26).ema_indicator()
+            df['sma_20'] = indicators['sma_20']
+            df['sma_50'] = indicators['sma_50']
+            df['ema_12'] = indicators['ema_12']
+            df['ema_26'] = indicators['ema_26']
             
             # Volume indicators
-            df['volume_sma'] = ta.volume.VolumeSMAIndicator(df['Close'], df['Volume']).volume_sma()
-            df['volume_ratio'] = df['Volume'] / df['volume_sma']
+            df['volume_sma'] = indicators['volume_sma']
+            df['volume_ratio'] = indicators['volume_ratio']
             
             # Volatility
-            df['volatility'] = df['Close'].pct_change().rolling(20).std()
-            df['atr'] = ta.volatility.AverageTrueRange(df['High'], df['Low'], df['Close']).average_true_range()
+            df['volatility'] = indicators['volatility_20']
+            df['atr'] = indicators['atr']
             
             # Price position
             df['price_vs_sma20'] = (df['Close'] - df['sma_20']) / df['sma_20']
@@ -1029,61 +1036,103 @@ class EnsembleBlenderService:
     
     async def _blend_signals(self, signals: List[Dict], weights: List[AgentWeight], symbol: str) -> EnsembleSignal:
         """Blend multiple agent signals into a single ensemble signal."""
-        # Create weight lookup
-        weight_lookup = {w.agent_name: w.weight for w in weights}
+        regime = await self._get_current_regime()
+        blended = self._blend_signal_batch([dict(s, symbol=symbol) for s in signals], weights, regime)
+        if blended:
+            return blended[0]
         
-        # Calculate weighted confidence
-        total_confidence = 0.0
-        total_weight = 0.0
+        return EnsembleSignal(
+            signal_id=f"ensemble_{symbol}_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            symbol=symbol,
+            signal_type='hold',
+            blended_confidence=0.5,
+            regime=regime,
+            blend_mode=random.choice(self.blend_modes),
+            quality_score=0.6,
+            contributors=[],
+            timestamp=datetime.now()
+        )
+    
+    def _blend_signal_batch(self, signals: List[Dict], weights: List[AgentWeight], regime: str,
+                            min_signals: int = 1) -> List[EnsembleSignal]:
+        """
+        Blend agent signals of many symbols into one ensemble signal per symbol.
+        
+        Signals are grouped once into symbol x agent matrices of summed
+        confidences, signal counts and signal-type votes; blended confidences
+        and weighted votes for all symbols are then matrix products with the
+        agent weight vector.
         
-        # Determine blend mode
-        blend_mode = random.choice(self.blend_modes)
+        Args:
+            signals: Agent signals with symbol, agent_name, signal_type and confidence
+            weights: Agent weights (agents without a weight count 0.1)
+            regime: Current market regime
+            min_signals: Minimum number of signals a symbol needs to be blended
+            
+        Returns:
+            Ensemble signals, one per blended symbol
+        """
+        if not signals:
+            return []
         
-        contributors = []
+        frame = pd.DataFrame(signals, columns=['symbol', 'agent_name', 'signal_type', 'confidence'])
+        frame = frame[frame.groupby('symbol', sort=False)['symbol'].transform('size') >= min_signals]
+        if frame.empty:
+            return []
         
-        for signal in signals:
-            weight = weight_lookup.get(signal['agent_name'], 0.1)
-            total_confidence += signal['confidence'] * weight
-            total_weight += weight
-            contributors.append(signal['agent_name'])
+        symbol_codes, symbols = pd.factorize(frame['symbol'])
+        agent_codes, agents = pd.factorize(frame['agent_name'])
+        vote_types = ['buy', 'sell', 'hold']
+        type_codes = pd.Categorical(frame['signal_type'].str.lower(), categories=vote_types).codes
+        n_symbols, n_agents = len(symbols), len(agents)
         
-        blended_confidence = total_confidence / total_weight if total_weight > 0 else 0.5
+        weight_lookup = {w.agent_name: w.weight for w in weights}
+        agent_weights = np.array([weight_lookup.get(agent, 0.1) for agent in agents], dtype=np.float64)
         
-        # Determine signal type based on weighted voting from individual agents
-        signal_votes = {'buy': 0.0, 'sell': 0.0, 'hold': 0.0}
+        # Symbol x agent confidence sums and signal counts
+        cells = symbol_codes * n_agents + agent_codes
+        confidence_sums = np.bincount(cells, weights=frame['confidence'].to_numpy(dtype=np.float64),
+                                      minlength=n_symbols * n_agents).reshape(n_symbols, n_agents)
+        signal_counts = np.bincount(cells, minlength=n_symbols * n_agents).reshape(n_symbols, n_agents)
         
-        for signal in signals:
-            weight = weight_lookup.get(signal['agent_name'], 0.1)
-            signal_type_agent = signal['signal_type'].lower()
-            if signal_type_agent in signal_votes:
-                signal_votes[signal_type_agent] += weight
+        # Weighted confidence of every symbol
+        total_confidence = confidence_sums @ agent_weights
+        total_weight = signal_counts @ agent_weights
+        blended_confidence = np.divide(total_confidence, total_weight, out=np.full(n_symbols, 0.5),
+                                       where=total_weight > 0)
         
-        # Find the signal type with highest weighted vote
-        signal_type = max(signal_votes, key=signal_votes.get)
+        # Weighted signal-type votes (ties resolve in buy, sell, hold order)
+        voted = type_codes >= 0
+        votes = np.bincount(symbol_codes[voted] * len(vote_types) + type_codes[voted],
+                            weights=agent_weights[agent_codes[voted]],
+                            minlength=n_symbols * len(vote_types)).reshape(n_symbols, len(vote_types))
+        signal_types = np.array(vote_types, dtype=object)[votes.argmax(axis=1)]
         
         # Adjust for strong signals based on confidence and consensus
-        if signal_type == 'buy' and blended_confidence >= 0.8:
-            signal_type = 'strong_buy'
-        elif signal_type == 'sell' and blended_confidence <= 0.2:
-            signal_type = 'strong_sell'
+        signal_types[(signal_types == 'buy') & (blended_confidence >= 0.8)] = 'strong_buy'
+        signal_types[(signal_types == 'sell') & (blended_confidence <= 0.2)] = 'strong_sell'
         
-        # Calculate quality score
-        quality_score = min(blended_confidence * 1.2, 1.0)
+        # Calculate quality scores
+        quality_scores = np.minimum(blended_confidence * 1.2, 1.0)
         
-        # Get current regime
-        regime = await self._get_current_regime()
+        contributors = frame.groupby(symbol_codes, sort=True)['agent_name'].agg(list)
+        timestamp = datetime.now()
+        signal_suffix = timestamp.strftime('%Y%m%d_%H%M%S')
         
-        return EnsembleSignal(
-            signal_id=f"ensemble_{symbol}_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
-            symbol=symbol,
-            signal_type=signal_type,
-            blended_confidence=blended_confidence,
-            regime=regime,
-            blend_mode=blend_mode,
-            quality_score=quality_score,
-            contributors=contributors,
-            timestamp=datetime.now()
-        )
+        return [
+            EnsembleSignal(
+                signal_id=f"ensemble_{symbol}_{signal_suffix}",
+                symbol=symbol,
+                signal_type=signal_types[i],
+                blended_confidence=float(blended_confidence[i]),
+                regime=regime,
+                blend_mode=random.choice(self.blend_modes),
+                quality_score=float(quality_scores[i]),
+                contributors=contributors.iloc[i],
+                timestamp=timestamp
+            )
+            for i, symbol in enumerate(symbols)
+        ]
     
     async def _compute_quality_metrics(self, signals: List[Dict]) -> List[SignalQuality]:
         """Compute quality metrics for ensemble signals."""
@@ -1129,76 +1178,70 @@ class EnsembleBlenderService:
         return metrics
     
     async def _store_agent_signal(self, signal: Dict[str, Any]):
-        """Store individual agent signal in database."""
+        """Queue an individual agent signal for storage."""
         try:
-            async with self.db_pool.acquire() as conn:
-                await conn.execute("""
-                    INSERT INTO ensemble_agent_signals (
-                        signal_id, agent_name, symbol, signal_type,
-                        confidence, regime, created_at
-                    ) VALUES ($1, $2, $3, $4, $5, $6, $7)
-                """, 
-                    signal['signal_id'], signal['agent_name'], signal['symbol'],
-                    signal['signal_type'], signal['confidence'], signal['regime'],
-                    signal['created_at']
-                )
+            await self.writer.add(
+                'ensemble_agent_signals',
+                ('signal_id', 'agent_name', 'symbol', 'signal_type', 'confidence', 'regime', 'created_at'),
+                (signal['signal_id'], signal['agent_name'], signal['symbol'],
+                 signal['signal_type'], signal['confidence'], signal['regime'],
+                 signal['created_at'])
+            )
                 
         except Exception as e:
             logger.error(f"Error storing agent signal: {e}")
     
     async def _store_agent_weight(self, weight: AgentWeight):
-        """Store agent weight in database."""
+        """Queue an agent weight for storage."""
         try:
-            async with self.db_pool.acquire() as conn:
-                await conn.execute("""
-                    INSERT INTO ensemble_agent_weights (
-                        agent_name, weight, regime_fit, performance_score, created_at
-                    ) VALUES ($1, $2, $3, $4, $5)
-                """,
-                    weight.agent_name, weight.weight, weight.regime_fit,
-                    weight.performance_score, weight.last_updated
-                )
+            await self.writer.add(
+                'ensemble_agent_weights',
+                ('agent_name', 'weight', 'regime_fit', 'performance_score', 'created_at'),
+                (weight.agent_name, weight.weight, weight.regime_fit,
+                 weight.performance_score, weight.last_updated)
+            )
                 
         except Exception as e:
             logger.error(f"Error storing agent weight: {e}")
     
     async def _store_ensemble_signal(self, signal: EnsembleSignal):
-        """Store ensemble signal in database."""
+        """Queue an ensemble signal for storage."""
+        await self._store_ensemble_signals([signal])
+    
+    async def _store_ensemble_signals(self, signals: List[EnsembleSignal]):
+        """Queue ensemble signals for storage."""
         try:
-            async with self.db_pool.acquire() as conn:
-                await conn.execute("""
-                    INSERT INTO ensemble_signals (
-                        signal_id, symbol, signal_type, blended_confidence,
-                        regime, blend_mode, quality_score, contributors, created_at
-                    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
-                """,
-                    signal.signal_id, signal.symbol, signal.signal_type,
-                    signal.blended_confidence, signal.regime, signal.blend_mode,
-                    signal.quality_score, json.dumps(signal.contributors),
-                    signal.timestamp
-                )
+            await self.writer.add_many(
+                'ensemble_signals',
+                ('signal_id', 'symbol', 'signal_type', 'blended_confidence',
+                 'regime', 'blend_mode', 'quality_score', 'contributors', 'created_at'),
+                [
+                    (signal.signal_id, signal.symbol, signal.signal_type,
+                     signal.blended_confidence, signal.regime, signal.blend_mode,
+                     signal.quality_score, json.dumps(signal.contributors),
+                     signal.timestamp)
+                    for signal in signals
+                ]
+            )
                 
         except Exception as e:
-            logger.error(f"Error storing ensemble signal: {e}")
+            logger.error(f"Error storing ensemble signals: {e}")
     
     async def _store_quality_metric(self, metric: SignalQuality):
-        """Store quality metric in database."""
+        """Queue a quality metric for storage."""
         try:
-            async with self.db_pool.acquire() as conn:
-                await conn.execute("""
-                    INSERT INTO ensemble_quality_metrics (
-                        metric_name, value, threshold, status, trend, created_at
-                    ) VALUES ($1, $2, $3, $4, $5, $6)
-                """,
-                    metric.metric_name, metric.value, metric.threshold,
-                    metric.status, metric.trend, datetime.now()
-                )
+            await self.writer.add(
+                'ensemble_quality_metrics',
+                ('metric_name', 'value', 'threshold', 'status', 'trend', 'created_at'),
+                (metric.metric_name, metric.value, metric.threshold,
+                 metric.status, metric.trend, datetime.now())
+            )
                 
         except Exception as e:
             logger.error(f"Error storing quality metric: {e}")
     
-    async def _get_recent_agent_signals(self, limit: int = 100) -> List[Dict[str, Any]]:
-        """Get recent agent signals from database (from individual agents)."""
+    async def _get_recent_agent_signals(self, limit: Optional[int] = 100) -> List[Dict[str, Any]]:
+        """Get recent agent signals from database (from individual agents); limit None returns all."""
         try:
             async with self.db_pool.acquire() as conn:
                 # Pull signals from agent_signals table (populated by IndividualAgentService)
@@ -0,0 +1,758 @@
+"""
+Technical Indicator Engine
+
+One implementation of the technical indicators used across the agents and
+services (SMA, EMA, RSI, MACD, Bollinger Bands, volatility, ATR, stochastic
+oscillator, Williams %R, CCI, volume and momentum), in two modes:
+
+- Batch: `compute_indicators` computes every indicator over a whole OHLCV
+  frame with vectorized pandas/NumPy operations, for backfills and feature
+  tables.
+- Streaming: `IndicatorState` keeps running sums, ring buffers and EMA
+  recursions for one bar series and updates every indicator in O(1) per bar
+  (CCI in O(cci_period)). `IndicatorEngine` keeps one state per symbol,
+  seeds it from a batch backfill and afterwards only streams new bars.
+
+Both modes share the same definitions: simple rolling means, pandas
+`ewm(span=...).mean()` EMAs (adjust=True), simple-average RSI and sample
+standard deviations. Indicators are NaN until their window is filled.
+"""
+
+import copy
+import logging
+import math
+from collections import deque
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDICATOR_CONFIG = {
+    'sma_windows': (5, 10, 20, 50),
+    'ema_spans': (5, 10, 12, 20, 26),
+    'rsi_period': 14,
+    'macd_fast': 12,
+    'macd_slow': 26,
+    'macd_signal': 9,
+    'bollinger_window': 20,
+    'bollinger_std': 2.0,
+    'volatility_windows': (5, 20),
+    'atr_period': 14,
+    'stochastic_period': 14,
+    'stochastic_smoothing': 3,
+    'cci_period': 20,
+    'volume_window': 20,
+    'momentum_periods': (5, 10),
+}
+
+
+class RingBuffer:
+    """
+    Fixed-capacity ring of floats.
+    """
+
+    def __init__(self, capacity: int):
+        """
+        Initialize an empty ring.
+
+        Args:
+            capacity: Number of values kept
+        """
+        self.capacity = capacity
+        self._values = np.zeros(capacity, dtype=np.float64)
+        self._next = 0
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, value: float) -> Optional[float]:
+        """
+        Append a value.
+
+        Returns:
+            The value pushed out of the ring, or None while it is filling
+        """
+        evicted = self._values[self._next] if self.count == self.capacity else None
+        self._values[self._next] = value
+        self._next = (self._next + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        return evicted
+
+    def last(self, n: int = 1) -> float:
+        """The n-th most recent value (1 is the newest)."""
+        return self._values[(self._next - n) % self.capacity]
+
+    def to_array(self) -> np.ndarray:
+        """Values from oldest to newest."""
+        if self.count < self.capacity:
+            return self._values[:self.count].copy()
+        return np.concatenate([self._values[self._next:], self._values[:self._next]])
+
+    def clear(self) -> None:
+        """Remove all values."""
+        self._next = 0
+        self.count = 0
+
+
+class RollingWindow:
+    """
+    Running mean and sample standard deviation over the last `window` values.
+
+    NaN values occupy a slot but are left out of the sums; `valid` tells
+    whether the window is full and NaN-free (pandas `rolling(window)` semantics).
+    """
+
+    def __init__(self, window: int):
+        """
+        Initialize an empty window.
+
+        Args:
+            window: Number of values in the window
+        """
+        self.window = window
+        self._ring = RingBuffer(window)
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._nan_count = 0
+
+    def __len__(self) -> int:
+        return len(self._ring)
+
+    @property
+    def full(self) -> bool:
+        return len(self._ring) == self.window
+
+    @property
+    def valid(self) -> bool:
+        return self.full and not self._nan_count
+
+    @property
+    def mean(self) -> float:
+        n = len(self._ring) - self._nan_count
+        return self._sum / n if n else 0.0
+
+    @property
+    def std(self) -> float:
+        """Sample standard deviation (ddof=1)."""
+        n = len(self._ring) - self._nan_count
+        if n < 2:
+            return float('nan')
+        variance = (self._sum_sq - self._sum * self._sum / n) / (n - 1)
+        return math.sqrt(max(variance, 0.0))
+
+    def update(self, value: float) -> None:
+        """Add a value, dropping the oldest once the window is full."""
+        evicted = self._ring.append(value)
+        if value != value:
+            self._nan_count += 1
+        else:
+            self._sum += value
+            self._sum_sq += value * value
+        if evicted is not None:
+            if evicted != evicted:
+                self._nan_count -= 1
+            else:
+                self._sum -= evicted
+                self._sum_sq -= evicted * evicted
+
+        # Recompute the sums once per pass over the ring so rounding errors don't accumulate
+        if self._ring._next == 0:
+            values = self._ring._values[~np.isnan(self._ring._values)]
+            self._sum = float(values.sum())
+            self._sum_sq = float(np.dot(values, values))
+
+    def to_array(self) -> np.ndarray:
+        """Values from oldest to newest."""
+        return self._ring.to_array()
+
+    def clear(self) -> None:
+        """Remove all values."""
+        self._ring.clear()
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._nan_count = 0
+
+
+class RollingExtreme:
+    """
+    Running maximum (or minimum) of the last `window` values, amortized O(1) per update.
+    """
+
+    def __init__(self, window: int, maximum: bool = True):
+        """
+        Initialize an empty window.
+
+        Args:
+            window: Number of values in the window
+            maximum: Track the maximum (True) or the minimum (False)
+        """
+        self.window = window
+        self.maximum = maximum
+        self._candidates: deque = deque()  # (index, value), values monotonic
+        self._index = 0
+
+    @property
+    def full(self) -> bool:
+        return self._index >= self.window
+
+    @property
+    def value(self) -> float:
+        return self._candidates[0][1] if self._candidates else float('nan')
+
+    def update(self, value: float) -> None:
+        """Add a value, dropping the oldest once the window is full."""
+        candidates = self._candidates
+        if self.maximum:
+            while candidates and candidates[-1][1] <= value:
+                candidates.pop()
+        else:
+            while candidates and candidates[-1][1] >= value:
+                candidates.pop()
+        candidates.append((self._index, value))
+        if candidates[0][0] <= self._index - self.window:
+            candidates.popleft()
+        self._index += 1
+
+    def clear(self) -> None:
+        """Remove all values."""
+        self._candidates.clear()
+        self._index = 0
+
+
+class ExponentialMean:
+    """
+    Exponentially weighted mean, equal to pandas `ewm(span=span).mean()`.
+    """
+
+    def __init__(self, span: int):
+        """
+        Initialize an empty mean.
+
+        Args:
+            span: EWM span
+        """
+        self.decay = 1.0 - 2.0 / (span + 1.0)
+        self.clear()
+
+    @property
+    def value(self) -> float:
+        return self._weighted_sum / self._weight if self._weight else float('nan')
+
+    def update(self, value: float) -> None:
+        """Add a value."""
+        self._weighted_sum = value + self.decay * self._weighted_sum
+        self._weight = 1.0 + self.decay * self._weight
+
+    def load(self, value: float, count: int) -> None:
+        """Set the mean to `value`, as reached after `count` values."""
+        self._weight = (1.0 - self.decay ** count) / (1.0 - self.decay)
+        self._weighted_sum = value * self._weight
+
+    def clear(self) -> None:
+        """Forget all values."""
+        self._weighted_sum = 0.0
+        self._weight = 0.0
+
+
+def _ema_spans(config: Dict[str, Any]) -> Tuple[int, ...]:
+    """EMA spans needed by the configured indicators."""
+    return tuple(sorted(set(config['ema_spans']) | {config['macd_fast'], config['macd_slow']}))
+
+
+def _column(frame: pd.DataFrame, name: str) -> Optional[pd.Series]:
+    """Float column of an OHLCV frame by case-insensitive name, or None."""
+    for column in frame.columns:
+        if isinstance(column, str) and column.lower() == name:
+            return frame[column].astype(np.float64)
+    return None
+
+
+def _ohlcv(frame: pd.DataFrame) -> Tuple[pd.Series, pd.Series, pd.Series, pd.Series]:
+    """Close, high, low and volume of a frame; missing high/low fall back to close, volume to NaN."""
+    close = _column(frame, 'close')
+    if close is None:
+        raise ValueError("frame has no close column")
+    high = _column(frame, 'high')
+    low = _column(frame, 'low')
+    volume = _column(frame, 'volume')
+    return (close,
+            close if high is None else high,
+            close if low is None else low,
+            pd.Series(np.nan, index=frame.index) if volume is None else volume)
+
+
+def calculate_rsi(prices: pd.Series, period: int = 14) -> pd.Series:
+    """
+    Simple-average RSI.
+
+    Args:
+        prices: Price series
+        period: Number of price changes averaged
+
+    Returns:
+        RSI series (100 when there were no losses, 50 for a flat window)
+    """
+    delta = prices.diff()
+    gain = delta.clip(lower=0).rolling(period).mean().to_numpy()
+    loss = (-delta).clip(lower=0).rolling(period).mean().to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100.0 - 100.0 / (1.0 + gain / loss)
+    rsi = np.where(loss == 0, np.where(gain > 0, 100.0, 50.0), rsi)
+    return pd.Series(rsi, index=prices.index)
+
+
+def calculate_macd(prices: pd.Series, fast: int = 12, slow: int = 26,
+                   signal: int = 9) -> Tuple[pd.Series, pd.Series, pd.Series]:
+    """
+    MACD line, signal line and histogram.
+
+    Args:
+        prices: Price series
+        fast: Fast EMA span
+        slow: Slow EMA span
+        signal: Signal EMA span
+
+    Returns:
+        Tuple of (macd, signal, histogram) series
+    """
+    macd = prices.ewm(span=fast).mean() - prices.ewm(span=slow).mean()
+    macd_signal = macd.ewm(span=signal).mean()
+    return macd, macd_signal, macd - macd_signal
+
+
+def compute_indicators(frame: pd.DataFrame, config: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+    """
+    Compute every indicator over an OHLCV frame (batch mode).
+
+    Args:
+        frame: Bars with a close column and optionally high, low and volume
+            columns (any capitalization)
+        config: Indicator windows, merged with DEFAULT_INDICATOR_CONFIG
+
+    Returns:
+        DataFrame of indicators with the frame's index
+    """
+    config = {**DEFAULT_INDICATOR_CONFIG, **(config or {})}
+    close, high, low, volume = _ohlcv(frame)
+    previous = close.shift(1)
+    indicators: Dict[str, pd.Series] = {}
+
+    returns = close / previous - 1.0
+    indicators['returns'] = returns
+    with np.errstate(divide='ignore', invalid='ignore'):
+        indicators['log_returns'] = np.log(close / previous)
+
+    for window in config['sma_windows']:
+        indicators[f'sma_{window}'] = close.rolling(window).mean()
+    for span in _ema_spans(config):
+        indicators[f'ema_{span}'] = close.ewm(span=span).mean()
+
+    indicators['rsi'] = calculate_rsi(close, config['rsi_period'])
+
+    macd = indicators[f"ema_{config['macd_fast']}"] - indicators[f"ema_{config['macd_slow']}"]
+    macd_signal = macd.ewm(span=config['macd_signal']).mean()
+    indicators['macd'] = macd
+    indicators['macd_signal'] = macd_signal
+    indicators['macd_histogram'] = macd - macd_signal
+
+    middle = close.rolling(config['bollinger_window']).mean()
+    band = close.rolling(config['bollinger_window']).std() * config['bollinger_std']
+    indicators['bb_upper'] = middle + band
+    indicators['bb_middle'] = middle
+    indicators['bb_lower'] = middle - band
+    indicators['bb_width'] = (2.0 * band / middle).where(middle != 0)
+
+    for window in config['volatility_windows']:
+        indicators[f'volatility_{window}'] = returns.rolling(window).std()
+
+    true_range = pd.concat([high - low, (high - previous).abs(), (low - previous).abs()], axis=1).max(axis=1)
+    indicators['atr'] = true_range.rolling(config['atr_period']).mean()
+
+    highest = high.rolling(config['stochastic_period']).max()
+    lowest = low.rolling(config['stochastic_period']).min()
+    price_range = (highest - lowest).where(highest > lowest)
+    stoch_k = 100.0 * (close - lowest) / price_range
+    indicators['stoch_k'] = stoch_k
+    indicators['stoch_d'] = stoch_k.rolling(config['stochastic_smoothing']).mean()
+    indicators['williams_r'] = -100.0 * (highest - close) / price_range
+
+    period = config['cci_period']
+    typical = ((high + low + close) / 3.0).to_numpy()
+    cci = np.full(len(typical), np.nan)
+    if len(typical) >= period:
+        windows = np.lib.stride_tricks.sliding_window_view(typical, period)
+        window_mean = windows.mean(axis=1)
+        mean_deviation = np.abs(windows - window_mean[:, None]).mean(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cci[period - 1:] = np.where(mean_deviation > 0,
+                                        (typical[period - 1:] - window_mean) / (0.015 * mean_deviation), np.nan)
+    indicators['cci'] = pd.Series(cci, index=frame.index)
+
+    volume_sma = volume.rolling(config['volume_window']).mean()
+    indicators['volume_sma'] = volume_sma
+    indicators['volume_ratio'] = (volume / volume_sma).where(volume_sma > 0)
+
+    for lookback in config['momentum_periods']:
+        indicators[f'momentum_{lookback}'] = close / close.shift(lookback) - 1.0
+
+    return pd.DataFrame(indicators, index=frame.index)
+
+
+class IndicatorState:
+    """
+    Streaming indicators of one bar series, updated in O(1) per bar.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize an empty state.
+
+        Args:
+            config: Indicator windows, merged with DEFAULT_INDICATOR_CONFIG
+        """
+        self.config = {**DEFAULT_INDICATOR_CONFIG, **(config or {})}
+        config = self.config
+
+        self._closes = RingBuffer(max(config['momentum_periods']) + 1)
+        self._smas = {window: RollingWindow(window) for window in config['sma_windows']}
+        self._emas = {span: ExponentialMean(span) for span in _ema_spans(config)}
+        self._macd_signal = ExponentialMean(config['macd_signal'])
+        self._gains = RollingWindow(config['rsi_period'])
+        self._losses = RollingWindow(config['rsi_period'])
+        self._bollinger = RollingWindow(config['bollinger_window'])
+        self._returns = {window: RollingWindow(window) for window in config['volatility_windows']}
+        self._true_ranges = RollingWindow(config['atr_period'])
+        self._highest = RollingExtreme(config['stochastic_period'], maximum=True)
+        self._lowest = RollingExtreme(config['stochastic_period'], maximum=False)
+        self._stoch_k = RollingWindow(config['stochastic_smoothing'])
+        self._typical_prices = RollingWindow(config['cci_period'])
+        self._volumes = RollingWindow(config['volume_window'])
+
+        # Bars needed to refill every window when seeding from a backfill
+        self.replay_length = 1 + max(
+            *config['sma_windows'], config['bollinger_window'], config['rsi_period'] + 1,
+            *(window + 1 for window in config['volatility_windows']), config['atr_period'] + 1,
+            config['stochastic_period'] + config['stochastic_smoothing'], config['cci_period'],
+            config['volume_window'], max(config['momentum_periods']) + 1
+        )
+
+        self.count = 0
+        self.last_timestamp: Any = None
+        self.last_close = float('nan')
+        self._return = float('nan')
+        self._log_return = float('nan')
+        self._volume = float('nan')
+
+    def update(self, close: float, high: Optional[float] = None, low: Optional[float] = None,
+               volume: Optional[float] = None, timestamp: Any = None) -> None:
+        """
+        Add the next bar.
+
+        Args:
+            close: Closing price
+            high: High price (default: close)
+            low: Low price (default: close)
+            volume: Traded volume (default: unknown)
+            timestamp: Bar time, used to resume from a frame
+        """
+        high = close if high is None else high
+        low = close if low is None else low
+        volume = float('nan') if volume is None else volume
+
+        if self.count:
+            previous = self._closes.last()
+            delta = close - previous
+            self._gains.update(delta if delta > 0 else 0.0)
+            self._losses.update(-delta if delta < 0 else 0.0)
+            self._return = close / previous - 1.0 if previous else float('nan')
+            self._log_return = math.log(close / previous) if close > 0 and previous > 0 else float('nan')
+            for window in self._returns.values():
+                window.update(self._return)
+            true_range = max(high - low, abs(high - previous), abs(low - previous))
+        else:
+            true_range = high - low
+
+        self._closes.append(close)
+        for window in self._smas.values():
+            window.update(close)
+        for ema in self._emas.values():
+            ema.update(close)
+        self._macd_signal.update(self._macd())
+        self._bollinger.update(close)
+        self._true_ranges.update(true_range)
+
+        self._highest.update(high)
+        self._lowest.update(low)
+        self._stoch_k.update(self._stochastic()[0])
+
+        self._typical_prices.update((high + low + close) / 3.0)
+        self._volumes.update(volume)
+        self._volume = volume
+
+        self.count += 1
+        self.last_timestamp = timestamp
+        self.last_close = close
+
+    def values(self) -> Dict[str, float]:
+        """
+        Current indicator values, keyed like the columns of `compute_indicators`.
+
+        Returns:
+            Dictionary of indicator values (NaN where a window is not filled)
+        """
+        config = self.config
+        nan = float('nan')
+        values = {'returns': self._return, 'log_returns': self._log_return}
+
+        for window, sma in self._smas.items():
+            values[f'sma_{window}'] = _window_mean(sma)
+        for span, ema in self._emas.items():
+            values[f'ema_{span}'] = ema.value
+
+        if self._losses.valid:
+            gain, loss = self._gains.mean, self._losses.mean
+            values['rsi'] = (100.0 if gain > 0 else 50.0) if loss == 0 else 100.0 - 100.0 / (1.0 + gain / loss)
+        else:
+            values['rsi'] = nan
+
+        macd = self._macd()
+        values['macd'] = macd
+        values['macd_signal'] = self._macd_signal.value
+        values['macd_histogram'] = macd - self._macd_signal.value
+
+        middle = _window_mean(self._bollinger)
+        band = self._bollinger.std * config['bollinger_std'] if self._bollinger.valid else nan
+        values['bb_upper'] = middle + band
+        values['bb_middle'] = middle
+        values['bb_lower'] = middle - band
+        values['bb_width'] = 2.0 * band / middle if middle else nan
+
+        for window, returns in self._returns.items():
+            values[f'volatility_{window}'] = returns.std if returns.valid else nan
+
+        values['atr'] = _window_mean(self._true_ranges)
+
+        stoch_k, williams_r = self._stochastic()
+        values['stoch_k'] = stoch_k
+        values['stoch_d'] = _window_mean(self._stoch_k)
+        values['williams_r'] = williams_r
+
+        values['cci'] = nan
+        if self._typical_prices.valid:
+            typical = self._typical_prices.to_array()
+            mean = typical.mean()
+            mean_deviation = np.abs(typical - mean).mean()
+            if mean_deviation > 0:
+                values['cci'] = float((typical[-1] - mean) / (0.015 * mean_deviation))
+
+        volume_sma = _window_mean(self._volumes)
+        values['volume_sma'] = volume_sma
+        values['volume_ratio'] = self._volume / volume_sma if volume_sma > 0 else nan
+
+        for lookback in config['momentum_periods']:
+            values[f'momentum_{lookback}'] = (
+                self._closes.last() / self._closes.last(lookback + 1) - 1.0 if self.count > lookback else nan
+            )
+
+        return values
+
+    def copy(self) -> 'IndicatorState':
+        """Independent copy of the state."""
+        return copy.deepcopy(self)
+
+    def _macd(self) -> float:
+        return self._emas[self.config['macd_fast']].value - self._emas[self.config['macd_slow']].value
+
+    def _stochastic(self) -> Tuple[float, float]:
+        """Stochastic %K and Williams %R of the latest bar."""
+        if not self._highest.full:
+            return float('nan'), float('nan')
+        highest, lowest = self._highest.value, self._lowest.value
+        if highest <= lowest:
+            return float('nan'), float('nan')
+        close = self._closes.last()
+        price_range = highest - lowest
+        return 100.0 * (close - lowest) / price_range, -100.0 * (highest - close) / price_range
+
+
+def _window_mean(window: RollingWindow) -> float:
+    """Mean of a filled window, else NaN."""
+    return window.mean if window.valid else float('nan')
+
+
+class IndicatorEngine:
+    """
+    Per-symbol streaming indicators with vectorized backfills.
+
+    Callers hand the engine the bars they already fetched: `sync` streams only
+    the bars added since the previous call and treats a frame's last bar as
+    provisional (it may still change until the next bar arrives), so repeated
+    agent cycles cost O(new bars) instead of a full recomputation.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None, max_stream_bars: int = 500):
+        """
+        Initialize the engine.
+
+        Args:
+            config: Indicator windows, merged with DEFAULT_INDICATOR_CONFIG
+            max_stream_bars: New bars above which `sync` backfills instead of streaming
+        """
+        self.config = {**DEFAULT_INDICATOR_CONFIG, **(config or {})}
+        self.max_stream_bars = max_stream_bars
+        self._states: Dict[Hashable, IndicatorState] = {}
+        self._latest: Dict[Hashable, Dict[str, float]] = {}
+
+        # Statistics
+        self.bars_streamed = 0
+        self.backfills = 0
+
+    def update(self, key: Hashable, close: float, high: Optional[float] = None, low: Optional[float] = None,
+               volume: Optional[float] = None, timestamp: Any = None) -> Dict[str, float]:
+        """
+        Add one final bar to a symbol's state.
+
+        Args:
+            key: Symbol (or any key identifying the bar series)
+            close: Closing price
+            high: High price
+            low: Low price
+            volume: Traded volume
+            timestamp: Bar time
+
+        Returns:
+            Indicator values after the bar
+        """
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = IndicatorState(self.config)
+        state.update(close, high, low, volume, timestamp)
+        self.bars_streamed += 1
+        values = self._latest[key] = state.values()
+        return values
+
+    def backfill(self, key: Hashable, frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        Compute the indicators of a frame of final bars and seed the symbol's state from it.
+
+        Args:
+            key: Symbol (or any key identifying the bar series)
+            frame: OHLCV bars, oldest first
+
+        Returns:
+            DataFrame of indicators (see `compute_indicators`)
+        """
+        indicators = compute_indicators(frame, self.config)
+        self._seed(key, frame, indicators, len(frame))
+        if len(indicators):
+            self._latest[key] = indicators.iloc[-1].to_dict()
+        return indicators
+
+    def sync(self, key: Hashable, frame: pd.DataFrame) -> Dict[str, float]:
+        """
+        Bring a symbol's indicators up to date with a frame of recent bars.
+
+        Bars after the last committed bar are streamed. The frame is backfilled
+        instead without a usable state: on the first call, without a sorted
+        DatetimeIndex, when the committed bar is missing from the frame or its
+        close was revised, or with too many new bars.
+
+        Args:
+            key: Symbol (or any key identifying the bar series)
+            frame: OHLCV bars with a DatetimeIndex, oldest first
+
+        Returns:
+            Indicator values at the frame's last bar
+        """
+        if frame is None or frame.empty:
+            return {}
+
+        state = self._states.get(key)
+        start = self._resume_position(state, frame)
+
+        if start is None or len(frame) - start > self.max_stream_bars:
+            indicators = compute_indicators(frame, self.config)
+            self._seed(key, frame, indicators, len(frame) - 1)
+            values = indicators.iloc[-1].to_dict()
+
+        elif start == len(frame):
+            values = state.values()
+
+        else:
+            close, high, low, volume = (series.to_numpy() for series in _ohlcv(frame))
+            for i in range(start, len(frame) - 1):
+                state.update(close[i], high[i], low[i], volume[i], frame.index[i])
+            preview = state.copy()
+            preview.update(close[-1], high[-1], low[-1], volume[-1], frame.index[-1])
+            self.bars_streamed += len(frame) - start
+            values = preview.values()
+
+        self._latest[key] = values
+        return values
+
+    def latest(self, key: Hashable) -> Dict[str, float]:
+        """Indicator values of a symbol's latest bar (empty if unknown)."""
+        return self._latest.get(key, {})
+
+    def reset(self, key: Optional[Hashable] = None) -> None:
+        """Forget one symbol's state, or all states."""
+        if key is None:
+            self._states.clear()
+            self._latest.clear()
+        else:
+            self._states.pop(key, None)
+            self._latest.pop(key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Engine statistics."""
+        return {
+            'symbols': len(self._states),
+            'bars_streamed': self.bars_streamed,
+            'backfills': self.backfills
+        }
+
+    @staticmethod
+    def _resume_position(state: Optional[IndicatorState], frame: pd.DataFrame) -> Optional[int]:
+        """
+        Position of the first bar after the state's last committed bar, or None.
+
+        Bars are matched by time, so frames without a DatetimeIndex never
+        resume. The committed bar must also still have the close it was
+        streamed with; a revised close means the state is stale.
+        """
+        index = frame.index
+        if (state is None or state.last_timestamp is None or not isinstance(index, pd.DatetimeIndex)
+                or not index.is_monotonic_increasing):
+            return None
+        try:
+            position = index.searchsorted(state.last_timestamp, side='right')
+        except TypeError:
+            return None
+        if position == 0 or index[position - 1] != state.last_timestamp:
+            return None
+        closes = _column(frame, 'close')
+        if closes is None or not math.isclose(closes.iloc[position - 1], state.last_close, rel_tol=1e-9):
+            return None
+        return int(position)
+
+    def _seed(self, key: Hashable, frame: pd.DataFrame, indicators: pd.DataFrame, committed: int) -> None:
+        """Build a symbol's state from the first `committed` bars of a backfilled frame."""
+        state = IndicatorState(self.config)
+        if committed > 0:
+            close, high, low, volume = (series.to_numpy() for series in _ohlcv(frame))
+
+            # Rolling windows only depend on the latest bars; EMAs are restored from the backfill
+            for i in range(max(committed - state.replay_length, 0), committed):
+                state.update(close[i], high[i], low[i], volume[i])
+            row = indicators.iloc[committed - 1]
+            for span, ema in state._emas.items():
+                ema.load(row[f'ema_{span}'], committed)
+            state._macd_signal.load(row['macd_signal'], committed)
+            state.count = committed
+            state.last_timestamp = frame.index[committed - 1]
+
+        self._states[key] = state
+        self.backfills += 1
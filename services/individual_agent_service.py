@@ -17,10 +17,20 @@ import ta
 from dataclasses import dataclass
 import json
 import random
+import time
 from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+
+from services.blocking_calls import BlockingCallRunner
+from services.batch_writer import BatchWriter
 
 logger = logging.getLogger(__name__)
 
+AGENT_SIGNAL_COLUMNS = ('agent_name', 'symbol', 'signal_type', 'confidence', 'reasoning', 'metadata', 'timestamp')
+
+# Lookback periods used by the agents, in months of daily bars
+PERIOD_MONTHS = {'1mo': 1, '2mo': 2, '3mo': 3, '6mo': 6}
+
 @dataclass
 class AgentPrediction:
     """Represents a prediction from an individual agent."""
@@ -32,6 +42,131 @@ class AgentPrediction:
     metadata: Dict[str, Any]
     timestamp: datetime
 
+class MarketDataSnapshot:
+    """
+    Daily bars fetched once per agent cycle and shared read-only by all agents.
+    
+    The longest lookback any agent needs is downloaded for all symbols in one
+    bulk request when the cycle starts; agents then slice the period they need
+    from the shared frames. Symbols missing from the bulk download are fetched
+    individually on first use, once, however many agents ask for them.
+    """
+    
+    def __init__(self, runner: BlockingCallRunner, period: str = '6mo'):
+        self.runner = runner
+        self.period = period
+        self.bars: Dict[str, pd.DataFrame] = {}
+        self._pending: Dict[str, asyncio.Task] = {}
+        
+        # Cycle statistics
+        self.hits = 0
+        self.misses = 0
+        self.bulk_requests = 0
+        self.single_requests = 0
+        self.fetch_seconds = 0.0
+    
+    async def load(self, symbols: List[str]) -> None:
+        """Bulk-download bars for all symbols."""
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return
+        
+        start = time.perf_counter()
+        try:
+            self.bulk_requests += 1
+            self.bars.update(await self.runner.run(None, self._download, symbols, timeout=self.runner.timeout * 2))
+        except Exception as e:
+            logger.warning(f"Bulk market data download failed, falling back to per-symbol requests: {e}")
+        finally:
+            self.fetch_seconds += time.perf_counter() - start
+        
+        logger.info(f"📦 Market data snapshot: {len(self.bars)}/{len(symbols)} symbols in {self.fetch_seconds:.2f}s")
+    
+    async def history(self, symbol: str, period: str) -> pd.DataFrame:
+        """
+        Bars of the last `period` for a symbol (treat as read-only).
+        
+        Args:
+            symbol: Ticker symbol
+            period: Lookback period, one of PERIOD_MONTHS
+            
+        Returns:
+            Daily bars, empty if the symbol could not be fetched
+        """
+        if symbol in self.bars:
+            self.hits += 1
+        elif symbol in self._pending:
+            # Another agent is already fetching this symbol
+            self.hits += 1
+            await self._pending[symbol]
+        else:
+            self.misses += 1
+            self._pending[symbol] = asyncio.create_task(self._fetch_symbol(symbol))
+            await self._pending[symbol]
+        
+        bars = self.bars.get(symbol)
+        if bars is None or bars.empty:
+            return pd.DataFrame()
+        
+        cutoff = pd.Timestamp.now(tz=bars.index.tz) - pd.DateOffset(months=PERIOD_MONTHS.get(period, 6))
+        return bars.loc[bars.index >= cutoff.normalize()]
+    
+    def summary(self) -> Dict[str, Any]:
+        """Cache statistics of the cycle."""
+        return {
+            'symbols_cached': len(self.bars),
+            'cache_hits': self.hits,
+            'cache_misses': self.misses,
+            'bulk_requests': self.bulk_requests,
+            'single_requests': self.single_requests,
+            'fetch_seconds': round(self.fetch_seconds, 3)
+        }
+    
+    async def _fetch_symbol(self, symbol: str) -> None:
+        """Fetch one symbol that the bulk download did not return."""
+        start = time.perf_counter()
+        try:
+            self.single_requests += 1
+            bars = await self.runner.run(symbol, _fetch_history, symbol, self.period)
+            self.bars[symbol] = bars
+        except Exception as e:
+            logger.warning(f"Market data fetch failed for {symbol}: {e}")
+            self.bars[symbol] = pd.DataFrame()
+        finally:
+            self.fetch_seconds += time.perf_counter() - start
+            self._pending.pop(symbol, None)
+    
+    def _download(self, symbols: List[str]) -> Dict[str, pd.DataFrame]:
+        """Download bars for many symbols in one request."""
+        data = yf.download(symbols, period=self.period, group_by='ticker', auto_adjust=True,
+                           actions=False, progress=False, threads=True)
+        if data is None or data.empty:
+            return {}
+        
+        if not isinstance(data.columns, pd.MultiIndex):
+            return {symbols[0]: data.dropna(how='all')}
+        
+        bars = {}
+        available = set(data.columns.get_level_values(0))
+        for symbol in symbols:
+            if symbol in available:
+                frame = data[symbol].dropna(how='all')
+                if not frame.empty:
+                    bars[symbol] = frame
+        return bars
+
+def _fetch_history(symbol: str, period: str) -> pd.DataFrame:
+    """Daily bars of a symbol (blocking)."""
+    return yf.Ticker(symbol).history(period=period)
+
+def _fetch_news(symbol: str) -> List[Dict[str, Any]]:
+    """Recent news items of a symbol (blocking)."""
+    return yf.Ticker(symbol).news
+
+# Snapshot of the running cycle; agent tasks inherit it from the cycle that created them,
+# so overlapping cycles each see their own
+_cycle_market_data: ContextVar[Optional[MarketDataSnapshot]] = ContextVar('cycle_market_data', default=None)
+
 class IndividualAgentService:
     """Service for running individual agents and generating predictions."""
     
@@ -52,6 +187,14 @@ class IndividualAgentService:
         
         # Symbols to analyze - will be fetched from database dynamically
         self.symbols = []  # Will be populated from managed_symbols table
+        
+        # Blocking yfinance calls run off the event loop, at most two per symbol at a time
+        self.blocking_calls = BlockingCallRunner(max_workers=8, per_key_limit=2, timeout=30.0)
+        
+        # Bulk writes of predictions
+        self.writer = BatchWriter(db_pool)
+        
+        self.last_cycle_summary: Dict[str, Any] = {}
     
     async def _load_symbols_from_database(self):
         """Load active symbols from the database."""
@@ -70,36 +213,65 @@ class IndividualAgentService:
         """Run all individual agents and generate predictions."""
         logger.info("🤖 Starting individual agent prediction generation...")
         
+        cycle_start = time.perf_counter()
+        
         # Load symbols from database
         await self._load_symbols_from_database()
+        symbols = list(self.symbols)
         
-        all_predictions = []
-        
-        # Run agents in parallel for better performance
-        tasks = []
-        for agent_name, agent_func in self.agents.items():
-            task = asyncio.create_task(self._run_agent(agent_name, agent_func))
-            tasks.append(task)
+        # Fetch market data once for all agents (SPY is the market reference)
+        market_data = MarketDataSnapshot(self.blocking_calls, period='6mo')
+        await market_data.load(symbols + ['SPY'])
         
-        # Wait for all agents to complete
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        all_predictions = []
+        snapshot_token = _cycle_market_data.set(market_data)
         
-        # Collect all predictions
-        for result in results:
-            if isinstance(result, Exception):
-                logger.error(f"Agent failed: {result}")
-            elif isinstance(result, list):
-                all_predictions.extend(result)
+        try:
+            # Run agents in parallel for better performance
+            tasks = []
+            for agent_name, agent_func in self.agents.items():
+                task = asyncio.create_task(self._run_agent(agent_name, agent_func, symbols))
+                tasks.append(task)
+            
+            # Wait for all agents to complete
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+            
+            # Collect all predictions
+            for result in results:
+                if isinstance(result, Exception):
+                    logger.error(f"Agent failed: {result}")
+                elif isinstance(result, list):
+                    all_predictions.extend(result)
+        finally:
+            _cycle_market_data.reset(snapshot_token)
+            self.last_cycle_summary = {
+                'timestamp': datetime.now().isoformat(),
+                'symbols': len(symbols),
+                'agents': len(self.agents),
+                'predictions': len(all_predictions),
+                'duration_seconds': round(time.perf_counter() - cycle_start, 3),
+                'blocking_call_timeouts': self.blocking_calls.timeouts,
+                **market_data.summary()
+            }
         
-        logger.info(f"✅ Generated {len(all_predictions)} individual agent predictions")
+        logger.info(f"✅ Generated {len(all_predictions)} individual agent predictions "
+                    f"(market data cache: {self.last_cycle_summary['cache_hits']} hits, "
+                    f"{self.last_cycle_summary['cache_misses']} misses)")
         return all_predictions
     
-    async def _run_agent(self, agent_name: str, agent_func) -> List[AgentPrediction]:
-        """Run a single agent for all symbols."""
+    async def _get_history(self, symbol: str, period: str) -> pd.DataFrame:
+        """Daily bars for a symbol, from the cycle snapshot when one is active."""
+        market_data = _cycle_market_data.get()
+        if market_data is not None:
+            return await market_data.history(symbol, period)
+        return await self.blocking_calls.run(symbol, _fetch_history, symbol, period)
+    
+    async def _run_agent(self, agent_name: str, agent_func, symbols: List[str]) -> List[AgentPrediction]:
+        """Run a single agent for all symbols of the cycle."""
         predictions = []
         
         try:
-            for symbol in self.symbols:
+            for symbol in symbols:
                 try:
                     prediction = await agent_func(symbol)
                     if prediction:
@@ -116,8 +288,7 @@ class IndividualAgentService:
         """Momentum Agent - Analyzes price momentum and trend strength."""
         try:
             # Get recent price data
-            ticker = yf.Ticker(symbol)
-            hist = ticker.history(period="1mo")
+            hist = await self._get_history(symbol, "1mo")
             
             if len(hist) < 20:
                 return None
@@ -169,8 +340,7 @@ class IndividualAgentService:
         """Sentiment Agent - Analyzes real market sentiment using Yahoo Finance news."""
         try:
             # Get real news data from Yahoo Finance
-            ticker = yf.Ticker(symbol)
-            news_data = ticker.news
+            news_data = await self.blocking_calls.run(symbol, _fetch_news, symbol)
             
             if not news_data:
                 # Fallback to simulated sentiment if no news
@@ -272,11 +442,8 @@ class IndividualAgentService:
         """Correlation Agent - Analyzes correlation with market indices and sectors."""
         try:
             # Get data for symbol and market index
-            ticker = yf.Ticker(symbol)
-            spy = yf.Ticker('SPY')
-            
-            hist_symbol = ticker.history(period="3mo")
-            hist_spy = spy.history(period="3mo")
+            hist_symbol = await self._get_history(symbol, "3mo")
+            hist_spy = await self._get_history('SPY', "3mo")
             
             if len(hist_symbol) < 30 or len(hist_spy) < 30:
                 return None
@@ -332,8 +499,7 @@ class IndividualAgentService:
     async def _risk_agent(self, symbol: str) -> Optional[AgentPrediction]:
         """Risk Agent - Analyzes risk metrics and volatility."""
         try:
-            ticker = yf.Ticker(symbol)
-            hist = ticker.history(period="3mo")
+            hist = await self._get_history(symbol, "3mo")
             
             if len(hist) < 30:
                 return None
@@ -380,8 +546,7 @@ class IndividualAgentService:
     async def _volatility_agent(self, symbol: str) -> Optional[AgentPrediction]:
         """Volatility Agent - Analyzes volatility patterns and breakouts."""
         try:
-            ticker = yf.Ticker(symbol)
-            hist = ticker.history(period="2mo")
+            hist = await self._get_history(symbol, "2mo")
             
             if len(hist) < 20:
                 return None
@@ -441,8 +606,7 @@ class IndividualAgentService:
     async def _volume_agent(self, symbol: str) -> Optional[AgentPrediction]:
         """Volume Agent - Analyzes volume patterns and accumulation/distribution."""
         try:
-            ticker = yf.Ticker(symbol)
-            hist = ticker.history(period="2mo")
+            hist = await self._get_history(symbol, "2mo")
             
             if len(hist) < 20:
                 return None
@@ -544,8 +708,7 @@ class IndividualAgentService:
     async def _forecast_agent(self, symbol: str) -> Optional[AgentPrediction]:
         """Forecast Agent - Uses technical analysis for price forecasting."""
         try:
-            ticker = yf.Ticker(symbol)
-            hist = ticker.history(period="3mo")
+            hist = await self._get_history(symbol, "3mo")
             
             if len(hist) < 50:
                 return None
@@ -626,8 +789,7 @@ class IndividualAgentService:
     async def _strategy_agent(self, symbol: str) -> Optional[AgentPrediction]:
         """Strategy Agent - Implements various trading strategies."""
         try:
-            ticker = yf.Ticker(symbol)
-            hist = ticker.history(period="6mo")
+            hist = await self._get_history(symbol, "6mo")
             
             if len(hist) < 100:
                 return None
@@ -701,8 +863,7 @@ class IndividualAgentService:
         """Meta Agent - Analyzes market regime and adjusts other agent weights."""
         try:
             # Get market data for regime analysis
-            spy = yf.Ticker('SPY')
-            hist_spy = spy.history(period="6mo")
+            hist_spy = await self._get_history('SPY', "6mo")
             
             if len(hist_spy) < 100:
                 return None
@@ -773,34 +934,31 @@ class IndividualAgentService:
     async def store_predictions(self, predictions: List[AgentPrediction]) -> bool:
         """Store predictions in the database."""
         try:
-            async with self.db_pool.acquire() as conn:
-                # Clear old predictions (older than 1 hour)
-                await conn.execute("""
-                    DELETE FROM agent_signals 
-                    WHERE timestamp < NOW() - INTERVAL '1 hour'
-                """)
-                
-                # Insert new predictions
-                for prediction in predictions:
+            records = [
+                (
+                    prediction.agent_name,
+                    prediction.symbol,
+                    prediction.signal_type,
+                    prediction.confidence,
+                    prediction.reasoning,
                     # Clean metadata to remove NaN/Inf values
-                    cleaned_metadata = self._clean_metadata(prediction.metadata)
-                    
-                    await conn.execute("""
-                        INSERT INTO agent_signals (
-                            agent_name, symbol, signal_type, confidence, reasoning, metadata, timestamp
-                        ) VALUES ($1, $2, $3, $4, $5, $6, $7)
-                    """, 
-                        prediction.agent_name,
-                        prediction.symbol,
-                        prediction.signal_type,
-                        prediction.confidence,
-                        prediction.reasoning,
-                        json.dumps(cleaned_metadata),
-                        prediction.timestamp
-                    )
-                
+                    json.dumps(self._clean_metadata(prediction.metadata)),
+                    prediction.timestamp
+                )
+                for prediction in predictions
+            ]
+            
+            # Clear old predictions (older than 1 hour) and insert new ones in one transaction
+            success = await self.writer.write(
+                'agent_signals', AGENT_SIGNAL_COLUMNS, records,
+                before=("DELETE FROM agent_signals WHERE timestamp < NOW() - INTERVAL '1 hour'",)
+            )
+            
+            if success:
                 logger.info(f"✅ Stored {len(predictions)} individual agent predictions")
-                return True
+            else:
+                logger.error(f"❌ Failed to store {len(predictions)} individual agent predictions")
+            return success
                 
         except Exception as e:
             logger.error(f"❌ Failed to store predictions: {e}")
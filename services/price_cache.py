@@ -0,0 +1,143 @@
+"""
+Price Cache
+
+Latest prices of many symbols, shared across requests. Stale or unknown
+symbols are refreshed together in one bulk yfinance download; symbols the
+bulk download misses are fetched individually. All yfinance calls run
+through a BlockingCallRunner so they never block the event loop.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from services.blocking_calls import BlockingCallRunner
+
+logger = logging.getLogger(__name__)
+
+
+def _download_prices(symbols: List[str]) -> Dict[str, float]:
+    """Latest closing prices of many symbols in one request (blocking)."""
+    import yfinance as yf
+    data = yf.download(symbols, period='1d', group_by='ticker', auto_adjust=True,
+                       actions=False, progress=False, threads=True)
+    if data is None or data.empty:
+        return {}
+
+    if not isinstance(data.columns, pd.MultiIndex):
+        closes = data['Close'].dropna()
+        return {symbols[0]: float(closes.iloc[-1])} if not closes.empty else {}
+
+    prices = {}
+    available = set(data.columns.get_level_values(0))
+    for symbol in symbols:
+        if symbol in available:
+            closes = data[symbol]['Close'].dropna()
+            if not closes.empty:
+                prices[symbol] = float(closes.iloc[-1])
+    return prices
+
+
+def _fetch_price(symbol: str) -> Optional[float]:
+    """Latest closing price of one symbol (blocking)."""
+    import yfinance as yf
+    hist = yf.Ticker(symbol).history(period='1d')
+    return float(hist['Close'].iloc[-1]) if not hist.empty else None
+
+
+class PriceCache:
+    """Latest prices per symbol, refreshed in bulk once older than `ttl` seconds."""
+
+    def __init__(self, runner: BlockingCallRunner, ttl: float = 60.0):
+        """
+        Initialize the cache.
+
+        Args:
+            runner: Runner for the blocking yfinance calls
+            ttl: Seconds a price is served before it is refreshed
+        """
+        self.runner = runner
+        self.ttl = ttl
+        self._prices: Dict[str, Tuple[Optional[float], float]] = {}  # symbol -> (price or None, fetched at)
+        self._refresh_lock: Optional[asyncio.Lock] = None
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.bulk_requests = 0
+        self.single_requests = 0
+
+    async def get_prices(self, symbols: List[str]) -> Dict[str, float]:
+        """
+        Latest prices of symbols, refreshing stale ones in one bulk request.
+
+        Args:
+            symbols: Ticker symbols
+
+        Returns:
+            Prices by symbol; symbols without a price are left out
+        """
+        symbols = list(dict.fromkeys(symbols))
+        stale = self._stale(symbols)
+        self.hits += len(symbols) - len(stale)
+
+        if stale:
+            if self._refresh_lock is None:
+                self._refresh_lock = asyncio.Lock()
+            async with self._refresh_lock:
+                # Another request may have refreshed them meanwhile
+                stale = self._stale(stale)
+                if stale:
+                    self.misses += len(stale)
+                    await self._refresh(stale)
+
+        prices = {symbol: self._prices[symbol][0] for symbol in symbols if symbol in self._prices}
+        return {symbol: price for symbol, price in prices.items() if price is not None}
+
+    async def get_price(self, symbol: str) -> Optional[float]:
+        """Latest price of one symbol, or None if unavailable."""
+        return (await self.get_prices([symbol])).get(symbol)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Cache statistics."""
+        return {
+            'symbols_cached': sum(price is not None for price, _ in self._prices.values()),
+            'hits': self.hits,
+            'misses': self.misses,
+            'bulk_requests': self.bulk_requests,
+            'single_requests': self.single_requests
+        }
+
+    def _stale(self, symbols: List[str]) -> List[str]:
+        """Symbols without a price younger than ttl."""
+        now = time.monotonic()
+        return [symbol for symbol in symbols
+                if symbol not in self._prices or now - self._prices[symbol][1] > self.ttl]
+
+    async def _refresh(self, symbols: List[str]) -> None:
+        """Fetch prices of symbols, in bulk first and individually for the rest."""
+        prices: Dict[str, float] = {}
+        try:
+            self.bulk_requests += 1
+            prices = await self.runner.run(None, _download_prices, symbols, timeout=self.runner.timeout * 2)
+        except Exception as e:
+            logger.warning(f"Bulk price download failed, falling back to per-symbol requests: {e}")
+
+        missing = [symbol for symbol in symbols if symbol not in prices]
+        if missing:
+            self.single_requests += len(missing)
+            results = await asyncio.gather(*(self.runner.run(symbol, _fetch_price, symbol) for symbol in missing),
+                                           return_exceptions=True)
+            for symbol, price in zip(missing, results):
+                if isinstance(price, Exception):
+                    logger.warning(f"Price fetch failed for {symbol}: {price}")
+                elif price is not None:
+                    prices[symbol] = price
+
+        # Symbols without a price are remembered too, so they are not requested again until ttl passes
+        fetched_at = time.monotonic()
+        for symbol in symbols:
+            self._prices[symbol] = (prices.get(symbol), fetched_at)